@@ -0,0 +1,4 @@
+"""Benchmarks for bot hot paths.
+
+Run from the bot directory, e.g. ``python -m benchmarks.fanout``.
+"""
@@ -0,0 +1,56 @@
+"""Fake Telegram Bot session for benchmarks."""
+
+import asyncio
+
+from aiogram import Bot
+from aiogram.client.session.base import BaseSession
+from aiogram.methods import GetFile
+from aiogram.types import File
+
+
+class FakeSession(BaseSession):
+    """Session that answers every request after a fixed latency.
+
+    Downloaded files consist of ``file_size`` zero bytes.
+    """
+
+    def __init__(self, latency: float = 0.05, file_size: int = 256 * 1024):
+        super().__init__()
+        self.latency = latency
+        self.file_size = file_size
+        self.requests = 0
+
+    async def make_request(self, bot, method, timeout=None):  # noqa: ARG002
+        self.requests += 1
+        await asyncio.sleep(self.latency)
+        if isinstance(method, GetFile):
+            return File(
+                file_id=method.file_id,
+                file_unique_id=method.file_id,
+                file_path=f"photos/{method.file_id}.jpg",
+            )
+        return True
+
+    async def stream_content(
+        self,
+        url,  # noqa: ARG002
+        headers=None,  # noqa: ARG002
+        timeout=30,  # noqa: ARG002
+        chunk_size=65536,
+        raise_for_status=True,  # noqa: ARG002
+    ):
+        self.requests += 1
+        await asyncio.sleep(self.latency)
+        remaining = self.file_size
+        while remaining > 0:
+            size = min(chunk_size, remaining)
+            remaining -= size
+            yield bytes(size)
+
+    async def close(self):
+        pass
+
+
+def make_fake_bot(latency: float = 0.05, file_size: int = 256 * 1024) -> Bot:
+    """Create a Bot whose API calls take ``latency`` seconds and always succeed."""
+    return Bot(token="42:BENCHMARK", session=FakeSession(latency, file_size))
@@ -0,0 +1,86 @@
+"""Benchmark fan-out of a staff notification against a fake Bot session.
+
+Compares the old one-at-a-time loop with ``fan_out`` for 10, 100 and 1000
+recipients. Each fake API call takes ``--latency`` seconds.
+
+Usage:
+    python -m benchmarks.fanout [--latency 0.05] [--global-rate 30] [--limit 20]
+
+With Telegram's real global limit (30 msg/s) the fan-out wall time is bounded
+by the rate limit; raise ``--global-rate`` to measure the engine itself.
+"""
+
+import argparse
+import asyncio
+import os
+import time
+from functools import partial
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--latency", type=float, default=0.05, help="fake API latency (s)")
+    parser.add_argument("--global-rate", type=float, default=30, help="global msg/s limit")
+    parser.add_argument("--limit", type=int, default=20, help="fan-out concurrency")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 1000])
+    parser.add_argument(
+        "--skip-sequential", action="store_true", help="skip the sequential baseline"
+    )
+    return parser.parse_args()
+
+
+async def run(args: argparse.Namespace) -> None:
+    from core.fanout import fan_out
+    from core.outbound import Priority, outbound_queue
+    from locales import get_text, set_user_language_sync
+
+    from .fake_bot import make_fake_bot
+
+    bot = make_fake_bot(args.latency)
+
+    print(f"latency={args.latency}s global_rate={args.global_rate}/s limit={args.limit}")
+    print(f"{'recipients':>10} {'sequential (s)':>15} {'fan-out (s)':>12} {'speedup':>8}")
+
+    for size in args.sizes:
+        chat_ids = list(range(1_000_000, 1_000_000 + size))
+        for chat_id in chat_ids:
+            set_user_language_sync(chat_id, "en" if chat_id % 2 else "ru")
+
+        sequential = 0.0
+        if not args.skip_sequential:
+            started = time.perf_counter()
+            for chat_id in chat_ids:
+                await bot.send_message(
+                    chat_id=chat_id, text=get_text("staff_new_order", chat_id, title="Benchmark")
+                )
+            sequential = time.perf_counter() - started
+
+        async def prepare(chat_id: int):
+            return partial(
+                bot.send_message,
+                chat_id=chat_id,
+                text=get_text("staff_new_order", chat_id, title="Benchmark"),
+            )
+
+        started = time.perf_counter()
+        results = await fan_out(chat_ids, prepare, Priority.BROADCAST, limit=args.limit)
+        elapsed = time.perf_counter() - started
+        assert all(r.ok for r in results)
+
+        if args.skip_sequential:
+            print(f"{size:>10} {'-':>15} {elapsed:>12.2f} {'-':>8}")
+        else:
+            print(f"{size:>10} {sequential:>15.2f} {elapsed:>12.2f} {sequential / elapsed:>7.1f}x")
+
+    await outbound_queue.stop()
+
+
+def main() -> None:
+    args = parse_args()
+    # Rate limits are read from the environment when core is imported
+    os.environ["OUTBOUND_GLOBAL_RATE"] = str(args.global_rate)
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+"""Benchmark image pipeline throughput and event loop lag.
+
+Recompresses ``--count`` camera-sized JPEG photos (``--width`` x ``--height``,
+quality 95) inline on the event loop and through the ``ImagePipeline``
+process pool with 1..``--workers`` workers, then makes previews of them. A
+probe task records how late the event loop wakes up meanwhile. Requires
+Pillow.
+
+Usage:
+    python -m benchmarks.image_pipeline [--count 16] [--workers 4] [--width 4000]
+"""
+
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+from io import BytesIO
+from pathlib import Path
+
+from benchmarks.loop_lag import probe
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--count", type=int, default=16, help="images per run")
+    parser.add_argument("--workers", type=int, default=4, help="maximum pool size")
+    parser.add_argument("--width", type=int, default=4000, help="photo width")
+    parser.add_argument("--height", type=int, default=3000, help="photo height")
+    parser.add_argument("--interval", type=float, default=0.001, help="probe interval (s)")
+    return parser.parse_args()
+
+
+def make_photo(width: int, height: int) -> bytes:
+    """Build a JPEG with gradients and noise, compressing like a camera photo."""
+    from PIL import Image
+
+    gradient = Image.linear_gradient("L").resize((width, height))
+    noise = Image.frombytes("L", (width, height), os.urandom(width * height))
+    image = Image.merge("RGB", (gradient, Image.blend(gradient, noise, 0.15), noise))
+    output = BytesIO()
+    image.save(output, "JPEG", quality=95)
+    return output.getvalue()
+
+
+async def measure(run, args: argparse.Namespace) -> tuple[float, float]:
+    """Run ``run()`` and return (elapsed seconds, max event loop lag in ms)."""
+    lags: list[float] = []
+    stop = asyncio.Event()
+    probe_task = asyncio.create_task(probe(args.interval, lags, stop))
+    await asyncio.sleep(0.05)
+
+    started = time.perf_counter()
+    await run()
+    elapsed = time.perf_counter() - started
+
+    stop.set()
+    await probe_task
+    return elapsed, max(lags, default=0.0) * 1000
+
+
+def report(name: str, count: int, elapsed: float, lag_ms: float, size_in: int, size_out: int):
+    print(
+        f"{name:>14} {elapsed:>9.2f} {count / elapsed:>10.1f} "
+        f"{size_in / 1024 / 1024:>8.1f} {size_out / 1024 / 1024:>9.2f} {lag_ms:>12.1f}"
+    )
+
+
+async def run(args: argparse.Namespace) -> None:
+    from core.config import IMAGE_JPEG_QUALITY, IMAGE_MAX_DIMENSION
+    from core.image_pipeline import ImagePipeline, recompress_image
+
+    photo = make_photo(args.width, args.height)
+    photos = [photo] * args.count
+    print(
+        f"photo={args.width}x{args.height} ({len(photo) / 1024 / 1024:.1f} MiB) "
+        f"count={args.count} cpus={os.cpu_count()}"
+    )
+    print(
+        f"{'mode':>14} {'total (s)':>9} {'images/s':>10} {'in (MiB)':>8} "
+        f"{'out (MiB)':>9} {'max lag (ms)':>12}"
+    )
+
+    outputs: list[bytes | None] = []
+
+    async def inline():
+        outputs[:] = [recompress_image(p, IMAGE_MAX_DIMENSION, IMAGE_JPEG_QUALITY) for p in photos]
+
+    elapsed, lag = await measure(inline, args)
+    report("inline", args.count, elapsed, lag, len(photo) * args.count, sum(map(len, outputs)))
+
+    counts = [1]
+    while counts[-1] * 2 < args.workers:
+        counts.append(counts[-1] * 2)
+    if args.workers > 1:
+        counts.append(args.workers)
+
+    for workers in counts:
+        pipeline = ImagePipeline(enabled=True, workers=workers)
+        # Start the worker processes before timing
+        await pipeline.recompress(photo)
+
+        async def pooled(pipeline=pipeline):
+            outputs[:] = await asyncio.gather(*(pipeline.recompress(p) for p in photos))
+
+        elapsed, lag = await measure(pooled, args)
+        size_out = sum(len(o) for o in outputs if o)
+        report(f"pool x{workers}", args.count, elapsed, lag, len(photo) * args.count, size_out)
+        if workers != counts[-1]:
+            pipeline.close()
+
+    with tempfile.TemporaryDirectory() as directory:
+        source = Path(directory) / "photo.jpg"
+        source.write_bytes(photo)
+        targets = [str(Path(directory) / f"{i}.jpg") for i in range(args.count)]
+
+        async def previews():
+            await asyncio.gather(*(pipeline.preview(str(source), t) for t in targets))
+
+        elapsed, lag = await measure(previews, args)
+        size_out = sum(Path(t).stat().st_size for t in targets)
+        report(f"preview x{counts[-1]}", args.count, elapsed, lag, 0, size_out)
+    pipeline.close()
+
+
+def main() -> None:
+    asyncio.run(run(parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""Benchmark event loop lag while decoding concurrent base64 images.
+
+A probe task sleeps for ``--interval`` seconds in a loop and records how late
+it wakes up. Meanwhile ``--concurrency`` requests decode ``--image-mb`` MiB
+base64 images, either inline on the event loop (the old behaviour) or through
+``parse_base64_image``, which moves large payloads to a worker pool.
+
+Usage:
+    python -m benchmarks.loop_lag [--image-mb 4] [--concurrency 8] [--rounds 3]
+"""
+
+import argparse
+import asyncio
+import base64
+import os
+import statistics
+import struct
+import time
+import zlib
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--image-mb", type=float, default=4, help="decoded image size (MiB)")
+    parser.add_argument("--concurrency", type=int, default=8, help="concurrent images")
+    parser.add_argument("--rounds", type=int, default=3, help="waves of concurrent images")
+    parser.add_argument("--interval", type=float, default=0.001, help="probe interval (s)")
+    return parser.parse_args()
+
+
+def make_png_data_url(size: int) -> str:
+    """Build a PNG data URL of roughly ``size`` bytes (random, incompressible)."""
+
+    def chunk(kind: bytes, data: bytes) -> bytes:
+        return (
+            struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data))
+        )
+
+    ihdr = struct.pack(">IIBBBBB", 1024, 768, 8, 2, 0, 0, 0)
+    png = (
+        b"\x89PNG\r\n\x1a\n"
+        + chunk(b"IHDR", ihdr)
+        + chunk(b"IDAT", os.urandom(size))
+        + chunk(b"IEND", b"")
+    )
+    return "data:image/png;base64," + base64.b64encode(png).decode()
+
+
+async def probe(interval: float, lags: list[float], stop: asyncio.Event) -> None:
+    """Record how late each ``interval`` sleep wakes up."""
+    while not stop.is_set():
+        started = time.perf_counter()
+        await asyncio.sleep(interval)
+        lags.append(time.perf_counter() - started - interval)
+
+
+async def measure(decode, data_url: str, args: argparse.Namespace) -> tuple[float, list[float]]:
+    lags: list[float] = []
+    stop = asyncio.Event()
+    probe_task = asyncio.create_task(probe(args.interval, lags, stop))
+    await asyncio.sleep(0.05)
+
+    started = time.perf_counter()
+    for _ in range(args.rounds):
+        await asyncio.gather(*(decode(data_url) for _ in range(args.concurrency)))
+    elapsed = time.perf_counter() - started
+
+    stop.set()
+    await probe_task
+    return elapsed, lags
+
+
+def report(name: str, elapsed: float, lags: list[float]) -> None:
+    lags_ms = sorted(lag * 1000 for lag in lags)
+    p99 = lags_ms[int(len(lags_ms) * 0.99) - 1] if lags_ms else 0.0
+    print(
+        f"{name:>10} {elapsed:>9.2f} {len(lags_ms):>7} {statistics.median(lags_ms):>10.2f} "
+        f"{p99:>9.2f} {lags_ms[-1]:>9.2f}"
+    )
+
+
+async def run(args: argparse.Namespace) -> None:
+    from webhook.handlers.helpers import decode_base64_image, parse_base64_image
+
+    async def inline(data_url: str):
+        return decode_base64_image(data_url)
+
+    data_url = make_png_data_url(int(args.image_mb * 1024 * 1024))
+    print(
+        f"image={args.image_mb} MiB ({len(data_url) / 1024 / 1024:.1f} MiB base64) "
+        f"concurrency={args.concurrency} rounds={args.rounds}"
+    )
+    print(
+        f"{'mode':>10} {'total (s)':>9} {'probes':>7} {'median (ms)':>10} "
+        f"{'p99 (ms)':>9} {'max (ms)':>9}"
+    )
+    report("inline", *await measure(inline, data_url, args))
+    report("offloaded", *await measure(parse_base64_image, data_url, args))
+
+
+def main() -> None:
+    asyncio.run(run(parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""Benchmark decoding and validation of webhook payloads.
+
+Compares the previous path (``json.loads`` into a dict, then ``data.get``
+lookups) with the precompiled msgspec decoders of ``webhook.schemas``, for a
+small notification and for support messages carrying ``--images`` base64
+images of ``--image-kb`` KiB each.
+
+Usage:
+    python -m benchmarks.payload_decode [--images 4] [--image-kb 512] [--rounds 20000]
+"""
+
+import argparse
+import base64
+import json
+import os
+import time
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--images", type=int, default=4, help="images per support message")
+    parser.add_argument("--image-kb", type=int, default=512, help="image size (KiB)")
+    parser.add_argument("--rounds", type=int, default=20000, help="decodes of small payloads")
+    return parser.parse_args()
+
+
+def decode_dict_notify(body: bytes):
+    data = json.loads(body)
+    if not isinstance(data, dict):
+        raise ValueError("Invalid JSON body")
+    return (
+        data.get("telegramId"),
+        data.get("type"),
+        data.get("orderTitle", ""),
+        data.get("status", ""),
+        data.get("paymentMethodName", ""),
+        data.get("paymentDetails", ""),
+        data.get("totalAmount", 0),
+    )
+
+
+def decode_dict_message(body: bytes):
+    data = json.loads(body)
+    if not isinstance(data, dict):
+        raise ValueError("Invalid JSON body")
+    return (
+        data.get("telegramId"),
+        data.get("message", ""),
+        data.get("orderTitle", ""),
+        data.get("orderId", ""),
+        data.get("imageUrls", []),
+    )
+
+
+def timed(decode, body: bytes, rounds: int) -> float:
+    """Mean decode time in microseconds."""
+    started = time.perf_counter()
+    for _ in range(rounds):
+        decode(body)
+    return (time.perf_counter() - started) / rounds * 1e6
+
+
+def report(name: str, size: int, before: float, after: float) -> None:
+    print(f"{name:>16} {size / 1024:>10.1f} {before:>12.2f} {after:>12.2f} {before / after:>8.2f}x")
+
+
+def main() -> None:
+    args = parse_args()
+    from webhook.schemas import NotifyPayload, SendMessagePayload, payload_decoder
+
+    notify = json.dumps(
+        {
+            "telegramId": "123456789",
+            "type": "payment_info_received",
+            "orderTitle": "Landing page for a bakery",
+            "paymentMethodName": "Card",
+            "paymentDetails": "4000 0000 0000 0000",
+            "totalAmount": 150,
+        }
+    ).encode()
+    image = "data:image/png;base64," + base64.b64encode(os.urandom(args.image_kb * 1024)).decode()
+    text_message = json.dumps(
+        {"telegramId": "123456789", "message": "Hello! " * 40, "orderTitle": "T", "orderId": "o1"}
+    ).encode()
+    image_message = json.dumps(
+        {"telegramId": "123456789", "message": "See attached", "imageUrls": [image] * args.images}
+    ).encode()
+
+    notify_decoder = payload_decoder(NotifyPayload)
+    message_decoder = payload_decoder(SendMessagePayload)
+    large_rounds = max(1, args.rounds // 1000)
+
+    print(
+        f"{'payload':>16} {'size (KiB)':>10} {'dict (us)':>12} {'msgspec (us)':>12} {'speedup':>9}"
+    )
+    for name, body, before, after, rounds in [
+        ("notify", notify, decode_dict_notify, notify_decoder.decode, args.rounds),
+        ("text message", text_message, decode_dict_message, message_decoder.decode, args.rounds),
+        ("image message", image_message, decode_dict_message, message_decoder.decode, large_rounds),
+    ]:
+        report(name, len(body), timed(before, body, rounds), timed(after, body, rounds))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""Benchmark resolving inbound album photos to download URLs.
+
+Compares one ``getFile`` call after another (the old behaviour) with
+``FileResolver.resolve_urls``, cold and with the ``file_unique_id`` cache
+warm, for albums of 1, 5 and 10 photos. Each fake API call takes
+``--latency`` seconds.
+
+Usage:
+    python -m benchmarks.photo_resolve [--latency 0.05] [--sizes 1 5 10]
+"""
+
+import argparse
+import asyncio
+import time
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--latency", type=float, default=0.05, help="fake API latency (s)")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1, 5, 10])
+    return parser.parse_args()
+
+
+async def run(args: argparse.Namespace) -> None:
+    from aiogram.types import PhotoSize
+
+    from core.files import FileResolver, file_url
+
+    from .fake_bot import make_fake_bot
+
+    bot = make_fake_bot(args.latency)
+    resolver = FileResolver()
+
+    print(f"latency={args.latency}s concurrency={resolver.concurrency}")
+    print(f"{'photos':>6} {'sequential (s)':>15} {'concurrent (s)':>15} {'cached (s)':>11}")
+
+    for size in args.sizes:
+        photos = [
+            PhotoSize(file_id=f"{size}-{i}", file_unique_id=f"{size}-{i}", width=1280, height=960)
+            for i in range(size)
+        ]
+
+        started = time.perf_counter()
+        for photo in photos:
+            file = await bot.get_file(photo.file_id)
+            file_url(bot, file.file_path)
+        sequential = time.perf_counter() - started
+
+        started = time.perf_counter()
+        await resolver.resolve_urls(bot, photos)
+        concurrent = time.perf_counter() - started
+
+        started = time.perf_counter()
+        await resolver.resolve_urls(bot, photos)
+        cached = time.perf_counter() - started
+
+        print(f"{size:>6} {sequential:>15.3f} {concurrent:>15.3f} {cached:>11.4f}")
+
+
+def main() -> None:
+    asyncio.run(run(parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,12 @@
 """Core bot components."""
 
 from .api_client import CRMApiClient, api_client
+from .callback_ack import CallbackAck, CallbackAckMiddleware
+from .concurrency import gather_isolated
 from .config import (
     BOT_TOKEN,
+    CHAT_ACK_MODE,
+    CHAT_ACK_REACTION,
     CRM_API_URL,
     CRM_BASE_URL,
     CRM_HOST,
@@ -20,7 +24,10 @@ from .message_manager import (
     safe_delete_message,
     send_and_track,
     set_last_message_id,
+    track_message,
 )
+from .outbound import OutboundQueue, Priority, outbound_queue
+from .scheduler import DeletionScheduler, deletion_scheduler, schedule_delete
 from .states import (
     ChatState,
     OrderCreation,
@@ -32,6 +39,8 @@ from .states import (
 
 __all__ = [
     "BOT_TOKEN",
+    "CHAT_ACK_MODE",
+    "CHAT_ACK_REACTION",
     "CRM_API_URL",
     "CRM_BASE_URL",
     "CRM_HOST",
@@ -41,18 +50,28 @@ __all__ = [
     "WEBHOOK_HOST",
     "WEBHOOK_PORT",
     "CRMApiClient",
+    "CallbackAck",
+    "CallbackAckMiddleware",
     "ChatState",
+    "DeletionScheduler",
     "OrderCreation",
+    "OutboundQueue",
+    "Priority",
     "api_client",
     "clear_active_chat",
     "clear_last_message_id",
     "delete_last_message",
+    "deletion_scheduler",
     "edit_or_send",
+    "gather_isolated",
     "get_active_chat",
     "get_last_message_id",
     "is_user_in_chat",
+    "outbound_queue",
     "safe_delete_message",
+    "schedule_delete",
     "send_and_track",
     "set_active_chat",
     "set_last_message_id",
+    "track_message",
 ]
@@ -0,0 +1,101 @@
+"""In-memory collector for inbound media groups (albums).
+
+Telegram delivers each photo of an album as a separate message sharing a
+``media_group_id``. ``AlbumCollector`` gathers the parts per album behind a
+single debounce timer: every new part resets the timer, and the album is
+flushed once no part arrived for ``quiet_gap`` seconds, when it holds the
+maximum of 10 parts, or at the latest ``max_wait`` seconds after its first
+part. Each album is flushed exactly once, without touching FSM storage.
+"""
+
+import asyncio
+import logging
+import time
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass, field
+
+from aiogram.types import Message
+
+from .config import ALBUM_MAX_WAIT, ALBUM_QUIET_GAP
+
+logger = logging.getLogger(__name__)
+
+# Telegram albums hold at most 10 items
+MAX_ALBUM_SIZE = 10
+
+AlbumHandler = Callable[[list[Message]], Awaitable[None]]
+
+
+@dataclass
+class _Album:
+    handler: AlbumHandler
+    started: float
+    messages: list[Message] = field(default_factory=list)
+    timer: asyncio.TimerHandle | None = None
+
+
+class AlbumCollector:
+    """Debounced aggregation of album parts keyed by chat and media group."""
+
+    def __init__(self, quiet_gap: float = ALBUM_QUIET_GAP, max_wait: float = ALBUM_MAX_WAIT):
+        self.quiet_gap = quiet_gap
+        self.max_wait = max_wait
+        self._albums: dict[tuple[int, str], _Album] = {}
+        self._tasks: set[asyncio.Task] = set()
+
+    @property
+    def pending(self) -> int:
+        """Number of albums still collecting parts."""
+        return len(self._albums)
+
+    def add(self, message: Message, handler: AlbumHandler) -> None:
+        """Add an album part.
+
+        ``handler`` receives all parts of the album, ordered by message ID,
+        once the album is complete. The handler of the first part is used.
+        """
+        key = (message.chat.id, message.media_group_id)
+        now = time.monotonic()
+        album = self._albums.get(key)
+        if album is None:
+            album = self._albums[key] = _Album(handler=handler, started=now)
+        album.messages.append(message)
+
+        if album.timer is not None:
+            album.timer.cancel()
+            album.timer = None
+
+        if len(album.messages) >= MAX_ALBUM_SIZE:
+            self._flush(key)
+            return
+
+        delay = min(self.quiet_gap, album.started + self.max_wait - now)
+        album.timer = asyncio.get_running_loop().call_later(max(0.0, delay), self._flush, key)
+
+    def _flush(self, key: tuple[int, str]) -> None:
+        album = self._albums.pop(key, None)
+        if album is None:
+            return
+        if album.timer is not None:
+            album.timer.cancel()
+        messages = sorted(album.messages, key=lambda m: m.message_id)
+        task = asyncio.create_task(self._deliver(album.handler, messages))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _deliver(self, handler: AlbumHandler, messages: list[Message]) -> None:
+        try:
+            await handler(messages)
+        except Exception as e:
+            logger.error(f"Failed to handle album {messages[0].media_group_id}: {e}")
+
+    async def stop(self) -> None:
+        """Flush every pending album and wait for the handlers to finish."""
+        for key in list(self._albums):
+            self._flush(key)
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+
+
+# Global album collector instance
+album_collector = AlbumCollector()
@@ -0,0 +1,125 @@
+"""Immediate acknowledgment of callback queries.
+
+Telegram shows a spinner on the pressed button until the callback query is
+answered, and answers arriving after Telegram's answer window fail outright.
+The middleware answers every callback query right away, while the handler is
+still running. Handlers get a ``callback_ack`` object to show notices; since
+the query is usually answered by then, a notice arrives as a chat message that
+is deleted after ``LATE_NOTICE_DELETE_DELAY`` seconds:
+
+    @router.callback_query(F.data == "x")
+    async def handler(callback: CallbackQuery, callback_ack: CallbackAck):
+        await callback_ack.answer(get_text("error", user_id))
+
+Handlers that must answer with an alert opt out of the immediate answer with
+``flags={"callback_ack": "manual"}``. They are still answered automatically
+once ``MANUAL_ACK_DEADLINE`` passes or the handler returns, so they should
+answer before doing any slow work.
+"""
+
+import asyncio
+import logging
+from collections.abc import Awaitable, Callable
+from typing import Any
+
+from aiogram import BaseMiddleware
+from aiogram.dispatcher.flags import get_flag
+from aiogram.types import CallbackQuery, TelegramObject
+
+from .scheduler import schedule_delete
+
+logger = logging.getLogger(__name__)
+
+# Flag value that disables the immediate answer for a handler
+ACK_MANUAL = "manual"
+
+# Seconds a manual handler has to answer before it is answered automatically
+MANUAL_ACK_DEADLINE = 0.5
+
+# Seconds a late notice message stays visible (long enough to be read)
+LATE_NOTICE_DELETE_DELAY = 10.0
+
+
+class CallbackAck:
+    """Answer state of a single callback query."""
+
+    def __init__(self, callback: CallbackQuery):
+        self.callback = callback
+        self.answered = False
+
+    async def answer(self, text: str | None = None, show_alert: bool = False) -> bool:
+        """Answer the callback query once.
+
+        If the query was already answered, a notice text is delivered as a chat
+        message instead (short-lived for toasts, kept for alerts).
+
+        Returns True if the callback query itself was answered by this call.
+        """
+        if not self.answered:
+            self.answered = True
+            try:
+                await self.callback.answer(text, show_alert=show_alert)
+                return True
+            except Exception as e:
+                logger.debug(f"Could not answer callback query: {e}")
+                if not text:
+                    return False
+
+        if text:
+            await self._send_notice(text, keep=show_alert)
+        return False
+
+    async def _send_notice(self, text: str, keep: bool) -> None:
+        try:
+            sent = await self.callback.bot.send_message(
+                chat_id=self.callback.from_user.id, text=text
+            )
+            if not keep:
+                schedule_delete(sent.chat.id, sent.message_id, LATE_NOTICE_DELETE_DELAY)
+        except Exception as e:
+            logger.error(f"Failed to send callback notice: {e}")
+
+
+class CallbackAckMiddleware(BaseMiddleware):
+    """Middleware that acknowledges callback queries immediately."""
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: dict[str, Any],
+    ) -> Any:
+        if not isinstance(event, CallbackQuery):
+            return await handler(event, data)
+
+        ack = CallbackAck(event)
+        data["callback_ack"] = ack
+
+        if get_flag(data, "callback_ack") == ACK_MANUAL:
+            return await self._run_manual(handler, event, data, ack)
+
+        # Answer concurrently with the handler
+        ack_task = asyncio.create_task(ack.answer())
+        try:
+            return await handler(event, data)
+        finally:
+            await ack_task
+
+    async def _run_manual(
+        self,
+        handler: Callable[[TelegramObject, dict[str, Any]], Awaitable[Any]],
+        event: CallbackQuery,
+        data: dict[str, Any],
+        ack: CallbackAck,
+    ) -> Any:
+        handler_task = asyncio.ensure_future(handler(event, data))
+        try:
+            done, _ = await asyncio.wait({handler_task}, timeout=MANUAL_ACK_DEADLINE)
+            if not done and not ack.answered:
+                await ack.answer()
+            return await handler_task
+        finally:
+            if not handler_task.done():
+                handler_task.cancel()
+            if not ack.answered:
+                await ack.answer()
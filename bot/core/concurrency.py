@@ -0,0 +1,49 @@
+"""Structured concurrency helpers for handlers.
+
+Independent I/O inside a handler (cleanup, CRM reads, persistence) should run
+concurrently so the user waits for the slowest call rather than the sum.
+"""
+
+import asyncio
+import logging
+from collections.abc import Awaitable, Collection
+from typing import Any, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+async def _isolate(aw: Awaitable[T]) -> T | Exception:
+    """Await an awaitable, returning its exception instead of raising it."""
+    try:
+        return await aw
+    except Exception as e:
+        logger.debug(f"Concurrent call failed: {e!r}")
+        return e
+
+
+async def gather_isolated(*aws: Awaitable[Any], raise_on: Collection[int] = ()) -> list[Any]:
+    """Run awaitables concurrently in a TaskGroup with error isolation.
+
+    A failure in one call neither cancels nor affects the others: its
+    exception is returned in place of the result. Results keep argument order.
+
+    Args:
+        *aws: Awaitables to run concurrently
+        raise_on: Indexes of calls whose failure is raised (once all calls have
+            finished) instead of returned, e.g. the call the handler depends on
+
+    Returns:
+        List of results (or exceptions) in the same order as the arguments
+
+    Raises:
+        Exception: The exception of the first failed call listed in ``raise_on``
+    """
+    async with asyncio.TaskGroup() as tg:
+        tasks = [tg.create_task(_isolate(aw)) for aw in aws]
+    results = [task.result() for task in tasks]
+    for index in sorted(raise_on):
+        if isinstance(results[index], Exception):
+            raise results[index]
+    return results
@@ -53,7 +53,116 @@ CRM_API_URL = f"{CRM_BASE_URL}/api/trpc"
 # Webhook server configuration (for receiving messages from CRM)
 WEBHOOK_HOST = os.getenv("WEBHOOK_HOST", "0.0.0.0")
 WEBHOOK_PORT = int(os.getenv("WEBHOOK_PORT", "8081"))
+# Maximum webhook request body in bytes (albums carry several base64 images)
+WEBHOOK_MAX_BODY_SIZE = int(os.getenv("WEBHOOK_MAX_BODY_SIZE", str(32 * 1024 * 1024)))
+# Admission control of CRM requests: requests handled at once (0 = unlimited),
+# their total declared body size, and requests waiting (at most
+# WEBHOOK_QUEUE_TIMEOUT seconds) before the server answers 429 with Retry-After
+WEBHOOK_MAX_IN_FLIGHT = int(os.getenv("WEBHOOK_MAX_IN_FLIGHT", "64"))
+WEBHOOK_MAX_IN_FLIGHT_BYTES = int(os.getenv("WEBHOOK_MAX_IN_FLIGHT_BYTES", str(256 * 1024 * 1024)))
+WEBHOOK_MAX_QUEUED = int(os.getenv("WEBHOOK_MAX_QUEUED", "256"))
+WEBHOOK_QUEUE_TIMEOUT = float(os.getenv("WEBHOOK_QUEUE_TIMEOUT", "10"))
+# Limits of multipart image uploads (Telegram accepts photos up to 10 MB)
+UPLOAD_MAX_IMAGE_SIZE = int(os.getenv("UPLOAD_MAX_IMAGE_SIZE", str(10 * 1024 * 1024)))
+UPLOAD_MAX_IMAGES = int(os.getenv("UPLOAD_MAX_IMAGES", "50"))
+# Base64 images longer than this (in characters) are decoded on a worker pool
+IMAGE_DECODE_OFFLOAD_THRESHOLD = int(os.getenv("IMAGE_DECODE_OFFLOAD_THRESHOLD", "262144"))
+IMAGE_DECODE_WORKERS = int(os.getenv("IMAGE_DECODE_WORKERS", "2"))
+# Reject images whose dimensions Telegram does not accept for photos
+IMAGE_CHECK_DIMENSIONS = os.getenv("IMAGE_CHECK_DIMENSIONS", "true").lower() == "true"
+# Optional image pipeline (requires Pillow), run in a process pool: images from
+# the CRM above the threshold (bytes) are scaled down to IMAGE_MAX_DIMENSION and
+# re-encoded as JPEG; cached customer media gets previews for CRM thumbnails
+IMAGE_PIPELINE = os.getenv("IMAGE_PIPELINE", "false").lower() == "true"
+IMAGE_PIPELINE_WORKERS = int(os.getenv("IMAGE_PIPELINE_WORKERS", "2"))
+IMAGE_RECOMPRESS_THRESHOLD = int(os.getenv("IMAGE_RECOMPRESS_THRESHOLD", str(1024 * 1024)))
+# Telegram scales photos down to 2560 pixels on the longest side anyway
+IMAGE_MAX_DIMENSION = int(os.getenv("IMAGE_MAX_DIMENSION", "2560"))
+IMAGE_JPEG_QUALITY = int(os.getenv("IMAGE_JPEG_QUALITY", "85"))
+IMAGE_PREVIEW_SIZE = int(os.getenv("IMAGE_PREVIEW_SIZE", "480"))
+IMAGE_PREVIEW_QUALITY = int(os.getenv("IMAGE_PREVIEW_QUALITY", "75"))
 
 # Supported languages
 SUPPORTED_LANGUAGES = ["en", "ru"]
 DEFAULT_LANGUAGE = "en"
+
+# Chat acknowledgment mode for customer messages:
+#   - "reaction": react to the customer's message (one API call, nothing to clean up)
+#   - "message": send a short-lived confirmation message and delete it
+# Reaction mode falls back to a confirmation message if the reaction cannot be set.
+CHAT_ACK_MODE = os.getenv("CHAT_ACK_MODE", "reaction")
+CHAT_ACK_REACTION = os.getenv("CHAT_ACK_REACTION", "👍")
+
+# Outbound Telegram rate limits (messages per second)
+OUTBOUND_GLOBAL_RATE = float(os.getenv("OUTBOUND_GLOBAL_RATE", "30"))
+OUTBOUND_CHAT_RATE = float(os.getenv("OUTBOUND_CHAT_RATE", "1"))
+# Short bursts allowed per chat before the per-chat rate applies
+OUTBOUND_CHAT_BURST = float(os.getenv("OUTBOUND_CHAT_BURST", "3"))
+
+# Flood control (429) handling: retries per send and the longest retry_after honored
+OUTBOUND_MAX_RETRIES = int(os.getenv("OUTBOUND_MAX_RETRIES", "3"))
+OUTBOUND_MAX_RETRY_AFTER = float(os.getenv("OUTBOUND_MAX_RETRY_AFTER", "60"))
+
+# Maximum recipients notified concurrently by fan-out broadcasts and batch
+# webhook requests
+FANOUT_CONCURRENCY = int(os.getenv("FANOUT_CONCURRENCY", "20"))
+# Maximum payloads in one batch webhook request (/notify-batch, ...)
+BATCH_MAX_ITEMS = int(os.getenv("BATCH_MAX_ITEMS", "500"))
+# Seconds during which successive order status notifications and support
+# texts for the same chat and order are merged into one message (0 disables)
+WEBHOOK_COALESCE_WINDOW = float(os.getenv("WEBHOOK_COALESCE_WINDOW", "0"))
+
+# Cache of Telegram file IDs for uploaded images, keyed by content hash.
+# Set FILE_ID_CACHE_PATH to an empty value to keep the cache in memory only.
+FILE_ID_CACHE_SIZE = int(os.getenv("FILE_ID_CACHE_SIZE", "1000"))
+FILE_ID_CACHE_PATH = os.getenv("FILE_ID_CACHE_PATH", "file_ids.json")
+
+# Resolution of inbound customer photos (getFile): concurrent calls and the
+# cache of file paths by file_unique_id (Telegram links stay valid for 1 hour)
+FILE_RESOLVE_CONCURRENCY = int(os.getenv("FILE_RESOLVE_CONCURRENCY", "8"))
+FILE_PATH_CACHE_SIZE = int(os.getenv("FILE_PATH_CACHE_SIZE", "2000"))
+FILE_PATH_CACHE_TTL = float(os.getenv("FILE_PATH_CACHE_TTL", "3000"))
+
+# Customer media forwarded to the CRM:
+#   - "off": pass Telegram download URLs (contain the bot token, expire after 1 hour)
+#   - "relay": stream files into the CRM media store (POST /api/bot/media)
+#   - "cache": pass signed URLs of the bot's /media endpoint, which serves files
+#     from a local disk cache filled from Telegram on first view
+MEDIA_RELAY_MODE = os.getenv("MEDIA_RELAY_MODE", "off")
+MEDIA_RELAY_CONCURRENCY = int(os.getenv("MEDIA_RELAY_CONCURRENCY", "4"))
+# Bot API downloads are limited to 20 MB
+MEDIA_RELAY_MAX_SIZE = int(os.getenv("MEDIA_RELAY_MAX_SIZE", str(20 * 1024 * 1024)))
+# Shared secret sent to the CRM media endpoint (must match the CRM's BOT_MEDIA_TOKEN)
+BOT_MEDIA_TOKEN = os.getenv("BOT_MEDIA_TOKEN", "")
+# Port of the media server (cache mode); kept apart from the webhook server so
+# only /media has to be reachable by CRM users
+MEDIA_PORT = int(os.getenv("MEDIA_PORT", "8082"))
+# Base URL at which CRM users reach the media server (cache mode)
+BOT_PUBLIC_URL = os.getenv("BOT_PUBLIC_URL", f"http://localhost:{MEDIA_PORT}").rstrip("/")
+MEDIA_CACHE_DIR = os.getenv("MEDIA_CACHE_DIR", "media_cache")
+MEDIA_CACHE_MAX_BYTES = int(os.getenv("MEDIA_CACHE_MAX_BYTES", str(1024 * 1024 * 1024)))
+
+# Inbound albums: flushed after this quiet gap between parts (seconds), and at
+# the latest this long after the first part
+ALBUM_QUIET_GAP = float(os.getenv("ALBUM_QUIET_GAP", "0.3"))
+ALBUM_MAX_WAIT = float(os.getenv("ALBUM_MAX_WAIT", "2.0"))
+
+# Asynchronous webhook delivery through a durable local outbox:
+#   - "off": deliver while the CRM request is open (default)
+#   - "opt-in": queue requests sent with a "Prefer: respond-async" header
+#   - "always": queue every request
+WEBHOOK_ASYNC_MODE = os.getenv("WEBHOOK_ASYNC_MODE", "off")
+OUTBOX_PATH = os.getenv("OUTBOX_PATH", "outbox.sqlite3")
+# Optional URL receiving the final outcome of each queued delivery
+OUTBOX_CALLBACK_URL = os.getenv("OUTBOX_CALLBACK_URL", "")
+OUTBOX_CONCURRENCY = int(os.getenv("OUTBOX_CONCURRENCY", "10"))
+OUTBOX_MAX_ATTEMPTS = int(os.getenv("OUTBOX_MAX_ATTEMPTS", "5"))
+OUTBOX_RETENTION_HOURS = float(os.getenv("OUTBOX_RETENTION_HOURS", "24"))
+
+# Idempotency keys of webhook requests ("Idempotency-Key" header): results are
+# kept for IDEMPOTENCY_TTL seconds and repeats get the original result. Set
+# IDEMPOTENCY_REDIS_URL (Redis or Dragonfly) to share results between bot
+# instances; otherwise they are kept in memory (at most IDEMPOTENCY_MAX_KEYS).
+IDEMPOTENCY_TTL = float(os.getenv("IDEMPOTENCY_TTL", "86400"))
+IDEMPOTENCY_MAX_KEYS = int(os.getenv("IDEMPOTENCY_MAX_KEYS", "10000"))
+IDEMPOTENCY_REDIS_URL = os.getenv("IDEMPOTENCY_REDIS_URL", "")
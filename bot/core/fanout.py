@@ -0,0 +1,63 @@
+"""Bounded-concurrency fan-out of a message to many recipients.
+
+Sends are started concurrently (up to ``limit`` in flight) and each one goes
+through the outbound queue, so Telegram rate limits still apply. A failing
+recipient never delays or aborts the others; every recipient gets a result.
+"""
+
+import asyncio
+import logging
+from collections.abc import Awaitable, Callable, Iterable
+from dataclasses import dataclass
+from typing import Any
+
+from .config import FANOUT_CONCURRENCY
+from .outbound import Priority, outbound_queue
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class FanOutResult:
+    """Delivery result for a single recipient."""
+
+    chat_id: int
+    ok: bool
+    error: str | None = None
+
+
+async def fan_out(
+    chat_ids: Iterable[int],
+    factory: Callable[[int], Awaitable[Callable[[], Awaitable[Any]]]],
+    priority: Priority = Priority.BROADCAST,
+    limit: int = FANOUT_CONCURRENCY,
+) -> list[FanOutResult]:
+    """Send to every recipient concurrently with bounded concurrency.
+
+    Args:
+        chat_ids: Recipient chat IDs (duplicates are sent once)
+        factory: Async callable preparing the send for a recipient (e.g. loading
+            the recipient's language) and returning a zero-argument callable
+            that performs the Telegram API call
+        priority: Outbound queue priority lane
+        limit: Maximum number of recipients in flight at once
+
+    Returns:
+        One result per recipient, in input order
+    """
+    semaphore = asyncio.Semaphore(limit)
+
+    async def deliver(chat_id: int) -> FanOutResult:
+        async with semaphore:
+            try:
+                send = await factory(chat_id)
+                await outbound_queue.send(chat_id, send, priority)
+                return FanOutResult(chat_id, ok=True)
+            except Exception as e:
+                logger.warning(f"Fan-out delivery to {chat_id} failed: {e}")
+                return FanOutResult(chat_id, ok=False, error=str(e))
+
+    unique_ids = list(dict.fromkeys(chat_ids))
+    async with asyncio.TaskGroup() as tg:
+        tasks = [tg.create_task(deliver(chat_id)) for chat_id in unique_ids]
+    return [task.result() for task in tasks]
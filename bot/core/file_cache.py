@@ -0,0 +1,97 @@
+"""Content-addressed cache of Telegram file IDs.
+
+Telegram returns a ``file_id`` for every uploaded photo, and the same bot can
+send that ``file_id`` again without uploading the bytes. The cache maps a
+hash of the image bytes to the ``file_id`` of its first upload, so repeated
+screenshots are sent without re-uploading them.
+
+The cache is a bounded LRU. It can optionally be persisted to a JSON file
+across restarts. File IDs are only valid for the bot that uploaded them, so
+the file records the bot ID and is ignored if it belongs to another bot.
+"""
+
+import hashlib
+import json
+import logging
+from collections import OrderedDict
+from pathlib import Path
+
+from .config import FILE_ID_CACHE_PATH, FILE_ID_CACHE_SIZE
+from .metrics import file_id_cache_entries, file_id_cache_lookups
+
+logger = logging.getLogger(__name__)
+
+
+def content_hash(data: bytes) -> str:
+    """Hash file contents into a cache key."""
+    return hashlib.sha256(data).hexdigest()
+
+
+class FileIdCache:
+    """Bounded LRU mapping content hashes to Telegram file IDs."""
+
+    def __init__(self, max_size: int = FILE_ID_CACHE_SIZE, path: str = FILE_ID_CACHE_PATH):
+        self.max_size = max_size
+        self.path = path
+        self._entries: OrderedDict[str, str] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, digest: str) -> str | None:
+        """Get the file ID for a content hash, if it was uploaded before."""
+        file_id = self._entries.get(digest)
+        if file_id is None:
+            file_id_cache_lookups.inc(result="miss")
+            return None
+        self._entries.move_to_end(digest)
+        file_id_cache_lookups.inc(result="hit")
+        return file_id
+
+    def put(self, digest: str, file_id: str) -> None:
+        """Remember the file ID of uploaded content."""
+        self._entries[digest] = file_id
+        self._entries.move_to_end(digest)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+        file_id_cache_entries.set(len(self._entries))
+
+    def discard(self, digest: str) -> None:
+        """Forget a file ID (e.g. after Telegram rejected it)."""
+        self._entries.pop(digest, None)
+        file_id_cache_entries.set(len(self._entries))
+
+    def load(self, bot_id: int) -> None:
+        """Load persisted entries of ``bot_id`` (no-op if persistence is disabled)."""
+        if not self.path or not Path(self.path).exists():
+            return
+        try:
+            data = json.loads(Path(self.path).read_text(encoding="utf-8"))
+        except (OSError, ValueError) as e:
+            logger.warning(f"Failed to load file ID cache from {self.path}: {e}")
+            return
+
+        if data.get("botId") != bot_id:
+            logger.info("File ID cache belongs to another bot, starting empty")
+            return
+        for digest, file_id in data.get("entries", []):
+            self.put(digest, file_id)
+        logger.info(f"Loaded {len(self._entries)} cached file IDs")
+
+    def save(self, bot_id: int) -> None:
+        """Persist entries (no-op if persistence is disabled)."""
+        if not self.path:
+            return
+        tmp_path = Path(f"{self.path}.tmp")
+        try:
+            tmp_path.write_text(
+                json.dumps({"botId": bot_id, "entries": list(self._entries.items())}),
+                encoding="utf-8",
+            )
+            tmp_path.replace(self.path)
+        except OSError as e:
+            logger.warning(f"Failed to save file ID cache to {self.path}: {e}")
+
+
+# Global file ID cache instance
+file_id_cache = FileIdCache()
@@ -0,0 +1,108 @@
+"""Resolution of inbound Telegram files to download URLs.
+
+Forwarding a customer photo to the CRM needs its download URL, which takes a
+``getFile`` call. ``FileResolver`` runs these calls concurrently (bounded by
+a shared semaphore), coalesces concurrent lookups of the same file and caches
+resolved paths by ``file_unique_id`` so resends and re-forwards skip the call.
+
+Telegram keeps download links valid for at least an hour, so cached paths
+expire before that.
+"""
+
+import asyncio
+import time
+from collections import OrderedDict
+from collections.abc import Sequence
+
+from aiogram import Bot
+from aiogram.types import Document, PhotoSize, Video
+
+from .config import FILE_PATH_CACHE_SIZE, FILE_PATH_CACHE_TTL, FILE_RESOLVE_CONCURRENCY
+from .metrics import file_path_cache_lookups, photo_resolve_seconds
+
+# Inbound files that can be downloaded through getFile
+Downloadable = PhotoSize | Document | Video
+
+
+def file_url(bot: Bot, file_path: str) -> str:
+    """Build the download URL of a Telegram file."""
+    return f"https://api.telegram.org/file/bot{bot.token}/{file_path}"
+
+
+class FileResolver:
+    """Concurrent, cached ``getFile`` resolution keyed by ``file_unique_id``."""
+
+    def __init__(
+        self,
+        max_size: int = FILE_PATH_CACHE_SIZE,
+        ttl: float = FILE_PATH_CACHE_TTL,
+        concurrency: int = FILE_RESOLVE_CONCURRENCY,
+    ):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.concurrency = concurrency
+        # file_unique_id -> (file_path, monotonic expiry)
+        self._paths: OrderedDict[str, tuple[str, float]] = OrderedDict()
+        self._pending: dict[str, asyncio.Future] = {}
+        self._semaphore: asyncio.Semaphore | None = None
+
+    def _cached(self, unique_id: str) -> str | None:
+        entry = self._paths.get(unique_id)
+        if entry is None:
+            return None
+        file_path, expires = entry
+        if expires <= time.monotonic():
+            del self._paths[unique_id]
+            return None
+        self._paths.move_to_end(unique_id)
+        return file_path
+
+    def _store(self, unique_id: str, file_path: str) -> None:
+        self._paths[unique_id] = (file_path, time.monotonic() + self.ttl)
+        self._paths.move_to_end(unique_id)
+        while len(self._paths) > self.max_size:
+            self._paths.popitem(last=False)
+
+    async def _fetch(self, bot: Bot, file_id: str, unique_id: str) -> str:
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.concurrency)
+        async with self._semaphore:
+            file = await bot.get_file(file_id)
+        self._store(unique_id, file.file_path)
+        return file.file_path
+
+    async def resolve(self, bot: Bot, file_id: str, unique_id: str) -> str:
+        """Get the file path of a file, calling ``getFile`` only on a cache miss."""
+        file_path = self._cached(unique_id)
+        if file_path is not None:
+            file_path_cache_lookups.inc(result="hit")
+            return file_path
+
+        # Share an in-flight lookup of the same file
+        pending = self._pending.get(unique_id)
+        if pending is not None:
+            file_path_cache_lookups.inc(result="pending")
+            return await asyncio.shield(pending)
+
+        file_path_cache_lookups.inc(result="miss")
+        future = asyncio.ensure_future(self._fetch(bot, file_id, unique_id))
+        self._pending[unique_id] = future
+        future.add_done_callback(lambda _: self._pending.pop(unique_id, None))
+        return await asyncio.shield(future)
+
+    async def resolve_path(self, bot: Bot, media: Downloadable) -> str:
+        """Get the file path of an inbound file."""
+        return await self.resolve(bot, media.file_id, media.file_unique_id)
+
+    async def resolve_urls(self, bot: Bot, files: Sequence[Downloadable]) -> list[str]:
+        """Resolve download URLs of files concurrently, in input order."""
+        started = time.perf_counter()
+        paths = await asyncio.gather(*(self.resolve_path(bot, media) for media in files))
+        photo_resolve_seconds.observe(
+            time.perf_counter() - started, kind="album" if len(files) > 1 else "single"
+        )
+        return [file_url(bot, path) for path in paths]
+
+
+# Global file resolver instance
+file_resolver = FileResolver()
@@ -0,0 +1,176 @@
+"""Optional image recompression and preview stage.
+
+Large images are passed through at full size by default: customer photos go
+to the CRM as-is and CRM images are uploaded to Telegram as-is. With
+``IMAGE_PIPELINE`` enabled:
+
+- images from the CRM above ``IMAGE_RECOMPRESS_THRESHOLD`` bytes are scaled
+  down to ``IMAGE_MAX_DIMENSION`` and re-encoded as JPEG before upload;
+- cached customer files get a small JPEG preview for CRM chat thumbnails
+  (``/media/...&variant=preview``).
+
+Image work is CPU-bound and holds the GIL, so it runs in a process pool and
+never blocks the event loop. Pillow is an optional dependency: without it the
+stage is disabled and images pass through unchanged.
+"""
+
+import asyncio
+import logging
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+from io import BytesIO
+from pathlib import Path
+
+from .config import (
+    IMAGE_JPEG_QUALITY,
+    IMAGE_MAX_DIMENSION,
+    IMAGE_PIPELINE,
+    IMAGE_PIPELINE_WORKERS,
+    IMAGE_PREVIEW_QUALITY,
+    IMAGE_PREVIEW_SIZE,
+    IMAGE_RECOMPRESS_THRESHOLD,
+)
+from .metrics import image_pipeline_bytes, image_pipeline_seconds
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:
+    Image = ImageOps = None
+
+logger = logging.getLogger(__name__)
+
+# Background of flattened transparent images (JPEG has no alpha channel)
+FLATTEN_BACKGROUND = (255, 255, 255)
+
+
+def _to_rgb(image: "Image.Image") -> "Image.Image":
+    # Apply the EXIF orientation, which is lost on re-encoding
+    image = ImageOps.exif_transpose(image)
+    if image.mode in ("RGBA", "LA", "P"):
+        image = image.convert("RGBA")
+        background = Image.new("RGB", image.size, FLATTEN_BACKGROUND)
+        background.paste(image, mask=image.getchannel("A"))
+        return background
+    return image.convert("RGB")
+
+
+def _encode(image: "Image.Image", quality: int) -> bytes:
+    output = BytesIO()
+    image.save(output, "JPEG", quality=quality, optimize=True, progressive=True)
+    return output.getvalue()
+
+
+def recompress_image(data: bytes, max_dimension: int, quality: int) -> bytes | None:
+    """Scale an image down to ``max_dimension`` and re-encode it as JPEG.
+
+    Returns None when the image is animated or the result is not smaller.
+    Runs in a worker process.
+    """
+    with Image.open(BytesIO(data)) as source:
+        if getattr(source, "is_animated", False):
+            return None
+        image = _to_rgb(source)
+    image.thumbnail((max_dimension, max_dimension), Image.Resampling.LANCZOS)
+    result = _encode(image, quality)
+    return result if len(result) < len(data) else None
+
+
+def write_preview(source: str, target: str, size: int, quality: int) -> int:
+    """Write a JPEG preview of an image file bounded by ``size`` pixels.
+
+    Returns the preview size in bytes. Runs in a worker process.
+    """
+    with Image.open(source) as original:
+        # Let the JPEG decoder skip detail that the preview drops
+        original.draft("RGB", (size, size))
+        image = _to_rgb(original)
+    image.thumbnail((size, size), Image.Resampling.LANCZOS)
+    result = _encode(image, quality)
+    Path(target).write_bytes(result)
+    return len(result)
+
+
+class ImagePipeline:
+    """Process pool running image recompression and preview generation."""
+
+    def __init__(
+        self,
+        enabled: bool = IMAGE_PIPELINE,
+        workers: int = IMAGE_PIPELINE_WORKERS,
+        threshold: int = IMAGE_RECOMPRESS_THRESHOLD,
+        max_dimension: int = IMAGE_MAX_DIMENSION,
+        quality: int = IMAGE_JPEG_QUALITY,
+        preview_size: int = IMAGE_PREVIEW_SIZE,
+        preview_quality: int = IMAGE_PREVIEW_QUALITY,
+    ):
+        if enabled and Image is None:
+            logger.warning("IMAGE_PIPELINE is enabled but Pillow is not installed")
+        self.enabled = enabled and Image is not None
+        self.workers = workers
+        self.threshold = threshold
+        self.max_dimension = max_dimension
+        self.quality = quality
+        self.preview_size = preview_size
+        self.preview_quality = preview_quality
+        self._executor: ProcessPoolExecutor | None = None
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            # Forking a process with running threads is unsafe
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers, mp_context=multiprocessing.get_context("spawn")
+            )
+        return self._executor
+
+    def close(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    async def _run(self, stage: str, func, *args):
+        loop = asyncio.get_running_loop()
+        started = time.perf_counter()
+        result = "error"
+        try:
+            value = await loop.run_in_executor(self._get_executor(), func, *args)
+            result = "ok" if value is not None else "skipped"
+            return value
+        finally:
+            image_pipeline_seconds.observe(
+                time.perf_counter() - started, stage=stage, result=result
+            )
+
+    async def recompress(self, data: bytes) -> bytes | None:
+        """Get a smaller JPEG copy of a large image, or None to keep the original."""
+        if not self.enabled or len(data) < self.threshold:
+            return None
+        try:
+            result = await self._run(
+                "recompress", recompress_image, data, self.max_dimension, self.quality
+            )
+        except Exception as e:
+            logger.warning(f"Failed to recompress image: {e}")
+            return None
+        if result is not None:
+            image_pipeline_bytes.inc(len(data), stage="recompress", direction="in")
+            image_pipeline_bytes.inc(len(result), stage="recompress", direction="out")
+        return result
+
+    async def preview(self, source: str, target: str) -> bool:
+        """Write a preview of an image file. Returns False if it cannot be made."""
+        if not self.enabled:
+            return False
+        try:
+            size = await self._run(
+                "preview", write_preview, source, target, self.preview_size, self.preview_quality
+            )
+        except Exception as e:
+            logger.warning(f"Failed to make preview of {source}: {e}")
+            return False
+        image_pipeline_bytes.inc(size, stage="preview", direction="out")
+        return True
+
+
+# Global image pipeline instance
+image_pipeline = ImagePipeline()
@@ -0,0 +1,255 @@
+"""Pull-through disk cache of customer media served by the media server.
+
+In cache mode the CRM receives signed URLs of the media server's ``/media``
+endpoint instead of Telegram download URLs. The first request for a file
+downloads it from Telegram into ``MEDIA_CACHE_DIR``; later requests are served
+straight from disk. The cache is bounded by total size and evicts the least
+recently used files first; files still being served are deleted only once
+they have been sent. Files are keyed by ``file_unique_id``, so their contents
+never change and can be cached by browsers indefinitely.
+
+With the image pipeline enabled, ``fetch_preview`` also keeps small JPEG
+previews of cached images for CRM chat thumbnails, as separate cache entries.
+
+URLs are signed with an HMAC of the file IDs keyed by the bot token, so the
+endpoint cannot be used to download arbitrary files through the bot.
+"""
+
+import asyncio
+import hashlib
+import hmac
+import logging
+import os
+import time
+from collections import Counter, OrderedDict
+from collections.abc import Callable
+from pathlib import Path, PurePosixPath
+from urllib.parse import urlencode
+
+from aiogram import Bot
+
+from .config import BOT_PUBLIC_URL, BOT_TOKEN, MEDIA_CACHE_DIR, MEDIA_CACHE_MAX_BYTES
+from .files import Downloadable, file_resolver, file_url
+from .image_pipeline import image_pipeline
+from .metrics import media_cache_bytes, media_cache_download_bytes, media_cache_lookups
+
+logger = logging.getLogger(__name__)
+
+# Chunk size of downloads from Telegram
+CHUNK_SIZE = 64 * 1024
+
+# Suffix of files still being downloaded
+PARTIAL_SUFFIX = ".part"
+
+# Cache key suffix of previews
+PREVIEW_SUFFIX = ".preview"
+
+
+class MediaCache:
+    """Size-bounded LRU disk cache of Telegram files keyed by ``file_unique_id``."""
+
+    def __init__(
+        self,
+        directory: str = MEDIA_CACHE_DIR,
+        max_bytes: int = MEDIA_CACHE_MAX_BYTES,
+        secret: str = BOT_TOKEN,
+    ):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self._key = hashlib.sha256(f"media:{secret}".encode()).digest()
+        # file_unique_id -> (path, size), least recently used first
+        self._files: OrderedDict[str, tuple[Path, int]] = OrderedDict()
+        self._size = 0
+        self._pending: dict[str, asyncio.Future] = {}
+        # Files no preview can be made of (not images)
+        self._no_preview: set[str] = set()
+        # Requests serving a file (by file_unique_id), and evicted entries of
+        # pinned files, unlinked on their last release
+        self._pins: Counter[str] = Counter()
+        self._evicted: dict[str, Path] = {}
+
+    def __len__(self) -> int:
+        return len(self._files)
+
+    @property
+    def size(self) -> int:
+        """Total bytes of cached files."""
+        return self._size
+
+    def sign(self, file_id: str, unique_id: str) -> str:
+        """Signature of a media URL."""
+        message = f"{unique_id}:{file_id}".encode()
+        return hmac.new(self._key, message, hashlib.sha256).hexdigest()[:32]
+
+    def verify(self, file_id: str, unique_id: str, signature: str) -> bool:
+        """Check the signature of a media URL."""
+        return hmac.compare_digest(self.sign(file_id, unique_id), signature)
+
+    def url_for(self, media: Downloadable) -> str:
+        """Signed URL of a file on the media server's /media endpoint."""
+        query = urlencode(
+            {"id": media.file_id, "sig": self.sign(media.file_id, media.file_unique_id)}
+        )
+        return f"{BOT_PUBLIC_URL}/media/{media.file_unique_id}?{query}"
+
+    def load(self) -> None:
+        """Index files left in the cache directory, least recently used first."""
+        if not self.directory.is_dir():
+            return
+
+        entries = []
+        for path in self.directory.iterdir():
+            if not path.is_file():
+                continue
+            if path.suffix == PARTIAL_SUFFIX:
+                # Interrupted download
+                path.unlink(missing_ok=True)
+                continue
+            stat = path.stat()
+            entries.append((stat.st_atime, path, stat.st_size))
+
+        self._files.clear()
+        self._size = 0
+        for _, path, size in sorted(entries):
+            self._add(path.stem, path, size)
+        logger.info(f"Loaded {len(self._files)} cached media files ({self._size} bytes)")
+
+    def pin(self, unique_id: str) -> Callable[[], None]:
+        """Keep a file and its preview on disk until the returned function is called.
+
+        Evicting a pinned file drops it from the index right away, but deletes
+        it only on the last release, so a path handed to a request stays valid
+        until the file has been sent. Releasing more than once has no effect.
+        """
+        self._pins[unique_id] += 1
+        released = False
+
+        def release() -> None:
+            nonlocal released
+            if released:
+                return
+            released = True
+            self._pins[unique_id] -= 1
+            if self._pins[unique_id] > 0:
+                return
+            del self._pins[unique_id]
+            for key in (unique_id, f"{unique_id}{PREVIEW_SUFFIX}"):
+                path = self._evicted.pop(key, None)
+                if path is not None:
+                    path.unlink(missing_ok=True)
+
+        return release
+
+    def _add(self, unique_id: str, path: Path, size: int) -> None:
+        previous = self._files.pop(unique_id, None)
+        if previous is not None:
+            self._size -= previous[1]
+        # A re-download replaces the file of an evicted entry
+        self._evicted.pop(unique_id, None)
+        self._files[unique_id] = (path, size)
+        self._size += size
+
+        # Evict least recently used files, never the one just added
+        while self._size > self.max_bytes and len(self._files) > 1:
+            old_key, (old_path, old_size) = self._files.popitem(last=False)
+            if old_key.removesuffix(PREVIEW_SUFFIX) in self._pins:
+                self._evicted[old_key] = old_path
+            else:
+                old_path.unlink(missing_ok=True)
+            self._size -= old_size
+        media_cache_bytes.set(self._size)
+
+    def _cached(self, unique_id: str) -> Path | None:
+        entry = self._files.get(unique_id)
+        if entry is None:
+            return None
+        path = entry[0]
+        try:
+            # Record the access time to keep the LRU order across restarts. The
+            # modification time stays put, as the ETag is derived from it.
+            os.utime(path, ns=(time.time_ns(), path.stat().st_mtime_ns))
+        except FileNotFoundError:
+            self._size -= self._files.pop(unique_id)[1]
+            media_cache_bytes.set(self._size)
+            return None
+        self._files.move_to_end(unique_id)
+        return path
+
+    async def _download(self, bot: Bot, file_id: str, unique_id: str) -> Path:
+        file_path = await file_resolver.resolve(bot, file_id, unique_id)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        target = self.directory / f"{unique_id}{PurePosixPath(file_path).suffix}"
+        partial = target.with_name(target.name + PARTIAL_SUFFIX)
+
+        size = 0
+        try:
+            # Disk writes run in a thread to keep them off the event loop
+            f = await asyncio.to_thread(partial.open, "wb")
+            try:
+                async for chunk in bot.session.stream_content(
+                    file_url(bot, file_path), chunk_size=CHUNK_SIZE
+                ):
+                    await asyncio.to_thread(f.write, chunk)
+                    size += len(chunk)
+            finally:
+                await asyncio.to_thread(f.close)
+            partial.replace(target)
+        except BaseException:
+            partial.unlink(missing_ok=True)
+            raise
+
+        media_cache_download_bytes.inc(size)
+        self._add(unique_id, target, size)
+        logger.info(f"Cached media file {unique_id} ({size} bytes)")
+        return target
+
+    async def _coalesce(self, key: str, factory) -> Path:
+        """Await the download or job producing ``key``, starting it if needed."""
+        pending = self._pending.get(key)
+        if pending is not None:
+            media_cache_lookups.inc(result="pending")
+            return await asyncio.shield(pending)
+
+        media_cache_lookups.inc(result="miss")
+        future = asyncio.ensure_future(factory())
+        self._pending[key] = future
+        future.add_done_callback(lambda _: self._pending.pop(key, None))
+        return await asyncio.shield(future)
+
+    async def fetch(self, bot: Bot, file_id: str, unique_id: str) -> Path:
+        """Get the local path of a file, downloading it from Telegram on a miss."""
+        path = self._cached(unique_id)
+        if path is not None:
+            media_cache_lookups.inc(result="hit")
+            return path
+
+        # Share an in-flight download of the same file
+        return await self._coalesce(unique_id, lambda: self._download(bot, file_id, unique_id))
+
+    async def _make_preview(self, original: Path, key: str) -> Path:
+        target = self.directory / f"{key}.jpg"
+        partial = target.with_name(target.name + PARTIAL_SUFFIX)
+        if not await image_pipeline.preview(str(original), str(partial)):
+            partial.unlink(missing_ok=True)
+            self._no_preview.add(key)
+            return original
+        partial.replace(target)
+        self._add(key, target, target.stat().st_size)
+        return target
+
+    async def fetch_preview(self, bot: Bot, file_id: str, unique_id: str) -> Path:
+        """Get the local path of a file's preview, or of the file if it has none."""
+        key = f"{unique_id}{PREVIEW_SUFFIX}"
+        path = self._cached(key)
+        if path is not None:
+            media_cache_lookups.inc(result="hit")
+            return path
+
+        original = await self.fetch(bot, file_id, unique_id)
+        if not image_pipeline.enabled or key in self._no_preview:
+            return original
+        return await self._coalesce(key, lambda: self._make_preview(original, key))
+
+
+# Global media cache instance
+media_cache = MediaCache()
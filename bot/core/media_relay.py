@@ -0,0 +1,168 @@
+"""Relay of inbound customer media to the CRM.
+
+By default the CRM receives Telegram download URLs, which embed the bot token
+and expire after an hour. In relay mode the bot downloads each file from
+Telegram and streams it chunk by chunk into the CRM's media upload endpoint,
+so the CRM stores its own copy and never sees the token. Files are never
+buffered in memory as a whole.
+
+Relay mode requires ``BOT_MEDIA_TOKEN``, the shared secret the CRM checks on
+uploads; without it the bot falls back to passing Telegram URLs.
+
+Transfers are capped by a shared semaphore; bytes, durations and results are
+recorded per media kind. Relayed URLs are cached by ``file_unique_id``, so
+re-forwarding the same file does not transfer it again.
+"""
+
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from collections.abc import AsyncIterator, Sequence
+
+import aiohttp
+from aiogram import Bot
+from aiogram.types import PhotoSize, Video
+
+from .config import (
+    BOT_MEDIA_TOKEN,
+    CRM_BASE_URL,
+    MEDIA_RELAY_CONCURRENCY,
+    MEDIA_RELAY_MAX_SIZE,
+    MEDIA_RELAY_MODE,
+)
+from .files import Downloadable, file_resolver, file_url
+from .media_cache import media_cache
+from .metrics import media_relay_bytes, media_relay_in_flight, media_relay_seconds
+
+logger = logging.getLogger(__name__)
+
+MEDIA_RELAY_MODE_OFF = "off"
+MEDIA_RELAY_MODE_RELAY = "relay"
+MEDIA_RELAY_MODE_CACHE = "cache"
+
+# Chunk size of the download/upload stream
+CHUNK_SIZE = 64 * 1024
+
+# Relayed URLs remembered by file_unique_id
+URL_CACHE_SIZE = 1000
+
+
+def describe_media(media: Downloadable) -> tuple[str, str]:
+    """Get the media kind (for metrics) and content type of a file."""
+    if isinstance(media, PhotoSize):
+        # Telegram re-encodes photos as JPEG
+        return "photo", "image/jpeg"
+    if isinstance(media, Video):
+        return "video", media.mime_type or "video/mp4"
+    return "document", media.mime_type or "application/octet-stream"
+
+
+class MediaTooLarge(Exception):
+    """Raised when a file exceeds the relay size limit."""
+
+
+class MediaRelay:
+    """Streams Telegram files into the CRM media store."""
+
+    def __init__(
+        self,
+        enabled: bool = MEDIA_RELAY_MODE == MEDIA_RELAY_MODE_RELAY,
+        token: str = BOT_MEDIA_TOKEN,
+        upload_url: str = f"{CRM_BASE_URL}/api/bot/media",
+        concurrency: int = MEDIA_RELAY_CONCURRENCY,
+        max_size: int = MEDIA_RELAY_MAX_SIZE,
+    ):
+        if enabled and not token:
+            logger.warning("MEDIA_RELAY_MODE=relay requires BOT_MEDIA_TOKEN, relay is disabled")
+        self.enabled = enabled and bool(token)
+        self.token = token
+        self.upload_url = upload_url
+        self.concurrency = concurrency
+        self.max_size = max_size
+        self._semaphore: asyncio.Semaphore | None = None
+        self._session: aiohttp.ClientSession | None = None
+        self._urls: OrderedDict[str, str] = OrderedDict()
+
+    async def _get_session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession()
+        return self._session
+
+    async def close(self) -> None:
+        if self._session and not self._session.closed:
+            await self._session.close()
+
+    async def _download(self, bot: Bot, url: str, counter: list[int]) -> AsyncIterator[bytes]:
+        """Yield the file from Telegram chunk by chunk, enforcing the size limit."""
+        async for chunk in bot.session.stream_content(url, chunk_size=CHUNK_SIZE):
+            counter[0] += len(chunk)
+            if counter[0] > self.max_size:
+                raise MediaTooLarge(f"File exceeds {self.max_size} bytes")
+            yield chunk
+
+    async def relay(self, bot: Bot, media: Downloadable) -> str:
+        """Stream a file from Telegram into the CRM and return its CRM URL."""
+        kind, mime_type = describe_media(media)
+        cached = self._urls.get(media.file_unique_id)
+        if cached is not None:
+            self._urls.move_to_end(media.file_unique_id)
+            return cached
+
+        if media.file_size and media.file_size > self.max_size:
+            media_relay_seconds.observe(0.0, kind=kind, result="too_large")
+            raise MediaTooLarge(f"File exceeds {self.max_size} bytes")
+
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.concurrency)
+
+        async with self._semaphore:
+            media_relay_in_flight.inc(kind=kind)
+            started = time.perf_counter()
+            transferred = [0]
+            result = "error"
+            try:
+                source = file_url(bot, await file_resolver.resolve_path(bot, media))
+                headers = {"Content-Type": mime_type, "X-Bot-Token": self.token}
+
+                session = await self._get_session()
+                async with session.post(
+                    self.upload_url, data=self._download(bot, source, transferred), headers=headers
+                ) as response:
+                    if response.status >= 400:
+                        raise Exception(f"CRM media upload failed with {response.status}")
+                    url = (await response.json())["url"]
+                result = "ok"
+            except Exception:
+                # The size check fires inside the upload body stream
+                if transferred[0] > self.max_size:
+                    result = "too_large"
+                raise
+            finally:
+                media_relay_in_flight.dec(kind=kind)
+                media_relay_bytes.inc(transferred[0], kind=kind)
+                media_relay_seconds.observe(time.perf_counter() - started, kind=kind, result=result)
+
+        self._urls[media.file_unique_id] = url
+        while len(self._urls) > URL_CACHE_SIZE:
+            self._urls.popitem(last=False)
+        logger.info(f"Relayed {kind} ({transferred[0]} bytes) to the CRM")
+        return url
+
+
+async def media_urls(bot: Bot, files: Sequence[Downloadable]) -> list[str]:
+    """Get CRM-facing URLs of inbound files, in input order.
+
+    Relays the files into the CRM in relay mode and returns signed URLs of the
+    media server's cache in cache mode; otherwise returns Telegram download URLs.
+    """
+    if media_relay.enabled:
+        return list(await asyncio.gather(*(media_relay.relay(bot, media) for media in files)))
+    if MEDIA_RELAY_MODE == MEDIA_RELAY_MODE_CACHE:
+        # Files are downloaded when the CRM first requests them
+        return [media_cache.url_for(media) for media in files]
+    return await file_resolver.resolve_urls(bot, files)
+
+
+# Global media relay instance
+media_relay = MediaRelay()
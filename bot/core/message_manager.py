@@ -2,19 +2,44 @@
 
 This module provides utilities to manage bot messages, ensuring clean UI
 by deleting or editing previous messages instead of accumulating them.
+
+The content (text + markup) of the tracked message is remembered as a hash,
+so edits that would not change anything are skipped without an API call.
 """
 
+import hashlib
 import logging
+from typing import NamedTuple
 
 from aiogram import Bot
 from aiogram.exceptions import TelegramBadRequest
 from aiogram.types import Message
 
+from .concurrency import gather_isolated
+
 logger = logging.getLogger(__name__)
 
+
+class _TrackedContent(NamedTuple):
+    """Content fingerprint of a tracked bot message."""
+
+    message_id: int
+    digest: str
+
+
 # Store last bot message ID per user for cleanup
 _last_bot_messages: dict[int, int] = {}
 
+# Content fingerprint of the last bot message per user
+_last_contents: dict[int, _TrackedContent] = {}
+
+
+def content_digest(text: str, reply_markup=None, parse_mode: str | None = "HTML") -> str:
+    """Compute a hash of message text, markup and parse mode."""
+    markup = reply_markup.model_dump_json(exclude_none=True) if reply_markup else ""
+    payload = f"{parse_mode}\x00{text}\x00{markup}".encode()
+    return hashlib.blake2b(payload, digest_size=16).hexdigest()
+
 
 def get_last_message_id(user_id: int) -> int | None:
     """Get the last bot message ID for a user."""
@@ -22,13 +47,40 @@ def get_last_message_id(user_id: int) -> int | None:
 
 
 def set_last_message_id(user_id: int, message_id: int) -> None:
-    """Store the last bot message ID for a user."""
+    """Store the last bot message ID for a user.
+
+    The content fingerprint is dropped because the content is unknown here.
+    """
     _last_bot_messages[user_id] = message_id
+    _last_contents.pop(user_id, None)
+
+
+def track_message(
+    user_id: int, message_id: int, text: str, reply_markup=None, parse_mode: str | None = "HTML"
+) -> None:
+    """Store the last bot message ID for a user together with its content hash."""
+    _last_bot_messages[user_id] = message_id
+    _last_contents[user_id] = _TrackedContent(
+        message_id, content_digest(text, reply_markup, parse_mode)
+    )
+
+
+def is_unchanged(
+    user_id: int, message_id: int, text: str, reply_markup=None, parse_mode: str | None = "HTML"
+) -> bool:
+    """Check if the tracked message already shows exactly this content."""
+    content = _last_contents.get(user_id)
+    return (
+        content is not None
+        and content.message_id == message_id
+        and content.digest == content_digest(text, reply_markup, parse_mode)
+    )
 
 
 def clear_last_message_id(user_id: int) -> None:
     """Clear the stored message ID for a user."""
     _last_bot_messages.pop(user_id, None)
+    _last_contents.pop(user_id, None)
 
 
 async def delete_last_message(bot: Bot, user_id: int) -> bool:
@@ -42,12 +94,12 @@ async def delete_last_message(bot: Bot, user_id: int) -> bool:
 
     try:
         await bot.delete_message(chat_id=user_id, message_id=message_id)
-        _last_bot_messages.pop(user_id, None)
+        clear_last_message_id(user_id)
         return True
     except TelegramBadRequest as e:
         # Message might already be deleted or too old
         logger.debug(f"Could not delete message {message_id} for user {user_id}: {e}")
-        _last_bot_messages.pop(user_id, None)
+        clear_last_message_id(user_id)
         return False
     except Exception as e:
         logger.error(f"Error deleting message: {e}")
@@ -92,15 +144,16 @@ async def send_and_track(
     user_id = message.from_user.id
     bot = message.bot
 
-    # Delete previous message if requested
-    if delete_previous:
-        await delete_last_message(bot, user_id)
+    send = message.answer(text, reply_markup=reply_markup, parse_mode=parse_mode)
 
-    # Send new message
-    sent = await message.answer(text, reply_markup=reply_markup, parse_mode=parse_mode)
+    # Delete previous message (if requested) while sending the new one
+    if delete_previous:
+        _, sent = await gather_isolated(delete_last_message(bot, user_id), send, raise_on=(1,))
+    else:
+        sent = await send
 
     # Track the new message
-    set_last_message_id(user_id, sent.message_id)
+    track_message(user_id, sent.message_id, text, reply_markup, parse_mode)
 
     return sent
 
@@ -111,6 +164,7 @@ async def edit_or_send(
     """Try to edit the message, or send a new one if editing fails.
 
     This is useful for callback handlers where we want to edit the existing message.
+    The edit is skipped if the message already shows this content.
 
     Args:
         message: The message to edit (typically callback.message)
@@ -123,16 +177,20 @@ async def edit_or_send(
     """
     user_id = message.chat.id
 
+    if is_unchanged(user_id, message.message_id, text, reply_markup, parse_mode):
+        return message
+
     try:
         await message.edit_text(text, reply_markup=reply_markup, parse_mode=parse_mode)
-        set_last_message_id(user_id, message.message_id)
+        track_message(user_id, message.message_id, text, reply_markup, parse_mode)
         return message
     except TelegramBadRequest as e:
         if "message is not modified" in str(e).lower():
             # Content is the same, no need to update
+            track_message(user_id, message.message_id, text, reply_markup, parse_mode)
             return message
         # If editing fails, send a new message
         logger.debug(f"Could not edit message, sending new one: {e}")
         sent = await message.answer(text, reply_markup=reply_markup, parse_mode=parse_mode)
-        set_last_message_id(user_id, sent.message_id)
+        track_message(user_id, sent.message_id, text, reply_markup, parse_mode)
         return sent
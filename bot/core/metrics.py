@@ -0,0 +1,369 @@
+"""Lightweight in-process metrics.
+
+Metrics are plain Python objects updated from the hot path without locks
+(everything runs on the event loop thread). Every metric registers itself on
+creation; ``render_prometheus`` renders all of them in the Prometheus text
+exposition format for the webhook server's /metrics route.
+"""
+
+from bisect import bisect_left
+
+LabelValues = tuple[str, ...]
+
+# All metrics, in creation order
+_registry: list["Counter | Histogram"] = []
+
+
+class Counter:
+    """Monotonically increasing counter with optional labels."""
+
+    type = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self._values: dict[LabelValues, float] = {}
+        _registry.append(self)
+
+    def _key(self, labels: dict[str, str]) -> LabelValues:
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        """Increase the counter for the given label values."""
+        key = self._key(labels)
+        self._values[key] = self._values.get(key, 0.0) + amount
+
+    def get(self, **labels: str) -> float:
+        """Get the current value for the given label values."""
+        return self._values.get(self._key(labels), 0.0)
+
+    def samples(self) -> dict[LabelValues, float]:
+        """Get a snapshot of all label values."""
+        return dict(self._values)
+
+
+class Gauge(Counter):
+    """Value that can go up and down, with optional labels."""
+
+    type = "gauge"
+
+    def set(self, value: float, **labels: str) -> None:
+        """Set the gauge for the given label values."""
+        self._values[self._key(labels)] = float(value)
+
+    def dec(self, amount: float = 1.0, **labels: str) -> None:
+        """Decrease the gauge for the given label values."""
+        self.inc(-amount, **labels)
+
+
+# Default histogram buckets in seconds
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+class Histogram:
+    """Cumulative histogram of observed values, with optional labels."""
+
+    type = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = DEFAULT_BUCKETS,
+    ):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self.buckets = buckets
+        # label values -> [per-bucket counts..., sum, count]. Counts are kept
+        # per bucket, so an observation updates a single one; they are made
+        # cumulative when read.
+        self._values: dict[LabelValues, list[float]] = {}
+        _registry.append(self)
+
+    def _key(self, labels: dict[str, str]) -> LabelValues:
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def observe(self, value: float, **labels: str) -> None:
+        """Record an observation for the given label values."""
+        key = self._key(labels)
+        state = self._values.get(key)
+        if state is None:
+            state = self._values[key] = [0.0] * (len(self.buckets) + 2)
+        i = bisect_left(self.buckets, value)
+        if i < len(self.buckets):
+            state[i] += 1
+        state[-2] += value
+        state[-1] += 1
+
+    def count(self, **labels: str) -> float:
+        """Number of observations for the given label values."""
+        state = self._values.get(self._key(labels))
+        return state[-1] if state else 0.0
+
+    def mean(self, **labels: str) -> float:
+        """Mean observed value for the given label values."""
+        state = self._values.get(self._key(labels))
+        return state[-2] / state[-1] if state and state[-1] else 0.0
+
+    def samples(self) -> dict[LabelValues, list[float]]:
+        """Get a snapshot of all label values: [cumulative bucket counts..., sum, count]."""
+        snapshot = {}
+        for key, state in self._values.items():
+            cumulative, total = [], 0.0
+            for count in state[:-2]:
+                total += count
+                cumulative.append(total)
+            snapshot[key] = [*cumulative, state[-2], state[-1]]
+        return snapshot
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: tuple[str, ...], values: LabelValues, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values, strict=True)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value: float) -> str:
+    return str(int(value)) if value.is_integer() else repr(value)
+
+
+def render_prometheus() -> str:
+    """Render all metrics in the Prometheus text exposition format (version 0.0.4)."""
+    lines = []
+    for metric in _registry:
+        lines.append(f"# HELP {metric.name} {metric.documentation}")
+        lines.append(f"# TYPE {metric.name} {metric.type}")
+        if isinstance(metric, Histogram):
+            for key, state in metric.samples().items():
+                for bound, count in zip(metric.buckets, state[:-2], strict=True):
+                    labels = _labels(metric.labelnames, key, f'le="{bound}"')
+                    lines.append(f"{metric.name}_bucket{labels} {_number(count)}")
+                labels = _labels(metric.labelnames, key, 'le="+Inf"')
+                lines.append(f"{metric.name}_bucket{labels} {_number(state[-1])}")
+                labels = _labels(metric.labelnames, key)
+                lines.append(f"{metric.name}_sum{labels} {_number(state[-2])}")
+                lines.append(f"{metric.name}_count{labels} {_number(state[-1])}")
+        else:
+            for key, value in metric.samples().items():
+                lines.append(f"{metric.name}{_labels(metric.labelnames, key)} {_number(value)}")
+    return "\n".join(lines) + "\n"
+
+
+# Chat acknowledgment metrics
+chat_ack_messages = Counter(
+    "bot_chat_ack_messages_total",
+    "Customer chat messages acknowledged, by acknowledgment mode",
+    ("mode",),
+)
+chat_ack_api_calls = Counter(
+    "bot_chat_ack_api_calls_total",
+    "Telegram API calls spent on chat acknowledgments, by acknowledgment mode",
+    ("mode",),
+)
+
+
+def chat_ack_calls_per_message(mode: str) -> float:
+    """Average Telegram API calls spent per acknowledged chat message."""
+    messages = chat_ack_messages.get(mode=mode)
+    if not messages:
+        return 0.0
+    return chat_ack_api_calls.get(mode=mode) / messages
+
+
+# Outbound Telegram send queue metrics
+outbound_queue_depth = Gauge(
+    "bot_outbound_queue_depth",
+    "Outbound Telegram sends waiting in the queue, by priority lane",
+    ("lane",),
+)
+outbound_wait_seconds = Histogram(
+    "bot_outbound_wait_seconds",
+    "Time outbound Telegram sends spend queued before being sent, by priority lane",
+    ("lane",),
+)
+outbound_sent = Counter(
+    "bot_outbound_sent_total",
+    "Outbound Telegram sends completed, by priority lane and result",
+    ("lane", "result"),
+)
+outbound_retries = Counter(
+    "bot_outbound_retries_total",
+    "Outbound Telegram sends requeued after flood control, by priority lane and pause scope",
+    ("lane", "scope"),
+)
+
+
+# Telegram file ID cache metrics
+file_id_cache_lookups = Counter(
+    "bot_file_id_cache_lookups_total",
+    "File ID cache lookups for uploaded images, by result (hit or miss)",
+    ("result",),
+)
+file_id_cache_entries = Gauge(
+    "bot_file_id_cache_entries",
+    "File IDs currently held in the cache",
+)
+
+
+def file_id_cache_hit_rate() -> float:
+    """Share of file ID cache lookups that avoided an upload."""
+    hits = file_id_cache_lookups.get(result="hit")
+    total = hits + file_id_cache_lookups.get(result="miss")
+    return hits / total if total else 0.0
+
+
+# Inbound photo resolution metrics
+file_path_cache_lookups = Counter(
+    "bot_file_path_cache_lookups_total",
+    "Inbound photo file path lookups, by result (hit, miss or pending)",
+    ("result",),
+)
+photo_resolve_seconds = Histogram(
+    "bot_photo_resolve_seconds",
+    "Time to resolve download URLs of an inbound message's photos, by kind (single or album)",
+    ("kind",),
+)
+
+
+# Media relay metrics
+media_relay_bytes = Counter(
+    "bot_media_relay_bytes_total",
+    "Bytes streamed from Telegram into the CRM, by media kind",
+    ("kind",),
+)
+media_relay_seconds = Histogram(
+    "bot_media_relay_seconds",
+    "Duration of media transfers into the CRM, by media kind and result",
+    ("kind", "result"),
+)
+media_relay_in_flight = Gauge(
+    "bot_media_relay_in_flight",
+    "Media transfers into the CRM in progress, by media kind",
+    ("kind",),
+)
+
+
+# Image pipeline metrics
+image_pipeline_seconds = Histogram(
+    "bot_image_pipeline_seconds",
+    "Duration of image pipeline jobs, by stage (recompress or preview) and result",
+    ("stage", "result"),
+)
+image_pipeline_bytes = Counter(
+    "bot_image_pipeline_bytes_total",
+    "Bytes in and out of the image pipeline, by stage and direction",
+    ("stage", "direction"),
+)
+
+
+# Local media cache metrics
+media_cache_lookups = Counter(
+    "bot_media_cache_lookups_total",
+    "Media cache lookups of the /media endpoint, by result (hit, miss or pending)",
+    ("result",),
+)
+media_cache_bytes = Gauge(
+    "bot_media_cache_bytes",
+    "Bytes of customer media held in the local disk cache",
+)
+media_cache_download_bytes = Counter(
+    "bot_media_cache_download_bytes_total",
+    "Bytes downloaded from Telegram to fill the local media cache",
+)
+
+
+def media_cache_hit_rate() -> float:
+    """Share of media cache lookups served without a Telegram download."""
+    hits = media_cache_lookups.get(result="hit")
+    total = (
+        hits + media_cache_lookups.get(result="miss") + media_cache_lookups.get(result="pending")
+    )
+    return hits / total if total else 0.0
+
+
+# Webhook server metrics
+webhook_requests = Counter(
+    "bot_webhook_requests_total",
+    "Webhook server requests, by route, method and status code",
+    ("route", "method", "status"),
+)
+webhook_request_seconds = Histogram(
+    "bot_webhook_request_seconds",
+    "Webhook server request duration, by route",
+    ("route",),
+)
+webhook_in_flight = Gauge(
+    "bot_webhook_in_flight_requests",
+    "CRM requests being handled (admitted by admission control)",
+)
+webhook_queued = Gauge(
+    "bot_webhook_queued_requests",
+    "CRM requests waiting for admission",
+)
+webhook_admission_wait_seconds = Histogram(
+    "bot_webhook_admission_wait_seconds",
+    "Time CRM requests waited for admission",
+)
+webhook_admission_rejected = Counter(
+    "bot_webhook_admission_rejected_total",
+    "CRM requests rejected with 429, by reason (queue_full or timeout)",
+    ("reason",),
+)
+
+coalesced_payloads = Counter(
+    "bot_webhook_coalesced_payloads_total",
+    "Webhook payloads merged into a held payload of the same chat and order, by endpoint",
+    ("endpoint",),
+)
+idempotency_requests = Counter(
+    "bot_idempotency_requests_total",
+    "Webhook requests with an idempotency key, by result (new, replayed, coalesced or conflict)",
+    ("result",),
+)
+
+
+# Notification metrics
+notifications_rendered = Counter(
+    "bot_notifications_rendered_total",
+    "Notifications rendered, by audience and type",
+    ("audience", "type"),
+)
+notifications_sent = Counter(
+    "bot_notifications_sent_total",
+    "Notification send attempts, by audience, type and result (ok or the error class)",
+    ("audience", "type", "result"),
+)
+
+
+# Telegram Bot API metrics
+telegram_api_calls = Counter(
+    "bot_telegram_api_calls_total",
+    "Telegram Bot API calls, by method and result (ok or the error class)",
+    ("method", "result"),
+)
+telegram_api_seconds = Histogram(
+    "bot_telegram_api_seconds",
+    "Telegram Bot API call duration, by method",
+    ("method",),
+)
+
+
+# Dispatcher metrics
+handler_seconds = Histogram(
+    "bot_handler_seconds",
+    "Update handler duration, by event type and handler",
+    ("event", "handler"),
+)
+handler_errors = Counter(
+    "bot_handler_errors_total",
+    "Update handlers that raised, by event type, handler and error class",
+    ("event", "handler", "error"),
+)
@@ -0,0 +1,336 @@
+"""Rate-limit-aware outbound Telegram send queue.
+
+Telegram allows about 30 messages per second globally and about one message
+per second per chat. Every outbound send from the webhook server and the
+notifiers goes through ``OutboundQueue``, which enforces a global token bucket
+and per-chat token buckets, serves priority lanes in order (interactive
+replies before notifications before staff broadcasts) and never runs two
+sends for the same chat at once, so per-chat ordering is preserved.
+
+A ``TelegramRetryAfter`` pauses only the affected chat for ``retry_after``
+seconds and requeues the send at the head of that chat's lane, within a
+bounded retry budget. When several chats hit flood control at once, the
+whole queue is paused instead.
+
+Usage:
+
+    await outbound_queue.send(
+        chat_id, lambda: bot.send_message(chat_id=chat_id, text=text), Priority.INTERACTIVE
+    )
+"""
+
+import asyncio
+import itertools
+import logging
+import time
+from collections import deque
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass, field
+from enum import IntEnum
+from typing import Any
+
+from aiogram.exceptions import TelegramRetryAfter
+
+from .config import (
+    OUTBOUND_CHAT_BURST,
+    OUTBOUND_CHAT_RATE,
+    OUTBOUND_GLOBAL_RATE,
+    OUTBOUND_MAX_RETRIES,
+    OUTBOUND_MAX_RETRY_AFTER,
+)
+from .metrics import (
+    outbound_queue_depth,
+    outbound_retries,
+    outbound_sent,
+    outbound_wait_seconds,
+)
+
+logger = logging.getLogger(__name__)
+
+# Distinct chats hitting flood control within the window that trigger a global pause
+GLOBAL_FLOOD_CHATS = 3
+GLOBAL_FLOOD_WINDOW = 5.0
+
+
+class Priority(IntEnum):
+    """Outbound priority lanes (lower is served first)."""
+
+    INTERACTIVE = 0  # Support replies, verification messages
+    NOTIFICATION = 1  # Customer notifications
+    BROADCAST = 2  # Staff broadcasts
+
+
+class TokenBucket:
+    """Token bucket refilled continuously at ``rate`` tokens per second."""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        if now > self.updated:
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+
+    def available_at(self, now: float) -> float:
+        """Monotonic time at which one token will be available."""
+        self._refill(now)
+        if self.tokens >= 1:
+            return now
+        return now + (1 - self.tokens) / self.rate
+
+    def take(self, now: float) -> None:
+        """Consume one token (may go negative when forced)."""
+        self._refill(now)
+        self.tokens -= 1
+
+    def is_full(self, now: float) -> bool:
+        """Check if the bucket has refilled completely."""
+        self._refill(now)
+        return self.tokens >= self.capacity
+
+
+@dataclass(order=True)
+class _Job:
+    priority: int
+    seq: int
+    chat_id: int = field(compare=False)
+    factory: Callable[[], Awaitable[Any]] = field(compare=False)
+    future: asyncio.Future = field(compare=False)
+    enqueued: float = field(compare=False)
+    attempts: int = field(default=0, compare=False)
+
+
+class _ChatLane:
+    """Pending jobs and rate limit state of a single chat."""
+
+    def __init__(self, rate: float, burst: float):
+        self.jobs: deque[_Job] = deque()
+        self.bucket = TokenBucket(rate, burst)
+        self.busy = False
+        self.paused_until = 0.0
+
+
+class OutboundQueue:
+    """Central scheduler for outbound Telegram sends."""
+
+    def __init__(
+        self,
+        global_rate: float = OUTBOUND_GLOBAL_RATE,
+        chat_rate: float = OUTBOUND_CHAT_RATE,
+        chat_burst: float = OUTBOUND_CHAT_BURST,
+        max_retries: int = OUTBOUND_MAX_RETRIES,
+        max_retry_after: float = OUTBOUND_MAX_RETRY_AFTER,
+    ):
+        self.chat_rate = chat_rate
+        self.chat_burst = chat_burst
+        self.max_retries = max_retries
+        self.max_retry_after = max_retry_after
+        self._paused_until = 0.0
+        # Recent flood control hits: chat_id -> monotonic time
+        self._flood_hits: dict[int, float] = {}
+        self._global = TokenBucket(global_rate, global_rate)
+        self._lanes: dict[int, _ChatLane] = {}
+        self._seq = itertools.count()
+        self._wakeup = asyncio.Event()
+        self._worker: asyncio.Task | None = None
+        self._running: set[asyncio.Task] = set()
+
+    @property
+    def depth(self) -> int:
+        """Number of sends waiting in the queue."""
+        return sum(len(lane.jobs) for lane in self._lanes.values())
+
+    def start(self) -> None:
+        """Start the dispatcher task."""
+        if self._worker is None or self._worker.done():
+            self._worker = asyncio.create_task(self._run())
+
+    async def stop(self, timeout: float = 5.0) -> None:
+        """Drain the queue (up to ``timeout`` seconds), then stop the dispatcher."""
+        deadline = time.monotonic() + timeout
+        while (self.depth or self._running) and time.monotonic() < deadline:
+            await asyncio.sleep(0.05)
+
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+
+        # Fail whatever could not be delivered in time
+        for lane in self._lanes.values():
+            while lane.jobs:
+                job = lane.jobs.popleft()
+                outbound_queue_depth.dec(lane=_lane_label(job))
+                if not job.future.done():
+                    job.future.cancel()
+        self._lanes.clear()
+
+    async def send(
+        self,
+        chat_id: int,
+        factory: Callable[[], Awaitable[Any]],
+        priority: Priority = Priority.NOTIFICATION,
+    ) -> Any:
+        """Queue a send for ``chat_id`` and wait for its result.
+
+        Args:
+            chat_id: Target chat (used for per-chat rate limiting and ordering)
+            factory: Zero-argument callable creating the Telegram API call
+            priority: Priority lane of the send
+
+        Returns:
+            The result of the API call (exceptions are propagated, including
+            ``TelegramRetryAfter`` once the retry budget is exhausted)
+        """
+        self.start()
+        job = _Job(
+            priority=int(priority),
+            seq=next(self._seq),
+            chat_id=chat_id,
+            factory=factory,
+            future=asyncio.get_running_loop().create_future(),
+            enqueued=time.monotonic(),
+        )
+        lane = self._lanes.get(chat_id)
+        if lane is None:
+            lane = self._lanes[chat_id] = _ChatLane(self.chat_rate, self.chat_burst)
+        lane.jobs.append(job)
+        outbound_queue_depth.inc(lane=_lane_label(job))
+        self._wakeup.set()
+        return await job.future
+
+    def _pick(self, now: float) -> tuple[_ChatLane | None, float | None]:
+        """Pick the lane whose head job should go next.
+
+        Returns (lane, None) if a job is ready, or (None, wake_at) otherwise.
+        """
+        best: _ChatLane | None = None
+        wake_at: float | None = None
+        idle: list[int] = []
+
+        for chat_id, lane in self._lanes.items():
+            if lane.busy:
+                continue
+            if not lane.jobs:
+                if lane.bucket.is_full(now):
+                    idle.append(chat_id)
+                continue
+            ready_at = max(lane.bucket.available_at(now), lane.paused_until)
+            if ready_at > now:
+                wake_at = ready_at if wake_at is None else min(wake_at, ready_at)
+            elif best is None or lane.jobs[0] < best.jobs[0]:
+                best = lane
+
+        for chat_id in idle:
+            del self._lanes[chat_id]
+
+        return best, wake_at
+
+    async def _run(self) -> None:
+        while True:
+            now = time.monotonic()
+            lane, wake_at = self._pick(now)
+
+            if lane is None:
+                self._wakeup.clear()
+                timeout = None if wake_at is None else max(0.0, wake_at - now)
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=timeout)
+                except TimeoutError:
+                    pass
+                continue
+
+            global_at = max(self._global.available_at(now), self._paused_until)
+            if global_at > now:
+                # Re-pick afterwards: a higher-priority job may arrive meanwhile
+                await asyncio.sleep(global_at - now)
+                continue
+
+            job = lane.jobs.popleft()
+            self._global.take(now)
+            lane.bucket.take(now)
+            lane.busy = True
+            outbound_queue_depth.dec(lane=_lane_label(job))
+            outbound_wait_seconds.observe(now - job.enqueued, lane=_lane_label(job))
+
+            task = asyncio.create_task(self._execute(lane, job))
+            self._running.add(task)
+            task.add_done_callback(self._running.discard)
+
+    async def _execute(self, lane: _ChatLane, job: _Job) -> None:
+        try:
+            if job.future.cancelled():
+                return
+            try:
+                result = await job.factory()
+            except TelegramRetryAfter as e:
+                if not self._requeue(lane, job, e):
+                    outbound_sent.inc(lane=_lane_label(job), result="retry_exhausted")
+                    if not job.future.done():
+                        job.future.set_exception(e)
+            except Exception as e:
+                outbound_sent.inc(lane=_lane_label(job), result=type(e).__name__)
+                if not job.future.done():
+                    job.future.set_exception(e)
+            else:
+                outbound_sent.inc(
+                    lane=_lane_label(job), result="ok" if not job.attempts else "ok_after_retry"
+                )
+                if not job.future.done():
+                    job.future.set_result(result)
+        finally:
+            lane.busy = False
+            self._wakeup.set()
+
+    def _requeue(self, lane: _ChatLane, job: _Job, e: TelegramRetryAfter) -> bool:
+        """Pause the chat (or the whole queue) and put the job back at the head.
+
+        Returns False if the retry budget is exhausted.
+        """
+        if job.attempts >= self.max_retries or e.retry_after > self.max_retry_after:
+            logger.warning(
+                f"Giving up on send to {job.chat_id} after {job.attempts} retries "
+                f"(retry after {e.retry_after}s)"
+            )
+            return False
+
+        now = time.monotonic()
+        lane.paused_until = max(lane.paused_until, now + e.retry_after)
+
+        # Several chats hitting flood control at once means a global limit
+        self._flood_hits[job.chat_id] = now
+        self._flood_hits = {
+            chat_id: hit
+            for chat_id, hit in self._flood_hits.items()
+            if now - hit <= GLOBAL_FLOOD_WINDOW
+        }
+        scope = "chat"
+        if len(self._flood_hits) >= GLOBAL_FLOOD_CHATS:
+            self._paused_until = max(self._paused_until, now + e.retry_after)
+            scope = "global"
+
+        job.attempts += 1
+        job.enqueued = now
+        lane.jobs.appendleft(job)
+        outbound_queue_depth.inc(lane=_lane_label(job))
+        outbound_retries.inc(lane=_lane_label(job), scope=scope)
+        logger.info(
+            f"Flood control for {job.chat_id}, retrying in {e.retry_after}s "
+            f"(attempt {job.attempts}/{self.max_retries}, {scope} pause)"
+        )
+        return True
+
+
+def _lane_label(job: _Job) -> str:
+    """Metric label of a job's priority lane."""
+    return Priority(job.priority).name.lower()
+
+
+# Global outbound queue instance
+outbound_queue = OutboundQueue()
@@ -0,0 +1,129 @@
+"""Central scheduler for delayed message deletions.
+
+Instead of spawning one sleeping task per message, all pending deletions are
+kept in a single heap of ``(due, chat_id, message_id)`` entries and fired by
+one worker task, grouped per chat into ``deleteMessages`` batches.
+"""
+
+import asyncio
+import heapq
+import logging
+import time
+from collections import defaultdict
+
+from aiogram import Bot
+from aiogram.exceptions import TelegramBadRequest
+
+logger = logging.getLogger(__name__)
+
+# Telegram accepts up to 100 message IDs per deleteMessages call
+MAX_BATCH_SIZE = 100
+
+# Entries due within this window are fired together with the current batch
+BATCH_WINDOW = 0.05
+
+
+class DeletionScheduler:
+    """Heap-based scheduler that deletes messages after a delay."""
+
+    def __init__(self, batch_window: float = BATCH_WINDOW):
+        self.batch_window = batch_window
+        self._heap: list[tuple[float, int, int]] = []
+        self._bot: Bot | None = None
+        self._wakeup = asyncio.Event()
+        self._worker: asyncio.Task | None = None
+
+    @property
+    def pending(self) -> int:
+        """Number of deletions waiting to fire."""
+        return len(self._heap)
+
+    def start(self, bot: Bot) -> None:
+        """Bind the bot and start the worker task."""
+        self._bot = bot
+        if self._worker is None or self._worker.done():
+            self._worker = asyncio.create_task(self._run())
+
+    def schedule(self, chat_id: int, message_id: int, delay: float) -> None:
+        """Schedule a message for deletion after ``delay`` seconds."""
+        due = time.monotonic() + delay
+        heapq.heappush(self._heap, (due, chat_id, message_id))
+        # Only wake the worker if the new entry is the earliest one
+        if self._heap[0][0] == due:
+            self._wakeup.set()
+
+    async def stop(self) -> None:
+        """Stop the worker and flush every pending deletion immediately."""
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+
+        pending = self._heap
+        self._heap = []
+        if pending and self._bot is not None:
+            await self._fire(pending)
+
+    async def _run(self) -> None:
+        while True:
+            if not self._heap:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+
+            delay = self._heap[0][0] - time.monotonic()
+            if delay > 0:
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=delay)
+                except TimeoutError:
+                    pass
+                continue
+
+            horizon = time.monotonic() + self.batch_window
+            due = []
+            while self._heap and self._heap[0][0] <= horizon:
+                due.append(heapq.heappop(self._heap))
+
+            try:
+                await self._fire(due)
+            except Exception as e:
+                logger.error(f"Error firing scheduled deletions: {e}")
+
+    async def _fire(self, entries: list[tuple[float, int, int]]) -> None:
+        """Delete the given entries, batched per chat."""
+        by_chat: dict[int, list[int]] = defaultdict(list)
+        for _, chat_id, message_id in entries:
+            by_chat[chat_id].append(message_id)
+
+        await asyncio.gather(
+            *(
+                self._delete_batch(chat_id, message_ids[i : i + MAX_BATCH_SIZE])
+                for chat_id, message_ids in by_chat.items()
+                for i in range(0, len(message_ids), MAX_BATCH_SIZE)
+            )
+        )
+
+    async def _delete_batch(self, chat_id: int, message_ids: list[int]) -> None:
+        try:
+            if len(message_ids) == 1:
+                await self._bot.delete_message(chat_id=chat_id, message_id=message_ids[0])
+            else:
+                await self._bot.delete_messages(chat_id=chat_id, message_ids=message_ids)
+        except TelegramBadRequest:
+            # Messages might already be deleted or too old
+            pass
+        except Exception as e:
+            logger.error(f"Error deleting messages in chat {chat_id}: {e}")
+
+
+# Global scheduler instance
+deletion_scheduler = DeletionScheduler()
+
+
+def schedule_delete(chat_id: int, message_id: int, delay: float) -> None:
+    """Schedule a message for deletion after ``delay`` seconds."""
+    deletion_scheduler.schedule(chat_id, message_id, delay)
@@ -4,7 +4,8 @@ from aiogram import F, Router
 from aiogram.fsm.context import FSMContext
 from aiogram.types import CallbackQuery
 
-from core.message_manager import set_last_message_id
+from core.callback_ack import CallbackAck
+from core.message_manager import edit_or_send
 from core.states import ChatState, clear_active_chat, set_active_chat
 from locales import get_text
 from ui.keyboards import chat_keyboard
@@ -13,7 +14,7 @@ router = Router()
 
 
 @router.callback_query(F.data.startswith("chat:"))
-async def start_chat(callback: CallbackQuery, state: FSMContext):
+async def start_chat(callback: CallbackQuery, state: FSMContext, callback_ack: CallbackAck):
     """Start chat for an order."""
     from core.api_client import api_client
 
@@ -25,7 +26,7 @@ async def start_chat(callback: CallbackQuery, state: FSMContext):
         order = next((o for o in orders if o["id"] == order_id), None)
 
         if not order:
-            await callback.answer(get_text("error", user_id))
+            await callback_ack.answer(get_text("error", user_id))
             return
 
         await state.set_state(ChatState.chatting)
@@ -34,21 +35,18 @@ async def start_chat(callback: CallbackQuery, state: FSMContext):
         # Track that user is now in chat for this order
         set_active_chat(user_id, order_id)
 
-        await callback.message.edit_text(
+        await edit_or_send(
+            callback.message,
             get_text("chat_start", user_id, title=order["title"]),
             reply_markup=chat_keyboard(order_id, user_id),
             parse_mode="HTML",
         )
-        # Track this message for potential cleanup
-        set_last_message_id(user_id, callback.message.message_id)
     except Exception:
-        await callback.answer(get_text("error", user_id))
-
-    await callback.answer()
+        await callback_ack.answer(get_text("error", user_id))
 
 
 @router.callback_query(F.data.startswith("exit_chat:"))
-async def exit_chat(callback: CallbackQuery, state: FSMContext):
+async def exit_chat(callback: CallbackQuery, state: FSMContext, callback_ack: CallbackAck):
     """Exit chat and go back to order details."""
     user_id = callback.from_user.id
     order_id = callback.data.split(":")[1]
@@ -66,13 +64,11 @@ async def exit_chat(callback: CallbackQuery, state: FSMContext):
 
         if order:
             detail_text = build_order_detail_text(order, user_id)
-            await callback.message.edit_text(
+            await edit_or_send(
+                callback.message,
                 detail_text,
                 reply_markup=order_detail_keyboard(order_id, user_id, order["status"]),
                 parse_mode="HTML",
             )
-            set_last_message_id(user_id, callback.message.message_id)
     except Exception:
-        await callback.answer(get_text("error", user_id))
-
-    await callback.answer()
+        await callback_ack.answer(get_text("error", user_id))
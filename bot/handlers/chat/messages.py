@@ -1,18 +1,21 @@
 """Text message handlers for chat."""
 
-import asyncio
+import logging
+from functools import partial
 
 from aiogram import F, Router
 from aiogram.fsm.context import FSMContext
 from aiogram.types import Message
 
 from core.api_client import api_client
+from core.outbound import Priority, outbound_queue
 from core.states import ChatState, clear_active_chat
 from locales import get_text
 
-from .utils import delete_message_after_delay
+from .utils import acknowledge_message
 
 router = Router()
+logger = logging.getLogger(__name__)
 
 
 @router.message(ChatState.chatting, F.text)
@@ -33,15 +36,8 @@ async def process_chat_message(message: Message, state: FSMContext):
             order_id=order_id, customer_telegram_id=str(user_id), message=message.text
         )
 
-        # Send confirmation and auto-delete after 330ms
-        confirmation_msg = await message.answer(get_text("chat_message_sent", user_id))
-
-        # Schedule deletion
-        _background_tasks: set = getattr(process_chat_message, "_tasks", set())
-        task = asyncio.create_task(delete_message_after_delay(confirmation_msg, 0.33))
-        _background_tasks.add(task)
-        task.add_done_callback(_background_tasks.discard)
-        process_chat_message._tasks = _background_tasks
+        # Acknowledge the customer's message
+        await acknowledge_message(message, user_id)
     except Exception:
         await message.answer(get_text("error", user_id))
 
@@ -49,8 +45,12 @@ async def process_chat_message(message: Message, state: FSMContext):
 async def send_message_to_customer(bot, telegram_id: str, message: str):
     """Send a message to a customer from CRM."""
     try:
-        await bot.send_message(chat_id=int(telegram_id), text=message, parse_mode="HTML")
+        await outbound_queue.send(
+            int(telegram_id),
+            partial(bot.send_message, chat_id=int(telegram_id), text=message, parse_mode="HTML"),
+            Priority.INTERACTIVE,
+        )
         return True
     except Exception as e:
-        print(f"Failed to send message to {telegram_id}: {e}")
+        logger.error(f"Failed to send message to {telegram_id}: {e}")
         return False
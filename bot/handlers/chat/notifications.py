@@ -1,57 +1,41 @@
 """Customer notification functions for order events."""
 
-from locales import get_text
+import logging
 
+from ui.notifications import customer_notifications
 
-async def notify_order_approved(bot, telegram_id: str, order_title: str, user_id: int):
-    """Notify customer that order was approved."""
+logger = logging.getLogger(__name__)
+
+
+async def _notify(bot, telegram_id: str, notification_type: str, user_id: int, **values) -> bool:
+    """Send a customer notification. Returns False if it could not be sent."""
     try:
-        await bot.send_message(
-            chat_id=int(telegram_id),
-            text=get_text("notify_order_approved", user_id, title=order_title),
-            parse_mode="HTML",
-        )
+        await customer_notifications.send(bot, int(telegram_id), notification_type, values, user_id)
+        return True
     except Exception as e:
-        print(f"Failed to notify {telegram_id}: {e}")
+        logger.error(f"Failed to notify {telegram_id}: {e}")
+        return False
 
 
-async def notify_order_rejected(bot, telegram_id: str, order_title: str, user_id: int):
+async def notify_order_approved(bot, telegram_id: str, order_title: str, user_id: int) -> bool:
+    """Notify customer that order was approved."""
+    return await _notify(bot, telegram_id, "order_approved", user_id, title=order_title)
+
+
+async def notify_order_rejected(bot, telegram_id: str, order_title: str, user_id: int) -> bool:
     """Notify customer that order was rejected."""
-    try:
-        await bot.send_message(
-            chat_id=int(telegram_id),
-            text=get_text("notify_order_rejected", user_id, title=order_title),
-            parse_mode="HTML",
-        )
-    except Exception as e:
-        print(f"Failed to notify {telegram_id}: {e}")
+    return await _notify(bot, telegram_id, "order_rejected", user_id, title=order_title)
 
 
-async def notify_order_assigned(bot, telegram_id: str, order_title: str, user_id: int):
+async def notify_order_assigned(bot, telegram_id: str, order_title: str, user_id: int) -> bool:
     """Notify customer that a developer was assigned."""
-    try:
-        await bot.send_message(
-            chat_id=int(telegram_id),
-            text=get_text("notify_order_assigned", user_id, title=order_title),
-            parse_mode="HTML",
-        )
-    except Exception as e:
-        print(f"Failed to notify {telegram_id}: {e}")
+    return await _notify(bot, telegram_id, "order_assigned", user_id, title=order_title)
 
 
 async def notify_order_status_change(
     bot, telegram_id: str, order_title: str, status: str, user_id: int
-):
+) -> bool:
     """Notify customer about order status change."""
-    try:
-        from locales import get_status_text
-
-        status_text = get_status_text(status, user_id)
-
-        await bot.send_message(
-            chat_id=int(telegram_id),
-            text=get_text("notify_order_status", user_id, title=order_title, status=status_text),
-            parse_mode="HTML",
-        )
-    except Exception as e:
-        print(f"Failed to notify {telegram_id}: {e}")
+    return await _notify(
+        bot, telegram_id, "order_status_changed", user_id, title=order_title, status=status
+    )
@@ -1,22 +1,39 @@
 """Staff notification functions for programmer alerts."""
 
+import logging
+
 from core.api_client import api_client
+from core.fanout import FanOutResult, fan_out
+from locales import load_user_language, load_user_languages
+from ui.notifications import staff_notifications
+from utils.validation import is_valid_telegram_id
+
+logger = logging.getLogger(__name__)
 
 
-async def notify_programmers_new_order(bot, order_title: str):
-    """Notify all programmers about a new approved order."""
+async def notify_programmers_new_order(bot, order_title: str) -> list[FanOutResult]:
+    """Notify all programmers about a new approved order.
+
+    Returns per-programmer delivery results.
+    """
     try:
         programmers = await api_client.get_programmers_for_notification()
-
-        for programmer in programmers:
-            if programmer.get("telegramId"):
-                try:
-                    await bot.send_message(
-                        chat_id=int(programmer["telegramId"]),
-                        text=f"📋 New order available: <b>{order_title}</b>\n\nCheck the CRM for details.",
-                        parse_mode="HTML",
-                    )
-                except Exception as e:
-                    print(f"Failed to notify programmer {programmer['telegramId']}: {e}")
     except Exception as e:
-        print(f"Failed to get programmers for notification: {e}")
+        logger.error(f"Failed to get programmers for notification: {e}")
+        return []
+
+    async def prepare(chat_id: int):
+        # Cached by the bulk load below, unless the user was missing from it
+        await load_user_language(chat_id)
+        return staff_notifications.prepare(bot, chat_id, "new_order", {"title": order_title})
+
+    chat_ids = [
+        int(p["telegramId"]) for p in programmers if is_valid_telegram_id(p.get("telegramId"))
+    ]
+    await load_user_languages(chat_ids)
+    results = await fan_out(chat_ids, prepare, staff_notifications.priority)
+
+    failed = [r for r in results if not r.ok]
+    if failed:
+        logger.warning(f"Failed to notify {len(failed)} of {len(results)} programmers")
+    return results
@@ -1,14 +1,48 @@
 """Utility functions for chat handlers."""
 
-import asyncio
+import logging
 
-from aiogram.types import Message
+from aiogram.types import Message, ReactionTypeEmoji
 
+from core.config import CHAT_ACK_MODE, CHAT_ACK_REACTION
+from core.metrics import chat_ack_api_calls, chat_ack_messages
+from core.scheduler import schedule_delete
+from locales import get_text
 
-async def delete_message_after_delay(message: Message, delay: float):
-    """Delete a message after a specified delay in seconds."""
-    await asyncio.sleep(delay)
-    try:
-        await message.delete()
-    except Exception:
-        pass  # Ignore errors if message already deleted or can't be deleted
+logger = logging.getLogger(__name__)
+
+ACK_MODE_REACTION = "reaction"
+ACK_MODE_MESSAGE = "message"
+
+# Delay before the "message sent" confirmation is removed
+CONFIRMATION_DELETE_DELAY = 0.33
+
+
+async def send_confirmation(message: Message, user_id: int) -> None:
+    """Send a short-lived "message sent" confirmation and schedule its deletion."""
+    confirmation_msg = await message.answer(get_text("chat_message_sent", user_id))
+    schedule_delete(
+        confirmation_msg.chat.id, confirmation_msg.message_id, CONFIRMATION_DELETE_DELAY
+    )
+
+
+async def acknowledge_message(message: Message, user_id: int) -> None:
+    """Acknowledge a customer chat message using the configured mode.
+
+    In reaction mode the customer's own message gets a reaction; if that fails
+    (e.g. reactions are unavailable) the confirmation message is used instead.
+    """
+    mode = CHAT_ACK_MODE
+    chat_ack_messages.inc(mode=mode)
+
+    if mode == ACK_MODE_REACTION:
+        chat_ack_api_calls.inc(mode=mode)
+        try:
+            await message.react([ReactionTypeEmoji(emoji=CHAT_ACK_REACTION)])
+            return
+        except Exception as e:
+            logger.debug(f"Could not set reaction, falling back to confirmation: {e}")
+
+    # Send + scheduled delete
+    chat_ack_api_calls.inc(2, mode=mode)
+    await send_confirmation(message, user_id)
@@ -1,12 +1,18 @@
 """Language selection handlers."""
 
+import logging
+
 from aiogram import F, Router
 from aiogram.types import CallbackQuery, Message
 
-from core.message_manager import delete_last_message, set_last_message_id
+from core.callback_ack import CallbackAck
+from core.concurrency import gather_isolated
+from core.message_manager import send_and_track, track_message
 from locales import get_text, set_user_language, set_user_language_sync
 from ui.keyboards import language_keyboard, main_menu_keyboard
 
+logger = logging.getLogger(__name__)
+
 router = Router()
 
 
@@ -15,17 +21,13 @@ async def language_menu(message: Message):
     """Show language selection menu."""
     user_id = message.from_user.id
 
-    # Delete previous bot message for clean UI
-    await delete_last_message(message.bot, user_id)
-
-    sent = await message.answer(
-        get_text("language_select", user_id), reply_markup=language_keyboard(user_id)
+    await send_and_track(
+        message, get_text("language_select", user_id), reply_markup=language_keyboard(user_id)
     )
-    set_last_message_id(user_id, sent.message_id)
 
 
 @router.callback_query(F.data.startswith("lang:"))
-async def set_language_handler(callback: CallbackQuery):
+async def set_language_handler(callback: CallbackQuery, callback_ack: CallbackAck):
     """Set user language."""
     user_id = callback.from_user.id
     language = callback.data.split(":")[1]
@@ -33,15 +35,21 @@ async def set_language_handler(callback: CallbackQuery):
     # Set language in cache immediately for instant UI update
     set_user_language_sync(user_id, language)
 
-    # Save to database asynchronously
-    await set_user_language(user_id, language)
+    menu_text = get_text("main_menu", user_id)
+    menu_keyboard = main_menu_keyboard(user_id)
 
-    # Edit the current message to show confirmation, then show main menu
-    await callback.message.edit_text(get_text("language_changed", user_id))
+    async def show_confirmation() -> Message:
+        # Edit the current message to show confirmation, then show main menu
+        await callback.message.edit_text(get_text("language_changed", user_id))
+        return await callback.message.answer(menu_text, reply_markup=menu_keyboard)
 
-    sent = await callback.message.answer(
-        get_text("main_menu", user_id), reply_markup=main_menu_keyboard(user_id)
+    # Save to database while updating the UI
+    saved, sent = await gather_isolated(
+        set_user_language(user_id, language), show_confirmation(), raise_on=(1,)
     )
-    set_last_message_id(user_id, sent.message_id)
+    track_message(user_id, sent.message_id, menu_text, menu_keyboard)
 
-    await callback.answer()
+    # The language only lives in the cache until the CRM has stored it
+    if saved is not True:
+        logger.warning(f"Language {language} of user {user_id} was not saved: {saved!r}")
+        await callback_ack.answer(get_text("language_save_failed", user_id))
@@ -5,7 +5,13 @@ from aiogram.fsm.context import FSMContext
 from aiogram.types import CallbackQuery, Message
 
 from core.api_client import api_client
-from core.message_manager import delete_last_message, set_last_message_id
+from core.concurrency import gather_isolated
+from core.message_manager import (
+    delete_last_message,
+    edit_or_send,
+    send_and_track,
+    set_last_message_id,
+)
 from core.states import OrderCreation, clear_active_chat
 from locales import get_text
 from ui.keyboards import (
@@ -32,18 +38,21 @@ async def start_order_creation(message: Message, state: FSMContext):
     user_id = message.from_user.id
 
     clear_active_chat(user_id)
-    await delete_last_message(message.bot, user_id)
-
-    if await check_order_limit(user_id):
-        sent = await message.answer(get_text("order_limit", user_id))
-        set_last_message_id(user_id, sent.message_id)
-        return
 
     await state.set_state(OrderCreation.title)
-    sent = await message.answer(
-        get_text("order_create_title", user_id), reply_markup=cancel_keyboard(user_id)
+
+    # Check the order limit while showing the first prompt, and replace the
+    # prompt with the limit notice if the limit is reached
+    limit_reached, sent = await gather_isolated(
+        check_order_limit(user_id),
+        send_and_track(
+            message, get_text("order_create_title", user_id), reply_markup=cancel_keyboard(user_id)
+        ),
+        raise_on=(0, 1),
     )
-    set_last_message_id(user_id, sent.message_id)
+    if limit_reached:
+        await state.set_state(None)
+        await edit_or_send(sent, get_text("order_limit", user_id))
 
 
 @router.message(OrderCreation.title)
@@ -51,12 +60,15 @@ async def process_title(message: Message, state: FSMContext):
     """Process order title."""
     user_id = message.from_user.id
 
-    await delete_last_message(message.bot, user_id)
     await state.update_data(title=message.text)
     await state.set_state(OrderCreation.description)
 
-    sent = await message.answer(
-        get_text("order_create_description", user_id), reply_markup=cancel_keyboard(user_id)
+    _, sent = await gather_isolated(
+        delete_last_message(message.bot, user_id),
+        message.answer(
+            get_text("order_create_description", user_id), reply_markup=cancel_keyboard(user_id)
+        ),
+        raise_on=(1,),
     )
     set_last_message_id(user_id, sent.message_id)
 
@@ -66,12 +78,15 @@ async def process_description(message: Message, state: FSMContext):
     """Process order description."""
     user_id = message.from_user.id
 
-    await delete_last_message(message.bot, user_id)
     await state.update_data(description=message.text)
     await state.set_state(OrderCreation.cost)
 
-    sent = await message.answer(
-        get_text("order_create_cost", user_id), reply_markup=cancel_keyboard(user_id)
+    _, sent = await gather_isolated(
+        delete_last_message(message.bot, user_id),
+        message.answer(
+            get_text("order_create_cost", user_id), reply_markup=cancel_keyboard(user_id)
+        ),
+        raise_on=(1,),
     )
     set_last_message_id(user_id, sent.message_id)
 
@@ -123,7 +138,6 @@ async def process_marker_selection(callback: CallbackQuery, state: FSMContext):
         reply_markup=markers_keyboard(markers, selected, user_id, page=page)
     )
     set_last_message_id(user_id, callback.message.message_id)
-    await callback.answer()
 
 
 @router.callback_query(F.data.startswith("markers_page:"), OrderCreation.markers)
@@ -141,13 +155,11 @@ async def process_markers_pagination(callback: CallbackQuery, state: FSMContext)
     await callback.message.edit_reply_markup(
         reply_markup=markers_keyboard(markers, selected, user_id, page=page)
     )
-    await callback.answer()
 
 
 @router.callback_query(F.data == "markers_page_info", OrderCreation.markers)
 async def process_markers_page_info(callback: CallbackQuery):
-    """Handle click on page info button (do nothing)."""
-    await callback.answer()
+    """Handle click on page info button (answered by the callback middleware)."""
 
 
 @router.callback_query(F.data == "markers_done", OrderCreation.markers)
@@ -168,20 +180,19 @@ async def process_markers_done(callback: CallbackQuery, state: FSMContext):
         data = await state.get_data()
         confirmation_text = build_confirmation_text(data, user_id)
 
-        await callback.message.edit_text(
+        await edit_or_send(
+            callback.message,
             confirmation_text,
             reply_markup=confirm_keyboard(user_id),
             parse_mode="HTML",
         )
     else:
-        await callback.message.edit_text(
+        await edit_or_send(
+            callback.message,
             get_text("order_create_payment", user_id),
             reply_markup=payment_keyboard(payment_methods, user_id),
         )
 
-    set_last_message_id(user_id, callback.message.message_id)
-    await callback.answer()
-
 
 @router.callback_query(F.data.startswith("payment:"), OrderCreation.payment)
 async def process_payment(callback: CallbackQuery, state: FSMContext):
@@ -195,13 +206,12 @@ async def process_payment(callback: CallbackQuery, state: FSMContext):
     data = await state.get_data()
     confirmation_text = build_confirmation_text(data, user_id)
 
-    await callback.message.edit_text(
+    await edit_or_send(
+        callback.message,
         confirmation_text,
         reply_markup=confirm_keyboard(user_id),
         parse_mode="HTML",
     )
-    set_last_message_id(user_id, callback.message.message_id)
-    await callback.answer()
 
 
 @router.callback_query(F.data == "confirm", OrderCreation.confirm)
@@ -222,14 +232,11 @@ async def process_confirm(callback: CallbackQuery, state: FSMContext):
             payment_method=data.get("payment_method"),
         )
 
-        await callback.message.edit_text(get_text("order_created", user_id))
-        set_last_message_id(user_id, callback.message.message_id)
+        await edit_or_send(callback.message, get_text("order_created", user_id))
     except Exception as e:
-        await callback.message.edit_text(get_text("error", user_id) + f"\n\n{e!s}")
-        set_last_message_id(user_id, callback.message.message_id)
+        await edit_or_send(callback.message, get_text("error", user_id) + f"\n\n{e!s}")
 
     await state.clear()
-    await callback.answer()
 
 
 @router.callback_query(F.data == "cancel")
@@ -239,6 +246,4 @@ async def process_cancel(callback: CallbackQuery, state: FSMContext):
 
     await state.clear()
     clear_active_chat(user_id)
-    await callback.message.edit_text(get_text("order_cancelled", user_id))
-    set_last_message_id(user_id, callback.message.message_id)
-    await callback.answer()
+    await edit_or_send(callback.message, get_text("order_cancelled", user_id))
@@ -5,7 +5,9 @@ from aiogram.fsm.context import FSMContext
 from aiogram.types import CallbackQuery, Message
 
 from core.api_client import api_client
-from core.message_manager import delete_last_message, set_last_message_id
+from core.callback_ack import CallbackAck
+from core.concurrency import gather_isolated
+from core.message_manager import delete_last_message, edit_or_send, send_and_track
 from core.states import clear_active_chat
 from locales import get_text
 from ui.keyboards import (
@@ -26,30 +28,41 @@ async def view_orders(message: Message, state: FSMContext):
     user_id = message.from_user.id
 
     clear_active_chat(user_id)
-    await delete_last_message(message.bot, user_id)
 
     try:
-        orders = await api_client.get_customer_orders(str(user_id))
+        # Clean up the previous message while fetching orders; the list is sent
+        # anew so it shows up below the customer's "My Orders" press
+        _, orders = await gather_isolated(
+            delete_last_message(message.bot, user_id),
+            api_client.get_customer_orders(str(user_id)),
+            raise_on=(1,),
+        )
 
         if not orders:
-            sent = await message.answer(
-                get_text("orders_empty", user_id), reply_markup=main_menu_keyboard(user_id)
+            await send_and_track(
+                message,
+                get_text("orders_empty", user_id),
+                reply_markup=main_menu_keyboard(user_id),
+                delete_previous=False,
             )
-            set_last_message_id(user_id, sent.message_id)
             return
 
         await state.update_data(cached_orders=orders, orders_page=0)
 
-        sent = await message.answer(
-            get_text("orders_title", user_id), reply_markup=orders_keyboard(orders, user_id, page=0)
+        await send_and_track(
+            message,
+            get_text("orders_title", user_id),
+            reply_markup=orders_keyboard(orders, user_id, page=0),
+            delete_previous=False,
         )
-        set_last_message_id(user_id, sent.message_id)
     except Exception:
         await message.answer(get_text("error", user_id))
 
 
 @router.callback_query(F.data.startswith("orders_page:"))
-async def handle_orders_pagination(callback: CallbackQuery, state: FSMContext):
+async def handle_orders_pagination(
+    callback: CallbackQuery, state: FSMContext, callback_ack: CallbackAck
+):
     """Handle orders pagination."""
     user_id = callback.from_user.id
     page = int(callback.data.split(":")[1])
@@ -68,19 +81,16 @@ async def handle_orders_pagination(callback: CallbackQuery, state: FSMContext):
             reply_markup=orders_keyboard(orders, user_id, page=page)
         )
     except Exception:
-        await callback.answer(get_text("error", user_id))
-
-    await callback.answer()
+        await callback_ack.answer(get_text("error", user_id))
 
 
 @router.callback_query(F.data == "orders_page_info")
 async def handle_orders_page_info(callback: CallbackQuery):
-    """Handle click on page info button (do nothing)."""
-    await callback.answer()
+    """Handle click on page info button (answered by the callback middleware)."""
 
 
 @router.callback_query(F.data.startswith("order:"))
-async def view_order_detail(callback: CallbackQuery, state: FSMContext):
+async def view_order_detail(callback: CallbackQuery, state: FSMContext, callback_ack: CallbackAck):
     """View order details."""
     user_id = callback.from_user.id
     order_id = callback.data.split(":")[1]
@@ -92,25 +102,23 @@ async def view_order_detail(callback: CallbackQuery, state: FSMContext):
         order = await get_order_by_id(user_id, order_id)
 
         if not order:
-            await callback.answer(get_text("error", user_id))
+            await callback_ack.answer(get_text("error", user_id))
             return
 
         detail_text = build_order_detail_text(order, user_id)
 
-        await callback.message.edit_text(
+        await edit_or_send(
+            callback.message,
             detail_text,
             reply_markup=order_detail_keyboard(order_id, user_id, order["status"]),
             parse_mode="HTML",
         )
-        set_last_message_id(user_id, callback.message.message_id)
     except Exception:
-        await callback.answer(get_text("error", user_id))
-
-    await callback.answer()
+        await callback_ack.answer(get_text("error", user_id))
 
 
 @router.callback_query(F.data.startswith("delete_order:"))
-async def delete_order_prompt(callback: CallbackQuery):
+async def delete_order_prompt(callback: CallbackQuery, callback_ack: CallbackAck):
     """Show delete confirmation prompt."""
     user_id = callback.from_user.id
     order_id = callback.data.split(":")[1]
@@ -119,19 +127,17 @@ async def delete_order_prompt(callback: CallbackQuery):
         order = await get_order_by_id(user_id, order_id)
 
         if not order:
-            await callback.answer(get_text("error", user_id))
+            await callback_ack.answer(get_text("error", user_id))
             return
 
-        await callback.message.edit_text(
+        await edit_or_send(
+            callback.message,
             get_text("order_delete_confirm", user_id, title=order["title"]),
             reply_markup=delete_confirm_keyboard(order_id, user_id),
             parse_mode="HTML",
         )
-        set_last_message_id(user_id, callback.message.message_id)
     except Exception:
-        await callback.answer(get_text("error", user_id))
-
-    await callback.answer()
+        await callback_ack.answer(get_text("error", user_id))
 
 
 @router.callback_query(F.data.startswith("confirm_delete:"))
@@ -142,21 +148,17 @@ async def confirm_delete_order(callback: CallbackQuery, state: FSMContext):
 
     try:
         await api_client.delete_order(order_id, str(user_id))
-        await callback.message.edit_text(get_text("order_deleted", user_id))
-        set_last_message_id(user_id, callback.message.message_id)
+        await edit_or_send(callback.message, get_text("order_deleted", user_id))
     except Exception as e:
         error_msg = str(e)
         if "Cannot delete" in error_msg or "current status" in error_msg:
-            await callback.message.edit_text(get_text("order_delete_error", user_id))
+            await edit_or_send(callback.message, get_text("order_delete_error", user_id))
         else:
-            await callback.message.edit_text(get_text("error", user_id))
-        set_last_message_id(user_id, callback.message.message_id)
-
-    await callback.answer()
+            await edit_or_send(callback.message, get_text("error", user_id))
 
 
 @router.callback_query(F.data == "back_to_orders")
-async def back_to_orders(callback: CallbackQuery, state: FSMContext):
+async def back_to_orders(callback: CallbackQuery, state: FSMContext, callback_ack: CallbackAck):
     """Go back to orders list."""
     user_id = callback.from_user.id
 
@@ -168,12 +170,10 @@ async def back_to_orders(callback: CallbackQuery, state: FSMContext):
         orders = await api_client.get_customer_orders(str(user_id))
         await state.update_data(cached_orders=orders)
 
-        await callback.message.edit_text(
+        await edit_or_send(
+            callback.message,
             get_text("orders_title", user_id),
             reply_markup=orders_keyboard(orders, user_id, page=page),
         )
-        set_last_message_id(user_id, callback.message.message_id)
     except Exception:
-        await callback.answer(get_text("error", user_id))
-
-    await callback.answer()
+        await callback_ack.answer(get_text("error", user_id))
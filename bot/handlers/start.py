@@ -5,7 +5,8 @@ from aiogram.filters import Command, CommandStart
 from aiogram.fsm.context import FSMContext
 from aiogram.types import Message
 
-from core.message_manager import delete_last_message, set_last_message_id
+from core.concurrency import gather_isolated
+from core.message_manager import send_and_track
 from core.states import clear_active_chat
 from locales import get_text, is_new_user, load_user_language
 from ui.keyboards import language_keyboard, main_menu_keyboard
@@ -18,27 +19,25 @@ async def cmd_start(message: Message, state: FSMContext):
     """Handle /start command."""
     user_id = message.from_user.id
 
-    # Clear any previous state
-    await state.clear()
     clear_active_chat(user_id)
 
-    # Delete previous bot message for clean UI
-    await delete_last_message(message.bot, user_id)
+    # Clear any previous state while checking whether this is a new user
+    # who hasn't selected a language yet
+    _, new_user = await gather_isolated(state.clear(), is_new_user(user_id), raise_on=(1,))
 
-    # Check if this is a new user who hasn't selected a language yet
-    if await is_new_user(user_id):
+    if new_user:
         # Show language selection first for new users
-        sent = await message.answer(
-            get_text("welcome_select_language", user_id), reply_markup=language_keyboard(user_id)
+        await send_and_track(
+            message,
+            get_text("welcome_select_language", user_id),
+            reply_markup=language_keyboard(user_id),
         )
-        set_last_message_id(user_id, sent.message_id)
     else:
         # Load user's language preference from database
         await load_user_language(user_id)
-        sent = await message.answer(
-            get_text("welcome", user_id), reply_markup=main_menu_keyboard(user_id)
+        await send_and_track(
+            message, get_text("welcome", user_id), reply_markup=main_menu_keyboard(user_id)
         )
-        set_last_message_id(user_id, sent.message_id)
 
 
 @router.message(Command("menu"))
@@ -46,17 +45,16 @@ async def cmd_menu(message: Message, state: FSMContext):
     """Handle /menu command."""
     user_id = message.from_user.id
 
-    # Clear any previous state
-    await state.clear()
     clear_active_chat(user_id)
 
-    # Delete previous bot message for clean UI
-    await delete_last_message(message.bot, user_id)
-
-    sent = await message.answer(
-        get_text("main_menu", user_id), reply_markup=main_menu_keyboard(user_id)
+    # Clear state while replacing the previous message with the menu
+    await gather_isolated(
+        state.clear(),
+        send_and_track(
+            message, get_text("main_menu", user_id), reply_markup=main_menu_keyboard(user_id)
+        ),
+        raise_on=(1,),
     )
-    set_last_message_id(user_id, sent.message_id)
 
 
 @router.message(F.text.in_(["❓ Help", "❓ Помощь"]))
@@ -64,8 +62,4 @@ async def help_handler(message: Message):
     """Handle help button."""
     user_id = message.from_user.id
 
-    # Delete previous bot message for clean UI
-    await delete_last_message(message.bot, user_id)
-
-    sent = await message.answer(get_text("help_text", user_id), parse_mode="HTML")
-    set_last_message_id(user_id, sent.message_id)
+    await send_and_track(message, get_text("help_text", user_id), parse_mode="HTML")
@@ -39,6 +39,31 @@ async def _fetch_user_language(user_id: int) -> str | None:
     return None
 
 
+async def _fetch_user_languages(user_ids: list[int]) -> dict[int, str]:
+    """Fetch the languages of several users from the CRM API in one call."""
+    import json
+
+    import aiohttp
+
+    try:
+        url = f"{CRM_API_URL}/bot.getUserLanguages"
+        params = {"input": json.dumps({"telegramIds": [str(user_id) for user_id in user_ids]})}
+
+        async with aiohttp.ClientSession() as session, session.get(url, params=params) as response:
+            if response.status == 200:
+                data = await response.json()
+                result = data.get("result", {}).get("data", {})
+                return {
+                    int(telegram_id): language
+                    for telegram_id, language in result.get("languages", {}).items()
+                    if language
+                }
+    except Exception as e:
+        logger.error(f"Failed to fetch user languages: {e}")
+
+    return {}
+
+
 async def _save_user_language(user_id: int, language: str) -> bool:
     """Save user language to the CRM API."""
     import aiohttp
@@ -71,6 +96,23 @@ async def load_user_language(user_id: int) -> str:
     return DEFAULT_LANGUAGE
 
 
+# Users per bulk language request (the IDs travel in the query string)
+LANGUAGE_BATCH_SIZE = 200
+
+
+async def load_user_languages(user_ids: list[int]) -> None:
+    """Load and cache the languages of several users with bulk requests.
+
+    Users missing from the response keep the default language until a later
+    ``load_user_language`` call finds them.
+    """
+    missing = [user_id for user_id in dict.fromkeys(user_ids) if user_id not in _user_languages]
+    for start in range(0, len(missing), LANGUAGE_BATCH_SIZE):
+        _user_languages.update(
+            await _fetch_user_languages(missing[start : start + LANGUAGE_BATCH_SIZE])
+        )
+
+
 def get_text(key: str, user_id: int, **kwargs) -> str:
     """Get localized text for a user (sync version, uses cached language)."""
     lang = _user_languages.get(user_id, DEFAULT_LANGUAGE)
@@ -100,11 +142,15 @@ def get_text_by_lang(key: str, lang: str, **kwargs) -> str:
     return text
 
 
-async def set_user_language(user_id: int, language: str) -> None:
-    """Set user's preferred language (saves to database)."""
-    if language in _locales:
-        _user_languages[user_id] = language
-        await _save_user_language(user_id, language)
+async def set_user_language(user_id: int, language: str) -> bool:
+    """Set user's preferred language (saves to database).
+
+    Returns True if the language was saved.
+    """
+    if language not in _locales:
+        return False
+    _user_languages[user_id] = language
+    return await _save_user_language(user_id, language)
 
 
 def set_user_language_sync(user_id: int, language: str) -> None:
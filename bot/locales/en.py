@@ -53,6 +53,7 @@ messages = {
     "enter_chat": "💬 Enter Chat",
     "exit_chat": "⬅️ Exit Chat",
     "chat_support_message": "<b>{title}</b>\n\n{message}",
+    "chat_support_actions": "👇 Reply to support in the order chat",
     # Payment methods (legacy - kept for backward compatibility)
     "payment_method1": "Payment Method 1",
     "payment_method2": "Payment Method 2",
@@ -60,6 +61,7 @@ messages = {
     # Language
     "language_select": "🌐 Select your language:",
     "language_changed": "✅ Language changed to English",
+    "language_save_failed": "⚠️ Your language could not be saved and may be reset later. Please select it again.",
     # Help
     "help_text": """❓ <b>Help</b>
 
@@ -53,6 +53,7 @@ messages = {
     "enter_chat": "💬 Войти в чат",
     "exit_chat": "⬅️ Выйти из чата",
     "chat_support_message": "<b>{title}</b>\n\n{message}",
+    "chat_support_actions": "👇 Ответить поддержке в чате заказа",
     # Payment methods (legacy - kept for backward compatibility)
     "payment_method1": "Способ оплаты 1",
     "payment_method2": "Способ оплаты 2",
@@ -60,6 +61,7 @@ messages = {
     # Language
     "language_select": "🌐 Выберите язык:",
     "language_changed": "✅ Язык изменён на русский",
+    "language_save_failed": "⚠️ Не удалось сохранить язык, позже он может сброситься. Пожалуйста, выберите его снова.",
     # Help
     "help_text": """❓ <b>Помощь</b>
 
@@ -10,12 +10,20 @@ from aiogram.client.default import DefaultBotProperties
 from aiogram.enums import ParseMode
 from aiogram.fsm.storage.memory import MemoryStorage
 from aiogram.types import TelegramObject, Update
+from aiohttp import web
 
 from core import api_client
-from core.config import BOT_TOKEN, WEBHOOK_HOST, WEBHOOK_PORT
+from core.albums import album_collector
+from core.callback_ack import CallbackAckMiddleware
+from core.config import BOT_TOKEN, MEDIA_PORT, MEDIA_RELAY_MODE, WEBHOOK_HOST, WEBHOOK_PORT
+from core.image_pipeline import image_pipeline
+from core.instrumentation import HandlerMetricsMiddleware, TelegramMetricsMiddleware
+from core.media_relay import MEDIA_RELAY_MODE_CACHE, media_relay
+from core.outbound import outbound_queue
+from core.scheduler import deletion_scheduler
 from handlers import setup_routers
 from locales import load_user_language
-from webhook import set_bot, start_webhook_server
+from webhook import set_bot, start_media_server, start_webhook_server
 
 # Configure logging
 logging.basicConfig(
@@ -55,17 +63,42 @@ async def on_startup(bot: Bot):
     # Set bot instance for webhook server
     set_bot(bot)
 
+    # Start the delayed deletion scheduler
+    deletion_scheduler.start(bot)
+
+    # Start the outbound send queue
+    outbound_queue.start()
+
     # Get bot info
     bot_info = await bot.get_me()
     logger.info(f"Bot started: @{bot_info.username}")
 
 
-async def on_shutdown(bot: Bot):
+async def on_shutdown(
+    bot: Bot, webhook_runner: web.AppRunner, media_runner: web.AppRunner | None = None
+):
     """Actions to perform on bot shutdown."""
     logger.info("Bot is shutting down...")
 
-    # Close API client session
+    # Stop accepting CRM requests first: held (coalesced) payloads and the
+    # outbox still send through the outbound queue
+    await webhook_runner.cleanup()
+    if media_runner is not None:
+        await media_runner.cleanup()
+
+    # Forward albums that are still being collected
+    await album_collector.stop()
+
+    # Drain and stop the outbound send queue
+    await outbound_queue.stop()
+
+    # Flush pending deletions and stop the scheduler
+    await deletion_scheduler.stop()
+
+    # Close API client sessions
     await api_client.close()
+    await media_relay.close()
+    image_pipeline.close()
 
     logger.info("Bot stopped")
 
@@ -79,12 +112,23 @@ async def main():
     # Initialize bot and dispatcher
     bot = Bot(token=BOT_TOKEN, default=DefaultBotProperties(parse_mode=ParseMode.HTML))
 
+    # Time Bot API calls and count them by result (served on /metrics)
+    bot.session.middleware(TelegramMetricsMiddleware())
+
     storage = MemoryStorage()
     dp = Dispatcher(storage=storage)
 
     # Add language middleware to load user preferences
     dp.update.middleware(LanguageMiddleware())
 
+    # Time update handlers (served on /metrics)
+    handler_metrics = HandlerMetricsMiddleware()
+    dp.message.middleware(handler_metrics)
+    dp.callback_query.middleware(handler_metrics)
+
+    # Answer callback queries immediately so buttons don't keep spinning
+    dp.callback_query.middleware(CallbackAckMiddleware())
+
     # Setup routers
     dp.include_router(setup_routers())
 
@@ -94,13 +138,24 @@ async def main():
 
     # Start webhook server for receiving messages from CRM
     webhook_runner = await start_webhook_server(WEBHOOK_HOST, WEBHOOK_PORT)
+    dp["webhook_runner"] = webhook_runner
+
+    # Serve cached customer media to CRM users on a separate port
+    media_runner = None
+    if MEDIA_RELAY_MODE == MEDIA_RELAY_MODE_CACHE:
+        media_runner = await start_media_server(WEBHOOK_HOST, MEDIA_PORT)
+        dp["media_runner"] = media_runner
 
     # Start polling
     try:
         logger.info("Starting bot polling...")
         await dp.start_polling(bot, allowed_updates=dp.resolve_used_update_types())
     finally:
-        await webhook_runner.cleanup()
+        # Already cleaned up by on_shutdown, unless startup failed
+        if webhook_runner.server is not None:
+            await webhook_runner.cleanup()
+        if media_runner is not None and media_runner.server is not None:
+            await media_runner.cleanup()
         await bot.session.close()
 
 
@@ -0,0 +1,62 @@
+"""Tests of outbox retry scheduling."""
+
+import asyncio
+import time
+
+from aiogram.exceptions import TelegramRetryAfter
+from aiogram.methods import SendMessage
+from aiohttp import web
+
+from webhook.outbox import RETRY_BASE_DELAY, STATUS_QUEUED, Outbox, retry_delay
+from webhook.schemas import NotifyPayload
+
+
+def test_retry_delay_backs_off_exponentially():
+    assert retry_delay(1) == RETRY_BASE_DELAY
+    assert retry_delay(3) == RETRY_BASE_DELAY * 4
+
+
+def test_retry_delay_waits_for_retry_after():
+    assert retry_delay(1, retry_after=30) == 30
+    # Backoff that is already longer wins
+    assert retry_delay(6, retry_after=1) == RETRY_BASE_DELAY * 32
+
+
+async def _schedule_after(tmp_path, deliver) -> tuple[str, float]:
+    """Deliver one queued payload and return its status and seconds to the next attempt."""
+    outbox = Outbox(path=str(tmp_path / "outbox.db"), callback_url="")
+    outbox.register("notify", deliver, NotifyPayload)
+    await outbox._db(outbox._open)
+    try:
+        delivery_id = await outbox.enqueue("notify", NotifyPayload(telegram_id="1"))
+        [row] = await outbox._db(outbox._claim, 1)
+        await outbox._deliver(row)
+        stored = await outbox._db(
+            lambda: outbox._conn.execute(
+                "SELECT status, next_attempt_at FROM deliveries WHERE id = ?", (delivery_id,)
+            ).fetchone()
+        )
+        return stored["status"], stored["next_attempt_at"] - time.time()
+    finally:
+        await outbox.stop()
+
+
+def test_rate_limited_response_is_retried_after_retry_after(tmp_path):
+    async def deliver(payload):
+        response = web.json_response({"success": False}, status=429)
+        response.headers["Retry-After"] = "30"
+        return response
+
+    status, delay = asyncio.run(_schedule_after(tmp_path, deliver))
+    assert status == STATUS_QUEUED
+    assert 29 < delay <= 30
+
+
+def test_telegram_retry_after_is_retried_after_retry_after(tmp_path):
+    async def deliver(payload):
+        method = SendMessage(chat_id=1, text="x")
+        raise TelegramRetryAfter(method, "Flood control exceeded", retry_after=45)
+
+    status, delay = asyncio.run(_schedule_after(tmp_path, deliver))
+    assert status == STATUS_QUEUED
+    assert 44 < delay <= 45
@@ -14,11 +14,18 @@ from .keyboards import (
     payment_keyboard,
     staff_order_link_keyboard,
 )
+from .notifications import (
+    NotificationError,
+    customer_notifications,
+    staff_notifications,
+)
 
 __all__ = [
+    "NotificationError",
     "cancel_keyboard",
     "chat_keyboard",
     "confirm_keyboard",
+    "customer_notifications",
     "delete_confirm_keyboard",
     "enter_chat_keyboard",
     "language_keyboard",
@@ -27,5 +34,6 @@ __all__ = [
     "order_detail_keyboard",
     "orders_keyboard",
     "payment_keyboard",
+    "staff_notifications",
     "staff_order_link_keyboard",
 ]
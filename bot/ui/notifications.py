@@ -0,0 +1,181 @@
+"""Notification registry.
+
+Every notification type the bot sends is declared once, at import: its
+locale template, the template fields and its keyboard. Missing fields render
+empty. The CRM webhook (``/notify``, ``/notify-staff`` and their batch
+variants) and the in-bot ``notify_*`` helpers render and send through the same
+lookup.
+
+Values are passed by template field name (``title``, ``status``,
+``username``, ...); ``order_id`` feeds the CRM order link of staff
+notifications.
+"""
+
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass
+from functools import partial
+from types import MappingProxyType
+from typing import Any
+
+from aiogram.types import InlineKeyboardMarkup, Message
+
+from core.config import CRM_BASE_URL
+from core.metrics import notifications_rendered, notifications_sent
+from core.outbound import Priority, outbound_queue
+from locales import get_status_text, get_text
+from utils.validation import is_valid_external_url
+
+from .keyboards import staff_order_link_keyboard
+
+KeyboardBuilder = Callable[[dict[str, Any], int], InlineKeyboardMarkup | None]
+
+# Template fields shown through their own translation
+FIELD_FORMATTERS: dict[str, Callable[[str, int], str]] = {"status": get_status_text}
+
+
+class NotificationError(ValueError):
+    """Unknown notification type."""
+
+
+@dataclass(frozen=True)
+class Notification:
+    """Declaration of a notification type."""
+
+    template: str
+    # Template fields; missing ones render empty
+    fields: tuple[str, ...] = ("title",)
+    keyboard: KeyboardBuilder | None = None
+
+
+@dataclass
+class RenderedNotification:
+    """Text and keyboard of a notification for one recipient."""
+
+    text: str
+    reply_markup: InlineKeyboardMarkup | None = None
+
+
+def crm_order_link(values: dict[str, Any], user_id: int) -> InlineKeyboardMarkup | None:
+    """Button opening the order in the CRM, if the CRM has a public URL."""
+    order_id = values.get("order_id")
+    if order_id and is_valid_external_url(CRM_BASE_URL):
+        return staff_order_link_keyboard(order_id, user_id, CRM_BASE_URL)
+    return None
+
+
+class NotificationRegistry:
+    """Notification types of one audience, rendered and sent by type name."""
+
+    def __init__(self, audience: str, types: dict[str, Notification], priority: Priority):
+        self.audience = audience
+        self.types = MappingProxyType(types)
+        self.priority = priority
+
+    def __contains__(self, notification_type: str | None) -> bool:
+        return notification_type in self.types
+
+    def render(
+        self, notification_type: str | None, user_id: int, values: dict[str, Any]
+    ) -> RenderedNotification:
+        """Render a notification in the recipient's language.
+
+        Raises:
+            NotificationError: Unknown type
+        """
+        notification = self.types.get(notification_type)
+        if notification is None:
+            raise NotificationError("Unknown notification type")
+
+        kwargs = {}
+        for name in notification.fields:
+            value = values.get(name)
+            value = "" if value is None else value
+            formatter = FIELD_FORMATTERS.get(name)
+            kwargs[name] = formatter(value, user_id) if formatter else value
+        text = get_text(notification.template, user_id, **kwargs)
+
+        reply_markup = None
+        if notification.keyboard is not None:
+            reply_markup = notification.keyboard(values, user_id)
+            if reply_markup is None and values.get("order_id"):
+                text += f"\n\n📋 Order ID: <code>{values['order_id']}</code>"
+
+        notifications_rendered.inc(audience=self.audience, type=notification_type)
+        return RenderedNotification(text, reply_markup)
+
+    def prepare(
+        self,
+        bot,
+        chat_id: int,
+        notification_type: str,
+        values: dict[str, Any],
+        user_id: int | None = None,
+    ) -> Callable[[], Awaitable[Message]]:
+        """Render a notification and return the Telegram call sending it.
+
+        ``user_id`` selects the language (defaults to the chat).
+        """
+        rendered = self.render(notification_type, chat_id if user_id is None else user_id, values)
+        send_message = partial(
+            bot.send_message,
+            chat_id=chat_id,
+            text=rendered.text,
+            parse_mode="HTML",
+            reply_markup=rendered.reply_markup,
+        )
+
+        async def send() -> Message:
+            try:
+                message = await send_message()
+            except Exception as e:
+                notifications_sent.inc(
+                    audience=self.audience, type=notification_type, result=type(e).__name__
+                )
+                raise
+            notifications_sent.inc(audience=self.audience, type=notification_type, result="ok")
+            return message
+
+        return send
+
+    async def send(
+        self,
+        bot,
+        chat_id: int,
+        notification_type: str,
+        values: dict[str, Any],
+        user_id: int | None = None,
+    ) -> Message:
+        """Render a notification and send it through the outbound queue."""
+        send = self.prepare(bot, chat_id, notification_type, values, user_id)
+        return await outbound_queue.send(chat_id, send, self.priority)
+
+
+# Global notification registry instances
+customer_notifications = NotificationRegistry(
+    "customer",
+    {
+        "order_approved": Notification("notify_order_approved"),
+        "order_rejected": Notification("notify_order_rejected"),
+        "order_assigned": Notification("notify_order_assigned"),
+        "order_status_changed": Notification("notify_order_status", fields=("title", "status")),
+        "payment_info_received": Notification(
+            "notify_payment_info", fields=("title", "payment_method", "details", "amount")
+        ),
+    },
+    Priority.NOTIFICATION,
+)
+
+staff_notifications = NotificationRegistry(
+    "staff",
+    {
+        "new_order": Notification("staff_new_order", keyboard=crm_order_link),
+        "order_assigned": Notification("staff_order_assigned", keyboard=crm_order_link),
+        "new_response": Notification(
+            "staff_new_response", fields=("title", "username"), keyboard=crm_order_link
+        ),
+        "new_order_moderation": Notification("staff_new_order_moderation", keyboard=crm_order_link),
+        "chat_access_granted": Notification("staff_chat_access_granted", keyboard=crm_order_link),
+        "payment_info_sent": Notification("staff_payment_info_sent", keyboard=crm_order_link),
+    },
+    Priority.BROADCAST,
+)
@@ -18,6 +18,14 @@ def is_valid_telegram_id(telegram_id: str | None) -> bool:
     return telegram_id.isdigit() and 7 <= len(telegram_id) <= 15
 
 
+def is_valid_external_url(url: str) -> bool:
+    """Check if URL is valid for Telegram inline buttons (not localhost)."""
+    if not url:
+        return False
+    lower_url = url.lower()
+    return "localhost" not in lower_url and "127.0.0.1" not in lower_url
+
+
 def parse_cost(text: str) -> float | None:
     """
     Parse cost from user input.
@@ -1,5 +1,11 @@
 """Webhook server package for receiving messages from CRM."""
 
-from .server import create_app, set_bot, start_webhook_server
+from .server import create_app, create_media_app, set_bot, start_media_server, start_webhook_server
 
-__all__ = ["create_app", "set_bot", "start_webhook_server"]
+__all__ = [
+    "create_app",
+    "create_media_app",
+    "set_bot",
+    "start_media_server",
+    "start_webhook_server",
+]
@@ -0,0 +1,150 @@
+"""Admission control of CRM requests to the webhook server.
+
+A CRM bulk action can send thousands of webhook requests at once. Accepted
+without limit, each one holds its decoded body (and possibly decoded images)
+while it waits for the outbound queue, until the process runs out of memory.
+
+Requests are admitted while fewer than ``WEBHOOK_MAX_IN_FLIGHT`` are being
+handled and their declared bodies (``Content-Length``) fit in
+``WEBHOOK_MAX_IN_FLIGHT_BYTES``. Others wait, at most ``WEBHOOK_MAX_QUEUED`` of
+them and for at most ``WEBHOOK_QUEUE_TIMEOUT`` seconds; bodies are only read
+once a request is admitted, so waiting requests hold no payload. When the wait
+queue is full or the wait times out, the request is rejected with 429 and a
+``Retry-After`` estimated from the queue length and recent request durations,
+so the CRM can back off.
+"""
+
+import asyncio
+import logging
+import math
+import time
+
+from core.config import (
+    WEBHOOK_MAX_BODY_SIZE,
+    WEBHOOK_MAX_IN_FLIGHT,
+    WEBHOOK_MAX_IN_FLIGHT_BYTES,
+    WEBHOOK_MAX_QUEUED,
+    WEBHOOK_QUEUE_TIMEOUT,
+)
+from core.metrics import (
+    webhook_admission_rejected,
+    webhook_admission_wait_seconds,
+    webhook_in_flight,
+    webhook_queued,
+)
+
+logger = logging.getLogger(__name__)
+
+# Weight of the latest request duration in the running mean
+DURATION_SMOOTHING = 0.1
+MAX_RETRY_AFTER = 60
+
+
+class AdmissionRejected(Exception):
+    """The server is saturated; retry after ``retry_after`` seconds."""
+
+    def __init__(self, reason: str, retry_after: int):
+        super().__init__(reason)
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class AdmissionControl:
+    """Bounds concurrent requests and their body sizes, with a bounded wait queue."""
+
+    def __init__(
+        self,
+        max_in_flight: int = WEBHOOK_MAX_IN_FLIGHT,
+        max_bytes: int = WEBHOOK_MAX_IN_FLIGHT_BYTES,
+        max_queued: int = WEBHOOK_MAX_QUEUED,
+        timeout: float = WEBHOOK_QUEUE_TIMEOUT,
+    ):
+        self.max_in_flight = max_in_flight
+        self.max_bytes = max_bytes
+        self.max_queued = max_queued
+        self.timeout = timeout
+        self.in_flight = 0
+        self.in_flight_bytes = 0
+        self.queued = 0
+        self._mean_seconds = 1.0
+        self._condition: asyncio.Condition | None = None
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_in_flight > 0
+
+    @property
+    def saturation(self) -> float:
+        """Share of request slots in use (above 1 when requests are waiting)."""
+        if not self.enabled:
+            return 0.0
+        return (self.in_flight + self.queued) / self.max_in_flight
+
+    def _fits(self, size: int) -> bool:
+        # A request larger than the byte budget is admitted when it is alone
+        return self.in_flight < self.max_in_flight and (
+            self.in_flight == 0 or self.in_flight_bytes + size <= self.max_bytes
+        )
+
+    def retry_after(self) -> int:
+        """Seconds until the current queue is likely drained."""
+        estimate = self._mean_seconds * (self.queued + 1) / max(self.max_in_flight, 1)
+        return min(MAX_RETRY_AFTER, max(1, math.ceil(estimate)))
+
+    def _take(self, size: int) -> None:
+        self.in_flight += 1
+        self.in_flight_bytes += size
+        webhook_in_flight.set(self.in_flight)
+
+    async def acquire(self, size: int) -> None:
+        """Wait for a request slot and ``size`` bytes of body budget.
+
+        Raises:
+            AdmissionRejected: The wait queue is full or the wait timed out
+        """
+        if self._condition is None:
+            self._condition = asyncio.Condition()
+        if self.queued == 0 and self._fits(size):
+            self._take(size)
+            return
+        if self.queued >= self.max_queued:
+            webhook_admission_rejected.inc(reason="queue_full")
+            raise AdmissionRejected("queue_full", self.retry_after())
+
+        self.queued += 1
+        webhook_queued.set(self.queued)
+        started = time.monotonic()
+        try:
+            async with self._condition:
+                await asyncio.wait_for(
+                    self._condition.wait_for(lambda: self._fits(size)), self.timeout
+                )
+                self._take(size)
+        except TimeoutError:
+            webhook_admission_rejected.inc(reason="timeout")
+            raise AdmissionRejected("timeout", self.retry_after()) from None
+        finally:
+            self.queued -= 1
+            webhook_queued.set(self.queued)
+            webhook_admission_wait_seconds.observe(time.monotonic() - started)
+
+    async def release(self, size: int, seconds: float) -> None:
+        """Free a request slot and record how long the request took."""
+        self.in_flight -= 1
+        self.in_flight_bytes -= size
+        webhook_in_flight.set(self.in_flight)
+        self._mean_seconds += DURATION_SMOOTHING * (seconds - self._mean_seconds)
+        if self._condition is not None and self.queued:
+            async with self._condition:
+                self._condition.notify_all()
+
+
+def declared_size(content_length: int | None) -> int:
+    """Body budget of a request: its declared size, or the maximum if unknown."""
+    if content_length is None:
+        return WEBHOOK_MAX_BODY_SIZE
+    return content_length
+
+
+# Global admission control instance
+admission_control = AdmissionControl()
@@ -0,0 +1,150 @@
+"""Coalescing of bursty webhook deliveries per chat and order.
+
+A manager dragging an order across several Kanban columns, or sending several
+chat replies in a row, makes the CRM call the bot several times within
+seconds. Delivered one by one, these become separate Telegram messages
+competing for the per-chat rate limit.
+
+A ``Coalescer`` wraps an endpoint's delivery function. The first mergeable
+payload for a key (chat and order) opens a window of ``WEBHOOK_COALESCE_WINDOW``
+seconds; mergeable payloads arriving for the same key within the window are
+merged into it (e.g. the latest status wins, support texts are joined) and
+the merged payload is delivered once when the window closes. Every request of
+the window waits for that delivery and answers with its result.
+
+Payloads that cannot be merged (e.g. messages with images) close the open
+window of their key first, so messages keep their order. With the window set
+to 0 (the default) payloads are delivered right away.
+"""
+
+import asyncio
+import contextlib
+import logging
+from collections.abc import Awaitable, Callable, Hashable
+from dataclasses import dataclass, field
+
+from aiohttp import web
+
+from core.config import WEBHOOK_COALESCE_WINDOW
+from core.metrics import coalesced_payloads
+
+from .schemas import WebhookPayload
+from .utils import error_response
+
+logger = logging.getLogger(__name__)
+
+KeyFunction = Callable[[WebhookPayload], Hashable]
+# Merge of a held payload with a new one; None if they must not be merged
+MergeFunction = Callable[[WebhookPayload, WebhookPayload], WebhookPayload | None]
+
+_coalescers: list["Coalescer"] = []
+
+
+def copy_response(response: web.Response) -> web.Response:
+    """Copy a response, so one delivery result can answer several requests."""
+    headers = {}
+    if "Retry-After" in response.headers:
+        headers["Retry-After"] = response.headers["Retry-After"]
+    return web.Response(
+        body=response.body,
+        status=response.status,
+        content_type=response.content_type,
+        headers=headers,
+    )
+
+
+@dataclass
+class _Window:
+    """Payload held for a key, and the requests waiting for its delivery."""
+
+    payload: WebhookPayload
+    result: asyncio.Future = field(default_factory=asyncio.Future)
+    closed: asyncio.Event = field(default_factory=asyncio.Event)
+    payloads: int = 1
+    task: asyncio.Task | None = None
+
+
+class Coalescer:
+    """Delivery function merging payloads with equal keys within a time window."""
+
+    def __init__(
+        self,
+        name: str,
+        deliver: Callable[..., Awaitable[web.Response]],
+        key: KeyFunction,
+        merge: MergeFunction,
+        mergeable: Callable[[WebhookPayload], bool],
+        window: float = WEBHOOK_COALESCE_WINDOW,
+    ):
+        self.name = name
+        self.deliver = deliver
+        self.key = key
+        self.merge = merge
+        self.mergeable = mergeable
+        self.window = window
+        self.__doc__ = deliver.__doc__
+        self._windows: dict[Hashable, _Window] = {}
+        _coalescers.append(self)
+
+    async def __call__(self, payload: WebhookPayload, *args) -> web.Response:
+        """Deliver a payload, merged with others of its key if possible.
+
+        Extra arguments (e.g. received images) are passed to the delivery
+        function and make the payload unmergeable.
+        """
+        if self.window <= 0:
+            return await self.deliver(payload, *args)
+
+        key = self.key(payload)
+        if args or not self.mergeable(payload):
+            await self.flush(key)
+            return await self.deliver(payload, *args)
+
+        window = self._windows.get(key)
+        if window is not None:
+            merged = self.merge(window.payload, payload)
+            if merged is not None:
+                window.payload = merged
+                window.payloads += 1
+                coalesced_payloads.inc(endpoint=self.name)
+                return copy_response(await asyncio.shield(window.result))
+            await self.flush(key)
+
+        window = _Window(payload)
+        self._windows[key] = window
+        window.task = asyncio.create_task(self._close(key, window))
+        return copy_response(await asyncio.shield(window.result))
+
+    async def _close(self, key: Hashable, window: _Window) -> None:
+        """Deliver the window's payload once the window is over or flushed."""
+        with contextlib.suppress(TimeoutError):
+            await asyncio.wait_for(window.closed.wait(), self.window)
+        if self._windows.get(key) is window:
+            del self._windows[key]
+
+        try:
+            response = await self.deliver(window.payload)
+        except Exception as e:
+            logger.error(f"Coalesced {self.name} delivery failed: {e}")
+            response = error_response(str(e), status=500)
+        if window.payloads > 1:
+            logger.info(f"Delivered {window.payloads} coalesced {self.name} payloads as one")
+        window.result.set_result(response)
+
+    async def flush(self, key: Hashable) -> None:
+        """Deliver the payload held for a key now, if any."""
+        window = self._windows.pop(key, None)
+        if window is not None:
+            window.closed.set()
+            await asyncio.shield(window.result)
+
+    async def flush_all(self) -> None:
+        """Deliver all held payloads."""
+        for key in list(self._windows):
+            await self.flush(key)
+
+
+async def flush_coalescers(_app: web.Application) -> None:
+    """Deliver payloads still held when the server stops."""
+    for coalescer in _coalescers:
+        await coalescer.flush_all()
@@ -0,0 +1,244 @@
+"""Webhook endpoint wiring.
+
+Each CRM-facing route is described by a payload type (see ``schemas``), a
+validation function (cheap checks on the decoded payload, no I/O) and a
+delivery function (language lookup and Telegram calls). ``webhook_endpoint``
+turns them into an aiohttp handler that decodes the body straight into the
+payload type, rejects invalid payloads with 400 and then either
+delivers while the request is open, or - in asynchronous mode - stores the
+validated payload in the outbox and answers 202 with a delivery ID.
+
+``webhook_batch_endpoint`` builds the batch variant of a route from the same
+functions: one request carries many payloads, their recipients' languages are
+loaded in bulk, and the payloads are delivered with bounded concurrency. The
+response holds one result per payload, in request order.
+
+Requests with an idempotency key (the ``Idempotency-Key`` header, or
+``idempotencyKey`` of a batch item) are delivered or enqueued once per key; see
+``idempotency``.
+"""
+
+import asyncio
+import json
+import logging
+from collections.abc import Awaitable, Callable
+from functools import partial
+from typing import Any
+
+import msgspec
+from aiohttp import web
+
+from core.config import BATCH_MAX_ITEMS, FANOUT_CONCURRENCY, WEBHOOK_ASYNC_MODE
+from locales import load_user_languages
+
+from .idempotency import idempotency_key, idempotency_store
+from .outbox import outbox
+from .schemas import WebhookPayload, convert_payload, payload_decoder
+from .utils import error_response, require_bot
+
+logger = logging.getLogger(__name__)
+
+ASYNC_MODE_OFF = "off"
+ASYNC_MODE_OPT_IN = "opt-in"
+ASYNC_MODE_ALWAYS = "always"
+
+Validator = Callable[[WebhookPayload], web.Response | None]
+Deliverer = Callable[[WebhookPayload], Awaitable[web.Response]]
+
+
+def wants_async(request: web.Request) -> bool:
+    """Check if the request should be delivered asynchronously."""
+    if WEBHOOK_ASYNC_MODE == ASYNC_MODE_ALWAYS:
+        return True
+    if WEBHOOK_ASYNC_MODE == ASYNC_MODE_OPT_IN:
+        return "respond-async" in request.headers.get("Prefer", "").lower()
+    return False
+
+
+def invalid_payload(error: msgspec.DecodeError) -> web.Response:
+    """Error response for a body that does not match the payload type."""
+    if isinstance(error, msgspec.ValidationError):
+        return error_response(f"Invalid payload: {error}")
+    return error_response("Invalid JSON body")
+
+
+def webhook_endpoint(
+    name: str,
+    schema: type[WebhookPayload],
+    validate: Validator,
+    deliver: Deliverer,
+    allow_async: bool = True,
+) -> Callable[[web.Request], Awaitable[web.Response]]:
+    """Build an aiohttp handler from an endpoint's payload type, validation and delivery.
+
+    Endpoints whose caller needs the delivery outcome in the response (e.g.
+    verification) pass ``allow_async=False`` and are always delivered while
+    the request is open, whatever the asynchronous mode.
+    """
+    if allow_async:
+        outbox.register(name, deliver, schema)
+    decoder = payload_decoder(schema)
+
+    @require_bot
+    async def handler(request: web.Request) -> web.Response:
+        try:
+            payload = decoder.decode(await request.read())
+        except msgspec.DecodeError as e:
+            return invalid_payload(e)
+
+        error = validate(payload)
+        if error is not None:
+            return error
+
+        if allow_async and wants_async(request):
+            run = partial(enqueue, name, payload)
+        else:
+            run = partial(deliver, payload)
+
+        key = idempotency_key(request, payload.idempotency_key)
+        if key is None:
+            return await run()
+        return await idempotency_store.run(f"{name}:{key}", run)
+
+    handler.__name__ = f"handle_{name}"
+    handler.__doc__ = deliver.__doc__
+    return handler
+
+
+async def enqueue(name: str, payload: WebhookPayload) -> web.Response:
+    """Store a payload in the outbox and answer 202 with its delivery ID."""
+    delivery_id = await outbox.enqueue(name, payload)
+    return web.json_response(
+        {"success": True, "deliveryId": delivery_id, "status": "queued"}, status=202
+    )
+
+
+async def _run_item(name: str, payload: WebhookPayload, run: Deliverer) -> web.Response:
+    """Deliver or enqueue a batch item, once per idempotency key."""
+    key = idempotency_key(None, payload.idempotency_key)
+    if key is None:
+        return await run(payload)
+    return await idempotency_store.run(f"{name}:{key}", partial(run, payload))
+
+
+def _item_result(response: web.Response) -> dict[str, Any]:
+    """Convert the response of a single delivery into a batch result."""
+    try:
+        body = json.loads(response.text)
+    except (TypeError, ValueError):
+        body = {"success": response.status < 400}
+    result = {"httpStatus": response.status, **body}
+    if "Retry-After" in response.headers:
+        result["retryAfter"] = int(response.headers["Retry-After"])
+    return result
+
+
+def webhook_batch_endpoint(
+    name: str,
+    schema: type[WebhookPayload],
+    validate: Validator,
+    deliver: Deliverer,
+    limit: int = FANOUT_CONCURRENCY,
+) -> Callable[[web.Request], Awaitable[web.Response]]:
+    """Build the batch variant of an endpoint.
+
+    The body is ``{"items": [payload, ...]}``; other top-level fields are
+    shared by all items (e.g. ``type`` and ``orderTitle`` of a broadcast).
+    Each result is the body the single endpoint would have answered with,
+    plus its HTTP status as ``httpStatus``.
+    """
+    outbox.register(name, deliver, schema)
+
+    @require_bot
+    async def handler(request: web.Request) -> web.Response:
+        try:
+            data = await request.json()
+        except ValueError:
+            return error_response("Invalid JSON body")
+        if not isinstance(data, dict) or not isinstance(data.get("items"), list):
+            return error_response("Invalid JSON body")
+
+        items = data.pop("items")
+        if len(items) > BATCH_MAX_ITEMS:
+            return error_response(f"Too many items (maximum {BATCH_MAX_ITEMS})", status=413)
+
+        payloads: list[WebhookPayload | None] = []
+        results: list[dict[str, Any] | None] = []
+        for item in items:
+            if not isinstance(item, dict):
+                payloads.append(None)
+                results.append({"httpStatus": 400, "success": False, "error": "Invalid item"})
+                continue
+            try:
+                payload = convert_payload({**data, **item}, schema)
+            except msgspec.ValidationError as e:
+                error = invalid_payload(e)
+            else:
+                error = validate(payload)
+            payloads.append(payload if error is None else None)
+            results.append(_item_result(error) if error is not None else None)
+
+        valid = [(i, payload) for i, payload in enumerate(payloads) if payload is not None]
+
+        if wants_async(request):
+            for i, payload in valid:
+                results[i] = _item_result(await _run_item(name, payload, partial(enqueue, name)))
+        else:
+            # Validation has checked every Telegram ID
+            await load_user_languages([int(payload.telegram_id) for _, payload in valid])
+            semaphore = asyncio.Semaphore(limit)
+
+            async def deliver_item(i: int, payload: WebhookPayload) -> None:
+                async with semaphore:
+                    try:
+                        results[i] = _item_result(await _run_item(name, payload, deliver))
+                    except Exception as e:
+                        logger.error(f"Batch {name} item {i} failed: {e}")
+                        results[i] = {"httpStatus": 500, "success": False, "error": str(e)}
+
+            async with asyncio.TaskGroup() as tg:
+                for i, payload in valid:
+                    tg.create_task(deliver_item(i, payload))
+
+        failed = sum(1 for result in results if not result["success"])
+        if failed:
+            logger.warning(f"Batch {name}: {failed} of {len(results)} items failed")
+        return web.json_response(
+            {"success": failed == 0, "total": len(results), "failed": failed, "results": results}
+        )
+
+    handler.__name__ = f"handle_{name}_batch"
+    handler.__doc__ = f"Batch variant of the {name} endpoint."
+    return handler
+
+
+async def handle_delivery_status(request: web.Request) -> web.Response:
+    """Report the status of an asynchronous delivery."""
+    if WEBHOOK_ASYNC_MODE == ASYNC_MODE_OFF:
+        return error_response("Unknown delivery", status=404)
+    status = await outbox.status(request.match_info["delivery_id"])
+    if status is None:
+        return error_response("Unknown delivery", status=404)
+    return web.json_response({"success": True, **status})
+
+
+async def start_outbox(_app: web.Application) -> None:
+    """Start the outbox when asynchronous delivery is enabled."""
+    if WEBHOOK_ASYNC_MODE != ASYNC_MODE_OFF:
+        await outbox.start()
+
+
+async def stop_outbox(_app: web.Application) -> None:
+    """Stop the outbox worker."""
+    if WEBHOOK_ASYNC_MODE != ASYNC_MODE_OFF:
+        await outbox.stop()
+
+
+async def start_idempotency_store(_app: web.Application) -> None:
+    """Connect the idempotency store to its shared backend, if configured."""
+    await idempotency_store.start()
+
+
+async def stop_idempotency_store(_app: web.Application) -> None:
+    """Close the idempotency store's shared backend connection."""
+    await idempotency_store.stop()
@@ -1,39 +1,72 @@
 """Customer message sending handlers."""
 
+import asyncio
 import logging
+from dataclasses import dataclass
+from functools import partial
 
-from aiogram.types import BufferedInputFile
+import msgspec
+from aiogram.exceptions import TelegramBadRequest
+from aiogram.types import BufferedInputFile, InputFile, InputMediaPhoto, Message
 from aiohttp import web
 
+from core.file_cache import file_id_cache
+from core.image_pipeline import image_pipeline
+from core.outbound import Priority, outbound_queue
 from core.states import is_user_in_chat
 from locales import get_text
 from ui.keyboards import enter_chat_keyboard
 
-from ..utils import get_bot, handle_telegram_exception, require_bot, validate_and_load_user
-from .helpers import parse_base64_image
+from ..coalescing import Coalescer
+from ..endpoints import invalid_payload, webhook_batch_endpoint, webhook_endpoint
+from ..idempotency import idempotency_key, idempotency_store
+from ..schemas import SendMessagePayload, convert_payload
+from ..uploads import ReceivedImage, UploadError, close_images, receive_upload
+from ..utils import (
+    error_response,
+    get_bot,
+    handle_telegram_exception,
+    require_bot,
+    validate_and_load_user,
+    validate_telegram_id,
+)
+from .helpers import ImageError, parse_base64_image
 
 logger = logging.getLogger(__name__)
 
+# Maximum number of photos Telegram accepts in one album
+MEDIA_GROUP_SIZE = 10
 
-@require_bot
-async def handle_send_message(request: web.Request) -> web.Response:
-    """Handle incoming message from CRM to send to customer."""
-    telegram_id = None
-    try:
-        data = await request.json()
-        telegram_id = data.get("telegramId")
-        message = data.get("message", "")
-        order_title = data.get("orderTitle", "")
-        order_id = data.get("orderId", "")
-        image_urls = data.get("imageUrls", [])
+# Longest merged support text, leaving room for the order header within
+# Telegram's 4096-character message limit
+MAX_MERGED_MESSAGE = 3500
+
+
+def validate_send_message(payload: SendMessagePayload) -> web.Response | None:
+    """Validate a support message payload. Returns an error response or None."""
+    if not payload.message and not payload.image_urls:
+        return error_response("Missing message or image")
+    return validate_telegram_id(payload.telegram_id)
 
-        if not message and not image_urls:
-            from ..utils import error_response
 
-            return error_response("Missing message or image")
+async def deliver_send_message(
+    payload: SendMessagePayload, images: list[ReceivedImage | str] | None = None
+) -> web.Response:
+    """Handle incoming message from CRM to send to customer.
+
+    Images come from ``imageUrls`` in the payload, or from ``images`` when they
+    were streamed in a multipart request.
+    """
+    telegram_id = payload.telegram_id
+    try:
+        message = payload.message or ""
+        order_title = payload.order_title or ""
+        order_id = payload.order_id or ""
+        if images is None:
+            images = payload.image_urls
 
         user_id, error = await validate_and_load_user(telegram_id)
-        if error:
+        if error is not None:
             return error
 
         # Format message with order context if provided
@@ -49,16 +82,23 @@ async def handle_send_message(request: web.Request) -> web.Response:
         bot = get_bot()
 
         # Send images if provided
-        if image_urls:
-            await _send_images_with_message(
-                bot, user_id, image_urls, formatted_message, reply_markup
-            )
+        if images:
+            try:
+                photos = await asyncio.gather(*(_photo_input(image) for image in images))
+            except ImageError as e:
+                return error_response(str(e))
+            await _send_images_with_message(bot, user_id, photos, formatted_message, reply_markup)
         elif formatted_message:
-            await bot.send_message(
-                chat_id=user_id,
-                text=formatted_message,
-                parse_mode="HTML",
-                reply_markup=reply_markup,
+            await outbound_queue.send(
+                user_id,
+                partial(
+                    bot.send_message,
+                    chat_id=user_id,
+                    text=formatted_message,
+                    parse_mode="HTML",
+                    reply_markup=reply_markup,
+                ),
+                Priority.INTERACTIVE,
             )
 
         logger.info(f"Message sent to {telegram_id}")
@@ -68,6 +108,66 @@ async def handle_send_message(request: web.Request) -> web.Response:
         return handle_telegram_exception(e, telegram_id, "Failed to send message")
 
 
+def _merge_messages(
+    held: SendMessagePayload, payload: SendMessagePayload
+) -> SendMessagePayload | None:
+    """Join two support texts for the same chat and order, if short enough."""
+    message = f"{held.message}\n\n{payload.message}"
+    if len(message) > MAX_MERGED_MESSAGE:
+        return None
+    return msgspec.structs.replace(payload, message=message)
+
+
+# Rapid support texts for the same order are merged into one message
+coalesce_send_message = Coalescer(
+    "send_message",
+    deliver_send_message,
+    key=lambda payload: (payload.telegram_id, payload.order_id),
+    merge=_merge_messages,
+    mergeable=lambda payload: bool(payload.message) and not payload.image_urls,
+)
+
+handle_send_message = webhook_endpoint(
+    "send_message", SendMessagePayload, validate_send_message, coalesce_send_message
+)
+handle_send_message_batch = webhook_batch_endpoint(
+    "send_message", SendMessagePayload, validate_send_message, coalesce_send_message
+)
+
+
+@require_bot
+async def handle_send_message_upload(request: web.Request) -> web.Response:
+    """Handle a support message whose images are streamed as multipart parts.
+
+    Always delivered while the request is open: the received images only live
+    for the duration of the request.
+    """
+    try:
+        data, images = await receive_upload(request)
+    except UploadError as e:
+        return e.response
+
+    try:
+        try:
+            payload = convert_payload(data, SendMessagePayload)
+        except msgspec.ValidationError as e:
+            return invalid_payload(e)
+        if images:
+            error = validate_telegram_id(payload.telegram_id)
+        else:
+            error = validate_send_message(payload)
+        if error is not None:
+            return error
+        key = idempotency_key(request, None)
+        if key is None:
+            return await coalesce_send_message(payload, images)
+        return await idempotency_store.run(
+            f"send_message:{key}", partial(coalesce_send_message, payload, images)
+        )
+    finally:
+        close_images(images)
+
+
 def _format_support_message(message: str, order_title: str, user_id: int) -> str | None:
     """Format support message with order context."""
     if not message:
@@ -79,34 +179,148 @@ def _format_support_message(message: str, order_title: str, user_id: int) -> str
     return f"💬 <b>Support:</b>\n\n{message}"
 
 
+@dataclass
+class _Photo:
+    """Photo to send: a URL, or uploaded bytes with their cached file ID if known."""
+
+    url: str | None = None
+    upload: InputFile | None = None
+    digest: str | None = None
+    file_id: str | None = None
+
+    @property
+    def source(self) -> InputFile | str:
+        return self.file_id or self.upload or self.url
+
+
+async def _recompressed(data: bytes) -> InputFile | None:
+    """Smaller JPEG upload of a large image, if the image pipeline makes one."""
+    optimized = await image_pipeline.recompress(data)
+    if optimized is None:
+        return None
+    return BufferedInputFile(optimized, filename="image.jpg")
+
+
+def _read_received(image: ReceivedImage) -> bytes:
+    image.file.file.seek(0)
+    return image.file.file.read()
+
+
+async def _photo_input(image: ReceivedImage | str) -> _Photo:
+    """Convert an image from the CRM into a photo, reusing cached uploads.
+
+    Uploads are keyed by the digest of the original image, so cached images
+    are not recompressed again.
+    """
+    # Streamed multipart upload
+    if isinstance(image, ReceivedImage):
+        file_id = file_id_cache.get(image.digest)
+        upload = None
+        if file_id is None and image_pipeline.enabled and image.size >= image_pipeline.threshold:
+            upload = await _recompressed(await asyncio.to_thread(_read_received, image))
+        return _Photo(upload=upload or image.file, digest=image.digest, file_id=file_id)
+
+    # Check if it's a base64 data URL
+    decoded = await parse_base64_image(image)
+    if decoded:
+        file_id = file_id_cache.get(decoded.digest)
+        upload = None
+        if file_id is None:
+            upload = await _recompressed(decoded.data)
+        return _Photo(
+            upload=upload or BufferedInputFile(decoded.data, filename=decoded.filename),
+            digest=decoded.digest,
+            file_id=file_id,
+        )
+    # It's a regular URL (e.g., Telegram file URL)
+    return _Photo(url=image)
+
+
+def _photo_request(bot, user_id: int, caption: str | None, reply_markup, sources: list):
+    return bot.send_photo(
+        chat_id=user_id,
+        photo=sources[0],
+        caption=caption,
+        parse_mode="HTML" if caption else None,
+        reply_markup=reply_markup,
+    )
+
+
+def _album_request(bot, user_id: int, caption: str | None, sources: list):
+    media = [
+        InputMediaPhoto(
+            media=source,
+            caption=caption if j == 0 else None,
+            parse_mode="HTML" if caption and j == 0 else None,
+        )
+        for j, source in enumerate(sources)
+    ]
+    return bot.send_media_group(chat_id=user_id, media=media)
+
+
+async def _send_photos(user_id: int, photos: list[_Photo], request) -> None:
+    """Send photos through the outbound queue and cache the file IDs of uploads.
+
+    If Telegram rejects a cached file ID, the affected entries are dropped and
+    the photos are uploaded again.
+    """
+    try:
+        result = await outbound_queue.send(
+            user_id, partial(request, [photo.source for photo in photos]), Priority.INTERACTIVE
+        )
+    except TelegramBadRequest:
+        stale = [photo for photo in photos if photo.file_id]
+        if not stale:
+            raise
+        for photo in stale:
+            file_id_cache.discard(photo.digest)
+            photo.file_id = None
+        result = await outbound_queue.send(
+            user_id, partial(request, [photo.source for photo in photos]), Priority.INTERACTIVE
+        )
+
+    messages = result if isinstance(result, list) else [result]
+    for photo, sent in zip(photos, messages, strict=False):
+        if photo.digest and not photo.file_id and isinstance(sent, Message) and sent.photo:
+            file_id_cache.put(photo.digest, sent.photo[-1].file_id)
+
+
 async def _send_images_with_message(
-    bot, user_id: int, image_urls: list, message: str | None, reply_markup
+    bot, user_id: int, photos: list[_Photo], message: str | None, reply_markup
 ):
-    """Send images with optional message caption and reply markup."""
-    for i, image_url in enumerate(image_urls):
+    """Send images as albums with optional message caption and reply markup.
+
+    Images are grouped into albums of up to 10 (one API call each) with the
+    caption on the first item. Albums cannot carry inline keyboards, so the
+    reply markup goes on a trailing single photo or a short trailing message.
+    Images uploaded before are sent by their cached file ID.
+    """
+    chunks = [photos[i : i + MEDIA_GROUP_SIZE] for i in range(0, len(photos), MEDIA_GROUP_SIZE)]
+
+    for i, chunk in enumerate(chunks):
         # Only add caption to the first image
         caption = message if i == 0 and message else None
-        # Only add reply markup to the last image
-        markup = reply_markup if i == len(image_urls) - 1 else None
-
-        # Check if it's a base64 data URL
-        base64_result = parse_base64_image(image_url)
-        if base64_result:
-            image_bytes, filename = base64_result
-            photo = BufferedInputFile(image_bytes, filename=filename)
-            await bot.send_photo(
-                chat_id=user_id,
-                photo=photo,
-                caption=caption,
-                parse_mode="HTML" if caption else None,
-                reply_markup=markup,
+        is_last = i == len(chunks) - 1
+
+        if len(chunk) == 1:
+            markup = reply_markup if is_last else None
+            await _send_photos(
+                user_id, chunk, partial(_photo_request, bot, user_id, caption, markup)
             )
-        else:
-            # It's a regular URL (e.g., Telegram file URL)
-            await bot.send_photo(
+            if is_last:
+                return
+            continue
+
+        await _send_photos(user_id, chunk, partial(_album_request, bot, user_id, caption))
+
+    if reply_markup:
+        await outbound_queue.send(
+            user_id,
+            partial(
+                bot.send_message,
                 chat_id=user_id,
-                photo=image_url,
-                caption=caption,
-                parse_mode="HTML" if caption else None,
-                reply_markup=markup,
-            )
+                text=get_text("chat_support_actions", user_id),
+                reply_markup=reply_markup,
+            ),
+            Priority.INTERACTIVE,
+        )
@@ -2,7 +2,39 @@
 
 from aiohttp import web
 
+from core.file_cache import file_id_cache
+from core.media_cache import media_cache
+from core.metrics import file_id_cache_hit_rate, media_cache_hit_rate, outbound_wait_seconds
+from core.outbound import Priority, outbound_queue
+
+from ..admission import admission_control
+
 
 async def handle_health(_request: web.Request) -> web.Response:
     """Health check endpoint."""
-    return web.json_response({"status": "ok"})
+    return web.json_response(
+        {
+            "status": "ok",
+            "admission": {
+                "inFlight": admission_control.in_flight,
+                "queued": admission_control.queued,
+                "saturation": round(admission_control.saturation, 4),
+            },
+            "outbound": {
+                "queueDepth": outbound_queue.depth,
+                "meanWaitSeconds": {
+                    lane.name.lower(): round(outbound_wait_seconds.mean(lane=lane.name.lower()), 4)
+                    for lane in Priority
+                },
+            },
+            "fileIdCache": {
+                "entries": len(file_id_cache),
+                "hitRate": round(file_id_cache_hit_rate(), 4),
+            },
+            "mediaCache": {
+                "entries": len(media_cache),
+                "bytes": media_cache.size,
+                "hitRate": round(media_cache_hit_rate(), 4),
+            },
+        }
+    )
@@ -1,39 +1,215 @@
 """Helper utilities for webhook handlers."""
 
+import asyncio
 import base64
+import binascii
 import logging
+import struct
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+
+from core.config import (
+    IMAGE_CHECK_DIMENSIONS,
+    IMAGE_DECODE_OFFLOAD_THRESHOLD,
+    IMAGE_DECODE_WORKERS,
+    UPLOAD_MAX_IMAGE_SIZE,
+)
+from core.file_cache import content_hash
 
 logger = logging.getLogger(__name__)
 
+# Telegram photo limits: width + height and aspect ratio
+MAX_PHOTO_DIMENSIONS_SUM = 10000
+MAX_PHOTO_ASPECT_RATIO = 20
 
-def parse_base64_image(data_url: str) -> tuple[bytes, str] | None:
-    """Parse a base64 data URL and return (bytes, filename) or None if invalid."""
-    try:
-        # Check if it's a data URL
-        if not data_url.startswith("data:"):
+# Base64 characters decoded per step (a multiple of 4). Decoding in steps lets
+# the event loop thread take the GIL between steps when decoding off-loop.
+DECODE_STEP = 256 * 1024
+
+# Bytes read from the start of an image to detect its type and dimensions
+IMAGE_HEADER_SIZE = 64 * 1024
+
+# File extensions of supported image types
+IMAGE_EXTENSIONS = {
+    "image/png": "png",
+    "image/jpeg": "jpg",
+    "image/gif": "gif",
+    "image/webp": "webp",
+}
+
+_decode_executor = ThreadPoolExecutor(
+    max_workers=IMAGE_DECODE_WORKERS, thread_name_prefix="image-decode"
+)
+
+
+class ImageError(ValueError):
+    """Raised when an image is malformed, unsupported or too large."""
+
+
+@dataclass
+class DecodedImage:
+    """Decoded and validated image."""
+
+    data: bytes
+    mime_type: str
+    digest: str
+    width: int | None = None
+    height: int | None = None
+
+    @property
+    def filename(self) -> str:
+        return f"image.{IMAGE_EXTENSIONS[self.mime_type]}"
+
+
+def sniff_image_type(data: bytes) -> str | None:
+    """Detect the image MIME type from magic bytes."""
+    if data.startswith(b"\x89PNG\r\n\x1a\n"):
+        return "image/png"
+    if data.startswith(b"\xff\xd8\xff"):
+        return "image/jpeg"
+    if data.startswith((b"GIF87a", b"GIF89a")):
+        return "image/gif"
+    if data[:4] == b"RIFF" and data[8:12] == b"WEBP":
+        return "image/webp"
+    return None
+
+
+def _jpeg_dimensions(data: bytes) -> tuple[int, int] | None:
+    i = 2
+    while i + 9 < len(data):
+        if data[i] != 0xFF:
             return None
+        marker = data[i + 1]
+        if marker == 0xFF:  # Fill byte
+            i += 1
+            continue
+        if marker in (0x01, *range(0xD0, 0xDA)):  # Markers without a length
+            i += 2
+            continue
+        if 0xC0 <= marker <= 0xCF and marker not in (0xC4, 0xC8, 0xCC):
+            height, width = struct.unpack(">HH", data[i + 5 : i + 9])
+            return width, height
+        i += 2 + struct.unpack(">H", data[i + 2 : i + 4])[0]
+    return None
+
+
+def _webp_dimensions(data: bytes) -> tuple[int, int] | None:
+    chunk = data[12:16]
+    if chunk == b"VP8 " and len(data) >= 30:
+        width, height = struct.unpack("<HH", data[26:30])
+        return width & 0x3FFF, height & 0x3FFF
+    if chunk == b"VP8L" and len(data) >= 25:
+        b0, b1, b2, b3 = data[21:25]
+        width = 1 + (((b1 & 0x3F) << 8) | b0)
+        height = 1 + (((b3 & 0x0F) << 10) | (b2 << 2) | ((b1 & 0xC0) >> 6))
+        return width, height
+    if chunk == b"VP8X" and len(data) >= 30:
+        width = 1 + int.from_bytes(data[24:27], "little")
+        height = 1 + int.from_bytes(data[27:30], "little")
+        return width, height
+    return None
+
+
+def image_dimensions(data: bytes, mime_type: str) -> tuple[int, int] | None:
+    """Read image dimensions from the file header without decoding pixels.
+
+    ``data`` only needs to contain the beginning of the file.
+    """
+    try:
+        if mime_type == "image/png" and len(data) >= 24:
+            return struct.unpack(">II", data[16:24])
+        if mime_type == "image/gif" and len(data) >= 10:
+            return struct.unpack("<HH", data[6:10])
+        if mime_type == "image/jpeg":
+            return _jpeg_dimensions(data)
+        if mime_type == "image/webp":
+            return _webp_dimensions(data)
+    except struct.error:
+        pass
+    return None
+
 
-        # Parse the data URL: data:image/png;base64,xxxxx
-        header, encoded = data_url.split(",", 1)
-
-        # Extract mime type
-        mime_part = header.split(";")[0]  # data:image/png
-        mime_type = mime_part.split(":")[1] if ":" in mime_part else "image/png"
-
-        # Determine file extension
-        ext_map = {
-            "image/png": "png",
-            "image/jpeg": "jpg",
-            "image/jpg": "jpg",
-            "image/gif": "gif",
-            "image/webp": "webp",
-        }
-        ext = ext_map.get(mime_type, "png")
-
-        # Decode base64
-        image_bytes = base64.b64decode(encoded)
-
-        return image_bytes, f"image.{ext}"
-    except Exception as e:
-        logger.error(f"Failed to parse base64 image: {e}")
+def check_image(header: bytes, size: int) -> tuple[str, int | None, int | None]:
+    """Validate an image by its first bytes and total size.
+
+    Returns:
+        (sniffed MIME type, width, height); dimensions are None if unknown
+
+    Raises:
+        ImageError: If the image is unsupported, too large or has dimensions
+            Telegram rejects for photos
+    """
+    if size > UPLOAD_MAX_IMAGE_SIZE:
+        raise ImageError("Image is too large")
+
+    mime_type = sniff_image_type(header)
+    if mime_type is None:
+        raise ImageError("Unsupported image type")
+
+    dimensions = image_dimensions(header, mime_type) if IMAGE_CHECK_DIMENSIONS else None
+    if dimensions is None:
+        return mime_type, None, None
+
+    width, height = dimensions
+    if not width or not height:
+        raise ImageError("Invalid image dimensions")
+    if width + height > MAX_PHOTO_DIMENSIONS_SUM:
+        raise ImageError(f"Image dimensions {width}x{height} are too large")
+    if max(width, height) / min(width, height) > MAX_PHOTO_ASPECT_RATIO:
+        raise ImageError(f"Image aspect ratio {width}x{height} is not supported")
+    return mime_type, width, height
+
+
+def _decode_base64(encoded: str) -> bytes:
+    """Decode base64 in steps so other threads can run in between."""
+    if len(encoded) <= DECODE_STEP:
+        return base64.b64decode(encoded, validate=True)
+    return b"".join(
+        base64.b64decode(encoded[i : i + DECODE_STEP], validate=True)
+        for i in range(0, len(encoded), DECODE_STEP)
+    )
+
+
+def decode_base64_image(data_url: str) -> DecodedImage:
+    """Decode, sniff, validate and hash a base64 image data URL.
+
+    The declared MIME type of the data URL is ignored in favour of the one
+    detected from the decoded bytes.
+
+    Raises:
+        ImageError: If the data URL or the image is invalid
+    """
+    header, sep, encoded = data_url.partition(",")
+    if not sep or not header.endswith(";base64"):
+        raise ImageError("Invalid base64 image")
+
+    # Reject oversized images before decoding them (base64 is 4/3 the size)
+    if len(encoded) * 3 // 4 > UPLOAD_MAX_IMAGE_SIZE + 3:
+        raise ImageError("Image is too large")
+
+    try:
+        data = _decode_base64(encoded)
+    except (binascii.Error, ValueError) as e:
+        raise ImageError("Invalid base64 image") from e
+
+    mime_type, width, height = check_image(data[:IMAGE_HEADER_SIZE], len(data))
+    return DecodedImage(data, mime_type, content_hash(data), width, height)
+
+
+async def parse_base64_image(data_url: str) -> DecodedImage | None:
+    """Decode a base64 image data URL, or return None if it is not a data URL.
+
+    Large payloads are decoded on a bounded worker pool so the event loop
+    keeps serving other updates and requests meanwhile.
+
+    Raises:
+        ImageError: If the data URL or the image is invalid
+    """
+    if not data_url.startswith("data:"):
         return None
+
+    if len(data_url) < IMAGE_DECODE_OFFLOAD_THRESHOLD:
+        return decode_base64_image(data_url)
+
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_decode_executor, decode_base64_image, data_url)
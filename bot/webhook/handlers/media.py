@@ -0,0 +1,73 @@
+"""Customer media endpoint backed by the local disk cache."""
+
+import logging
+import re
+from collections.abc import Callable
+
+import aiohttp
+from aiogram.exceptions import TelegramAPIError, TelegramBadRequest
+from aiohttp import web
+
+from core.media_cache import media_cache
+
+from ..utils import error_response, get_bot, require_bot
+
+logger = logging.getLogger(__name__)
+
+# Telegram file IDs are URL-safe base64
+FILE_ID_PATTERN = re.compile(r"^[A-Za-z0-9_-]+$")
+
+# Files are keyed by file_unique_id, so their contents never change
+CACHE_CONTROL = "private, max-age=31536000, immutable"
+
+
+class _PinnedFileResponse(web.FileResponse):
+    """File response releasing the file's cache pin once the file is sent."""
+
+    def __init__(self, path, release: Callable[[], None], **kwargs):
+        super().__init__(path, **kwargs)
+        self._release = release
+
+    async def prepare(self, request: web.BaseRequest):
+        try:
+            return await super().prepare(request)
+        finally:
+            self._release()
+
+
+@require_bot
+async def handle_media(request: web.Request) -> web.StreamResponse:
+    """Serve a customer file, downloading it from Telegram on a cache miss.
+
+    ``variant=preview`` serves a small preview of an image when the image
+    pipeline is enabled, and the file itself otherwise. Cached files are sent
+    with sendfile; ETag, conditional and Range requests are handled by
+    ``web.FileResponse``.
+    """
+    unique_id = request.match_info["unique_id"]
+    file_id = request.query.get("id", "")
+    signature = request.query.get("sig", "")
+    preview = request.query.get("variant") == "preview"
+
+    if not (FILE_ID_PATTERN.match(unique_id) and FILE_ID_PATTERN.match(file_id)):
+        return error_response("Invalid file ID")
+    if not media_cache.verify(file_id, unique_id, signature):
+        return error_response("Invalid signature", status=403)
+
+    # Keep the file from being evicted until it has been sent
+    release = media_cache.pin(unique_id)
+    path = None
+    try:
+        fetch = media_cache.fetch_preview if preview else media_cache.fetch
+        path = await fetch(get_bot(), file_id, unique_id)
+    except TelegramBadRequest as e:
+        logger.warning(f"Media file {unique_id} not available: {e}")
+        return error_response("File not found", status=404)
+    except (TelegramAPIError, aiohttp.ClientError) as e:
+        logger.error(f"Failed to download media file {unique_id}: {e}")
+        return error_response("Failed to download file", status=502)
+    finally:
+        if path is None:
+            release()
+
+    return _PinnedFileResponse(path, release, headers={"Cache-Control": CACHE_CONTROL})
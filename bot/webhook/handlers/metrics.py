@@ -0,0 +1,12 @@
+"""Prometheus metrics handler."""
+
+from aiohttp import web
+
+from core.metrics import render_prometheus
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+async def handle_metrics(_request: web.Request) -> web.Response:
+    """Expose all bot metrics in the Prometheus text format."""
+    return web.Response(body=render_prometheus().encode(), headers={"Content-Type": CONTENT_TYPE})
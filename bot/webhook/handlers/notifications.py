@@ -1,72 +1,86 @@
 """Customer notification handlers."""
 
 import logging
-from typing import Any
+from functools import partial
 
 from aiohttp import web
 
-from locales import get_status_text, get_text
+from core.outbound import Priority, outbound_queue
+from ui.notifications import NotificationError, customer_notifications
 
-from ..utils import get_bot, handle_telegram_exception, require_bot, validate_and_load_user
+from ..coalescing import Coalescer
+from ..endpoints import webhook_batch_endpoint, webhook_endpoint
+from ..schemas import NotifyPayload
+from ..utils import (
+    error_response,
+    get_bot,
+    handle_telegram_exception,
+    validate_and_load_user,
+    validate_telegram_id,
+)
 
 logger = logging.getLogger(__name__)
 
 
-@require_bot
-async def handle_notify(request: web.Request) -> web.Response:
+def validate_notify(payload: NotifyPayload) -> web.Response | None:
+    """Validate a customer notification payload. Returns an error response or None."""
+    return validate_telegram_id(payload.telegram_id)
+
+
+async def deliver_notify(payload: NotifyPayload) -> web.Response:
     """Handle notification from CRM to send to customer (status changes, etc.)."""
-    telegram_id = None
+    telegram_id = payload.telegram_id
     try:
-        data = await request.json()
-        telegram_id = data.get("telegramId")
-        notification_type = data.get("type")
-        order_title = data.get("orderTitle", "")
-        status = data.get("status", "")
-
         user_id, error = await validate_and_load_user(telegram_id)
-        if error:
+        if error is not None:
             return error
 
-        message = _get_notification_message(notification_type, user_id, order_title, status, data)
-        if message is None:
-            from ..utils import error_response
-
-            return error_response("Missing notification type or message")
-
         bot = get_bot()
-        await bot.send_message(chat_id=user_id, text=message, parse_mode="HTML")
+        if payload.type in customer_notifications:
+            await customer_notifications.send(
+                bot, user_id, payload.type, _notification_values(payload)
+            )
+        elif payload.message:
+            # Fallback for legacy plain message format
+            await outbound_queue.send(
+                user_id,
+                partial(bot.send_message, chat_id=user_id, text=payload.message, parse_mode="HTML"),
+                Priority.NOTIFICATION,
+            )
+        else:
+            return error_response("Missing notification type or message")
 
         logger.info(f"Notification sent to {telegram_id}")
         return web.json_response({"success": True})
 
+    except NotificationError as e:
+        return error_response(str(e))
     except Exception as e:
         return handle_telegram_exception(e, telegram_id, "Failed to send notification")
 
 
-def _get_notification_message(
-    notification_type: str | None, user_id: int, order_title: str, status: str, data: dict[str, Any]
-) -> str | None:
-    """Get notification message based on type."""
-    if notification_type == "order_approved":
-        return get_text("notify_order_approved", user_id, title=order_title)
-    if notification_type == "order_rejected":
-        return get_text("notify_order_rejected", user_id, title=order_title)
-    if notification_type == "order_assigned":
-        return get_text("notify_order_assigned", user_id, title=order_title)
-    if notification_type == "order_status_changed":
-        status_text = get_status_text(status, user_id)
-        return get_text("notify_order_status", user_id, title=order_title, status=status_text)
-    if notification_type == "payment_info_received":
-        payment_method = data.get("paymentMethodName", "")
-        payment_details = data.get("paymentDetails", "")
-        total_amount = data.get("totalAmount", 0)
-        return get_text(
-            "notify_payment_info",
-            user_id,
-            title=order_title,
-            payment_method=payment_method,
-            details=payment_details,
-            amount=total_amount,
-        )
-    # Fallback for legacy plain message format
-    return data.get("message") or None
+# Successive status changes of an order collapse into one message with the latest
+# status. Titles are not unique, so only payloads carrying the order ID are merged.
+coalesce_notify = Coalescer(
+    "notify",
+    deliver_notify,
+    key=lambda payload: (payload.telegram_id, payload.order_id),
+    merge=lambda _held, payload: payload,
+    mergeable=lambda payload: payload.type == "order_status_changed" and bool(payload.order_id),
+)
+
+handle_notify = webhook_endpoint("notify", NotifyPayload, validate_notify, coalesce_notify)
+handle_notify_batch = webhook_batch_endpoint(
+    "notify", NotifyPayload, validate_notify, coalesce_notify
+)
+
+
+def _notification_values(payload: NotifyPayload) -> dict:
+    """Template values of a customer notification."""
+    return {
+        "title": payload.order_title,
+        "status": payload.status,
+        "payment_method": payload.payment_method_name,
+        "details": payload.payment_details,
+        "amount": payload.total_amount,
+    }
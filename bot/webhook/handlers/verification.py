@@ -1,34 +1,60 @@
 """Telegram verification handlers."""
 
 import logging
+from functools import partial
 
 from aiohttp import web
 
+from core.outbound import Priority, outbound_queue
 from locales import get_text
 
-from ..utils import get_bot, handle_telegram_exception, require_bot, validate_and_load_user
+from ..endpoints import webhook_endpoint
+from ..schemas import VerifyTelegramPayload
+from ..utils import (
+    get_bot,
+    handle_telegram_exception,
+    validate_and_load_user,
+    validate_telegram_id,
+)
 
 logger = logging.getLogger(__name__)
 
 
-@require_bot
-async def handle_verify_telegram(request: web.Request) -> web.Response:
+def validate_verify_telegram(payload: VerifyTelegramPayload) -> web.Response | None:
+    """Validate a verification payload. Returns an error response or None."""
+    return validate_telegram_id(payload.telegram_id)
+
+
+async def deliver_verify_telegram(payload: VerifyTelegramPayload) -> web.Response:
     """Handle Telegram verification request from CRM."""
-    telegram_id = None
+    telegram_id = payload.telegram_id
     try:
-        data = await request.json()
-        telegram_id = data.get("telegramId")
-
         user_id, error = await validate_and_load_user(telegram_id)
-        if error:
+        if error is not None:
             return error
 
         verification_message = get_text("telegram_verification", user_id)
         bot = get_bot()
-        await bot.send_message(chat_id=user_id, text=verification_message, parse_mode="HTML")
+        await outbound_queue.send(
+            user_id,
+            partial(
+                bot.send_message, chat_id=user_id, text=verification_message, parse_mode="HTML"
+            ),
+            Priority.INTERACTIVE,
+        )
 
         logger.info(f"Verification message sent to {telegram_id}")
         return web.json_response({"success": True})
 
     except Exception as e:
         return handle_telegram_exception(e, telegram_id, "Failed to send verification")
+
+
+# The CRM links the Telegram ID only if this message was actually delivered
+handle_verify_telegram = webhook_endpoint(
+    "verify_telegram",
+    VerifyTelegramPayload,
+    validate_verify_telegram,
+    deliver_verify_telegram,
+    allow_async=False,
+)
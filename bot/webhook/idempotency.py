@@ -0,0 +1,215 @@
+"""Idempotency keys for webhook requests.
+
+A CRM request that times out may be retried although the first attempt was
+delivered. Requests carrying an ``Idempotency-Key`` header (or an
+``idempotencyKey`` field in a batch item) are therefore delivered at most
+once per key:
+
+- a repeat of a completed request gets the original result back, marked
+  with an ``Idempotent-Replayed: true`` header;
+- a repeat arriving while the first attempt is still running waits for it
+  and gets the same result, without a second delivery.
+
+Results are kept for ``IDEMPOTENCY_TTL`` seconds in a bounded in-memory LRU.
+With ``IDEMPOTENCY_REDIS_URL`` set they are also stored in Redis or Dragonfly,
+so repeats reaching another bot instance are recognised too; a repeat that
+arrives there while the first attempt is still running gets 409. Transient
+failures (429, 5xx) are not stored, so they can be retried.
+
+Keys are scoped per endpoint. Payloads are not compared: reusing a key for a
+different payload replays the first result.
+"""
+
+import asyncio
+import json
+import logging
+import time
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable
+from typing import Any
+
+from aiohttp import web
+
+from core.config import IDEMPOTENCY_MAX_KEYS, IDEMPOTENCY_REDIS_URL, IDEMPOTENCY_TTL
+from core.metrics import idempotency_requests
+
+from .outbox import is_transient, response_payload
+from .utils import error_response
+
+try:
+    import redis.asyncio as aioredis
+except ImportError:
+    aioredis = None
+
+logger = logging.getLogger(__name__)
+
+IDEMPOTENCY_HEADER = "Idempotency-Key"
+REPLAYED_HEADER = "Idempotent-Replayed"
+
+# Longest accepted key
+MAX_KEY_LENGTH = 255
+
+# Redis marker of a request in progress, and how long it may stay in progress
+PENDING = "pending"
+PENDING_TTL = 60
+
+REDIS_PREFIX = "bot:idempotency:"
+
+# Headers of a result returned again to repeats
+KEPT_HEADERS = ("Retry-After",)
+
+# Status, JSON body and kept headers of a response
+Result = tuple[int, dict[str, Any], dict[str, str]]
+
+
+def response_result(response: web.Response) -> Result:
+    """Extract the parts of a response that repeats of the request get back."""
+    status, body = response_payload(response)
+    headers = {name: response.headers[name] for name in KEPT_HEADERS if name in response.headers}
+    return status, body, headers
+
+
+def is_final(status: int) -> bool:
+    """Check if a result should be returned to repeats of the request."""
+    return status != 409 and not is_transient(status)
+
+
+def build_response(result: Result, replayed: bool) -> web.Response:
+    """Rebuild the response of a stored or shared result."""
+    status, body, headers = result
+    headers = {**headers, REPLAYED_HEADER: "true"} if replayed else dict(headers)
+    return web.json_response(body, status=status, headers=headers)
+
+
+class IdempotencyStore:
+    """Stores results of idempotent requests and coalesces concurrent repeats."""
+
+    def __init__(
+        self,
+        ttl: float = IDEMPOTENCY_TTL,
+        max_keys: int = IDEMPOTENCY_MAX_KEYS,
+        redis_url: str = IDEMPOTENCY_REDIS_URL,
+    ):
+        self.ttl = ttl
+        self.max_keys = max_keys
+        self.redis_url = redis_url
+        # key -> (result, monotonic expiry), oldest first
+        self._results: OrderedDict[str, tuple[Result, float]] = OrderedDict()
+        self._pending: dict[str, asyncio.Future] = {}
+        self._redis = None
+
+    async def start(self) -> None:
+        """Connect to the shared store, if configured."""
+        if not self.redis_url:
+            return
+        if aioredis is None:
+            logger.warning("IDEMPOTENCY_REDIS_URL is set but the redis package is not installed")
+            return
+        self._redis = aioredis.from_url(self.redis_url, decode_responses=True)
+
+    async def stop(self) -> None:
+        if self._redis is not None:
+            await self._redis.aclose()
+            self._redis = None
+
+    def _cached(self, key: str) -> Result | None:
+        entry = self._results.get(key)
+        if entry is None:
+            return None
+        result, expires = entry
+        if expires <= time.monotonic():
+            del self._results[key]
+            return None
+        return result
+
+    def _store(self, key: str, result: Result) -> None:
+        # Entries share one TTL, so insertion order is expiry order
+        self._results.pop(key, None)
+        self._results[key] = (result, time.monotonic() + self.ttl)
+        now = time.monotonic()
+        while self._results and (
+            len(self._results) > self.max_keys or next(iter(self._results.values()))[1] <= now
+        ):
+            self._results.popitem(last=False)
+
+    async def _claim(self, key: str) -> Result | str | None:
+        """Claim a key in the shared store.
+
+        Returns None if claimed, the stored result of a completed request, or
+        ``PENDING`` if another instance is running it.
+        """
+        try:
+            if await self._redis.set(REDIS_PREFIX + key, PENDING, nx=True, ex=PENDING_TTL):
+                return None
+            stored = await self._redis.get(REDIS_PREFIX + key)
+        except Exception as e:
+            logger.error(f"Idempotency store unavailable: {e}")
+            return None
+        if stored is None or stored == PENDING:
+            return PENDING if stored else None
+        status, body, *headers = json.loads(stored)
+        return status, body, headers[0] if headers else {}
+
+    async def _release(self, key: str, result: Result) -> None:
+        try:
+            if is_final(result[0]):
+                await self._redis.set(REDIS_PREFIX + key, json.dumps(result), ex=int(self.ttl))
+            else:
+                await self._redis.delete(REDIS_PREFIX + key)
+        except Exception as e:
+            logger.error(f"Failed to store idempotent result: {e}")
+
+    async def _execute(self, key: str, run: Callable[[], Awaitable[web.Response]]) -> Result:
+        if self._redis is not None:
+            claimed = await self._claim(key)
+            if claimed == PENDING:
+                idempotency_requests.inc(result="conflict")
+                response = error_response("Request with this key is in progress", status=409)
+                response.headers["Retry-After"] = "1"
+                return response_result(response)
+            if claimed is not None:
+                idempotency_requests.inc(result="replayed")
+                self._store(key, claimed)
+                return claimed
+
+        idempotency_requests.inc(result="new")
+        try:
+            result = response_result(await run())
+        except Exception as e:
+            result = response_result(error_response(str(e), status=500))
+            logger.error(f"Idempotent request {key} failed: {e}")
+        if is_final(result[0]):
+            self._store(key, result)
+        if self._redis is not None:
+            await self._release(key, result)
+        return result
+
+    async def run(self, key: str, run: Callable[[], Awaitable[web.Response]]) -> web.Response:
+        """Run a request once per key and return its (possibly replayed) response."""
+        result = self._cached(key)
+        if result is not None:
+            idempotency_requests.inc(result="replayed")
+            return build_response(result, replayed=True)
+
+        pending = self._pending.get(key)
+        if pending is not None:
+            idempotency_requests.inc(result="coalesced")
+            return build_response(await asyncio.shield(pending), replayed=True)
+
+        future = asyncio.ensure_future(self._execute(key, run))
+        self._pending[key] = future
+        future.add_done_callback(lambda _: self._pending.pop(key, None))
+        return build_response(await asyncio.shield(future), replayed=False)
+
+
+def idempotency_key(request: web.Request | None, payload_key: str | None) -> str | None:
+    """Get the idempotency key of a request: the header, else the payload field."""
+    key = request.headers.get(IDEMPOTENCY_HEADER) if request is not None else None
+    key = key or payload_key
+    if not key or len(key) > MAX_KEY_LENGTH:
+        return None
+    return key
+
+
+# Global idempotency store instance
+idempotency_store = IdempotencyStore()
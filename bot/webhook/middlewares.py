@@ -0,0 +1,62 @@
+"""aiohttp middlewares of the webhook server."""
+
+import logging
+import time
+from collections.abc import Awaitable, Callable
+
+from aiohttp import web
+
+from core.config import WEBHOOK_MAX_BODY_SIZE
+from core.metrics import webhook_request_seconds, webhook_requests
+
+from .admission import AdmissionRejected, admission_control, declared_size
+from .utils import error_response
+
+logger = logging.getLogger(__name__)
+
+Handler = Callable[[web.Request], Awaitable[web.StreamResponse]]
+
+
+@web.middleware
+async def metrics_middleware(request: web.Request, handler: Handler) -> web.StreamResponse:
+    """Count requests and time them by route pattern (not by URL, to bound labels)."""
+    resource = request.match_info.route.resource
+    route = resource.canonical if resource is not None else "unmatched"
+    started = time.perf_counter()
+    status = 500
+    try:
+        response = await handler(request)
+        status = response.status
+        return response
+    except web.HTTPException as e:
+        status = e.status
+        raise
+    finally:
+        webhook_request_seconds.observe(time.perf_counter() - started, route=route)
+        webhook_requests.inc(route=route, method=request.method, status=str(status))
+
+
+@web.middleware
+async def admission_middleware(request: web.Request, handler: Handler) -> web.StreamResponse:
+    """Admit CRM requests (POST) within the in-flight limits; 429 when saturated."""
+    if request.method != "POST" or not admission_control.enabled:
+        return await handler(request)
+
+    # Reject oversized bodies before they take a place in the queue
+    if request.content_length is not None and request.content_length > WEBHOOK_MAX_BODY_SIZE:
+        return error_response("Request body too large", status=413)
+
+    size = declared_size(request.content_length)
+    try:
+        await admission_control.acquire(size)
+    except AdmissionRejected as e:
+        logger.warning(f"Rejected {request.path}: server saturated ({e.reason})")
+        response = error_response("Server busy", "SERVER_BUSY", status=429)
+        response.headers["Retry-After"] = str(e.retry_after)
+        return response
+
+    started = time.perf_counter()
+    try:
+        return await handler(request)
+    finally:
+        await admission_control.release(size, time.perf_counter() - started)
@@ -0,0 +1,318 @@
+"""Durable local outbox for asynchronous webhook deliveries.
+
+In asynchronous mode a webhook request is validated, stored in a SQLite
+database (WAL mode) and answered with 202 and a delivery ID right away. A
+background worker delivers queued payloads through the regular endpoint
+delivery functions, retries transient failures with backoff (but not before
+Telegram's ``retry_after``) and optionally reports the outcome to the
+configured callback URL (``OUTBOX_CALLBACK_URL``; never one named by the
+caller, as the webhook server is unauthenticated).
+
+All SQLite access runs on a single worker thread so the event loop never
+blocks on disk I/O.
+"""
+
+import asyncio
+import json
+import logging
+import sqlite3
+import time
+import uuid
+from collections.abc import Awaitable, Callable
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any
+
+import aiohttp
+import msgspec
+from aiogram.exceptions import TelegramRetryAfter
+from aiohttp import web
+
+from core.config import (
+    OUTBOX_CALLBACK_URL,
+    OUTBOX_CONCURRENCY,
+    OUTBOX_MAX_ATTEMPTS,
+    OUTBOX_PATH,
+    OUTBOX_RETENTION_HOURS,
+)
+
+from .schemas import WebhookPayload, encode_payload, payload_decoder
+
+logger = logging.getLogger(__name__)
+
+STATUS_QUEUED = "queued"
+STATUS_DELIVERING = "delivering"
+STATUS_DELIVERED = "delivered"
+STATUS_FAILED = "failed"
+
+# Seconds between polls for due retries when no new delivery arrives
+POLL_INTERVAL = 1.0
+
+# Base delay for retry backoff (doubles per attempt)
+RETRY_BASE_DELAY = 2.0
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS deliveries (
+    id TEXT PRIMARY KEY,
+    endpoint TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    status TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    result TEXT,
+    next_attempt_at REAL NOT NULL,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS deliveries_due ON deliveries (status, next_attempt_at);
+"""
+
+Deliverer = Callable[[WebhookPayload], Awaitable[web.Response]]
+
+
+def response_payload(response: web.Response) -> tuple[int, dict[str, Any]]:
+    """Extract status and JSON body from a handler response."""
+    try:
+        body = json.loads(response.text) if response.text else {}
+    except ValueError:
+        body = {"raw": response.text}
+    return response.status, body
+
+
+def is_transient(status: int) -> bool:
+    """Check if a failed delivery should be retried."""
+    return status == 429 or status >= 500
+
+
+def retry_delay(attempts: int, retry_after: float | None = None) -> float:
+    """Seconds until the next attempt: exponential backoff, but not before Retry-After."""
+    backoff = RETRY_BASE_DELAY * 2 ** (attempts - 1)
+    return max(backoff, retry_after) if retry_after else backoff
+
+
+class Outbox:
+    """SQLite-backed outbox with a background delivery worker."""
+
+    def __init__(
+        self,
+        path: str = OUTBOX_PATH,
+        concurrency: int = OUTBOX_CONCURRENCY,
+        max_attempts: int = OUTBOX_MAX_ATTEMPTS,
+        callback_url: str = OUTBOX_CALLBACK_URL,
+    ):
+        self.path = path
+        self.concurrency = concurrency
+        self.max_attempts = max_attempts
+        self.callback_url = callback_url
+        self._deliverers: dict[str, tuple[Deliverer, msgspec.json.Decoder]] = {}
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="outbox")
+        self._conn: sqlite3.Connection | None = None
+        self._wakeup = asyncio.Event()
+        self._worker: asyncio.Task | None = None
+        self._running: set[asyncio.Task] = set()
+        self._session: aiohttp.ClientSession | None = None
+
+    def register(self, endpoint: str, deliverer: Deliverer, schema: type[WebhookPayload]) -> None:
+        """Register the delivery function and payload type of an endpoint."""
+        self._deliverers[endpoint] = (deliverer, payload_decoder(schema))
+
+    async def _db(self, fn: Callable[..., Any], *args: Any) -> Any:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, fn, *args)
+
+    # Synchronous database operations (run on the outbox thread)
+
+    def _open(self) -> None:
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+        # Deliveries interrupted by a restart are queued again
+        self._conn.execute(
+            "UPDATE deliveries SET status = ? WHERE status = ?",
+            (STATUS_QUEUED, STATUS_DELIVERING),
+        )
+        self._conn.commit()
+
+    def _insert(self, delivery_id: str, endpoint: str, payload: str):
+        now = time.time()
+        self._conn.execute(
+            "INSERT INTO deliveries (id, endpoint, payload, status, "
+            "next_attempt_at, created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (delivery_id, endpoint, payload, STATUS_QUEUED, now, now, now),
+        )
+        self._conn.commit()
+
+    def _claim(self, limit: int) -> list[sqlite3.Row]:
+        now = time.time()
+        rows = self._conn.execute(
+            "SELECT * FROM deliveries WHERE status = ? AND next_attempt_at <= ? "
+            "ORDER BY next_attempt_at LIMIT ?",
+            (STATUS_QUEUED, now, limit),
+        ).fetchall()
+        if rows:
+            self._conn.executemany(
+                "UPDATE deliveries SET status = ?, updated_at = ? WHERE id = ?",
+                [(STATUS_DELIVERING, now, row["id"]) for row in rows],
+            )
+            self._conn.commit()
+        return rows
+
+    def _finish(self, delivery_id: str, status: str, attempts: int, result: str, retry_at: float):
+        self._conn.execute(
+            "UPDATE deliveries SET status = ?, attempts = ?, result = ?, next_attempt_at = ?, "
+            "updated_at = ? WHERE id = ?",
+            (status, attempts, result, retry_at, time.time(), delivery_id),
+        )
+        self._conn.commit()
+
+    def _get(self, delivery_id: str) -> sqlite3.Row | None:
+        return self._conn.execute(
+            "SELECT id, endpoint, status, attempts, result, created_at, updated_at "
+            "FROM deliveries WHERE id = ?",
+            (delivery_id,),
+        ).fetchone()
+
+    def _purge(self, older_than: float) -> int:
+        cursor = self._conn.execute(
+            "DELETE FROM deliveries WHERE status IN (?, ?) AND updated_at < ?",
+            (STATUS_DELIVERED, STATUS_FAILED, older_than),
+        )
+        self._conn.commit()
+        return cursor.rowcount
+
+    # Async API
+
+    async def start(self) -> None:
+        """Open the database and start the delivery worker."""
+        if self._conn is None:
+            await self._db(self._open)
+        if self._worker is None or self._worker.done():
+            self._worker = asyncio.create_task(self._run())
+        logger.info(f"Webhook outbox started ({self.path})")
+
+    async def stop(self) -> None:
+        """Stop the worker and close the database."""
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+        # Interrupted deliveries are queued again on the next start
+        for task in list(self._running):
+            task.cancel()
+        if self._session and not self._session.closed:
+            await self._session.close()
+        if self._conn is not None:
+            await self._db(self._conn.close)
+            self._conn = None
+        self._executor.shutdown(wait=False)
+
+    async def enqueue(self, endpoint: str, payload: WebhookPayload) -> str:
+        """Store a payload for background delivery and return its delivery ID."""
+        delivery_id = uuid.uuid4().hex
+        await self._db(self._insert, delivery_id, endpoint, encode_payload(payload).decode())
+        self._wakeup.set()
+        return delivery_id
+
+    async def status(self, delivery_id: str) -> dict[str, Any] | None:
+        """Get the delivery status as a JSON-serializable dict."""
+        row = await self._db(self._get, delivery_id)
+        if row is None:
+            return None
+        return {
+            "deliveryId": row["id"],
+            "endpoint": row["endpoint"],
+            "status": row["status"],
+            "attempts": row["attempts"],
+            "result": json.loads(row["result"]) if row["result"] else None,
+            "createdAt": row["created_at"],
+            "updatedAt": row["updated_at"],
+        }
+
+    async def _run(self) -> None:
+        last_purge = 0.0
+
+        while True:
+            try:
+                free = self.concurrency - len(self._running)
+                rows = await self._db(self._claim, free) if free > 0 else []
+                for row in rows:
+                    task = asyncio.create_task(self._deliver(row))
+                    self._running.add(task)
+                    task.add_done_callback(self._running.discard)
+
+                if time.monotonic() - last_purge > 3600:
+                    last_purge = time.monotonic()
+                    await self._db(self._purge, time.time() - OUTBOX_RETENTION_HOURS * 3600)
+            except Exception as e:
+                logger.error(f"Outbox worker error: {e}")
+
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=POLL_INTERVAL)
+            except TimeoutError:
+                pass
+
+    async def _deliver(self, row: sqlite3.Row) -> None:
+        attempts = row["attempts"] + 1
+        registered = self._deliverers.get(row["endpoint"])
+        retry_after = None
+        if registered is None:
+            status_code, body = 500, {"success": False, "error": "Unknown endpoint"}
+        else:
+            deliverer, decoder = registered
+            try:
+                response = await deliverer(decoder.decode(row["payload"]))
+                status_code, body = response_payload(response)
+                if "Retry-After" in response.headers:
+                    retry_after = float(response.headers["Retry-After"])
+            except TelegramRetryAfter as e:
+                status_code, body = 429, {"success": False, "error": str(e)}
+                retry_after = e.retry_after
+            except msgspec.DecodeError as e:
+                status_code, body = 400, {"success": False, "error": f"Invalid payload: {e}"}
+            except Exception as e:
+                logger.error(f"Outbox delivery {row['id']} crashed: {e}")
+                status_code, body = 500, {"success": False, "error": str(e)}
+
+        result = {"status": status_code, "body": body}
+        if status_code < 300:
+            status = STATUS_DELIVERED
+        elif is_transient(status_code) and attempts < self.max_attempts:
+            status = STATUS_QUEUED
+        else:
+            status = STATUS_FAILED
+
+        # Flood-limited chats are not retried before Telegram allows it
+        retry_at = time.time() + retry_delay(attempts, retry_after)
+        await self._db(self._finish, row["id"], status, attempts, json.dumps(result), retry_at)
+
+        if status != STATUS_QUEUED and self.callback_url:
+            await self._report(self.callback_url, row["id"], row["endpoint"], status, result)
+
+    async def _report(
+        self, url: str, delivery_id: str, endpoint: str, status: str, result: dict[str, Any]
+    ) -> None:
+        """Report the final delivery outcome to the callback URL."""
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=10))
+        try:
+            async with self._session.post(
+                url,
+                json={
+                    "deliveryId": delivery_id,
+                    "endpoint": endpoint,
+                    "status": status,
+                    "result": result,
+                },
+            ) as response:
+                if response.status >= 400:
+                    logger.warning(f"Outbox callback for {delivery_id} got {response.status}")
+        except Exception as e:
+            logger.warning(f"Outbox callback for {delivery_id} failed: {e}")
+
+
+# Global outbox instance
+outbox = Outbox()
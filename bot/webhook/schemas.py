@@ -0,0 +1,74 @@
+"""Typed payloads of the CRM-facing webhook routes.
+
+Request bodies are decoded straight from bytes into these structs by
+precompiled msgspec decoders, which check types and required fields while
+parsing. Malformed payloads are rejected before any language lookup or
+Telegram call; value checks that need no I/O (Telegram ID format, "message or
+image") stay in each route's validation function.
+
+Field names are camelCase on the wire, as sent by the CRM. Unknown fields are
+ignored.
+"""
+
+from typing import Any
+
+import msgspec
+
+
+class WebhookPayload(msgspec.Struct, rename="camel", kw_only=True):
+    """Fields shared by every webhook payload."""
+
+    telegram_id: str
+    # Batch items: per-item idempotency key (single requests use the header)
+    idempotency_key: str | None = None
+
+
+class SendMessagePayload(WebhookPayload):
+    """Support message to a customer (/send-message)."""
+
+    message: str | None = None
+    order_title: str | None = None
+    order_id: str | None = None
+    image_urls: list[str] = msgspec.field(default_factory=list)
+
+
+class NotifyPayload(WebhookPayload):
+    """Customer notification (/notify)."""
+
+    type: str | None = None
+    order_title: str | None = None
+    order_id: str | None = None
+    status: str | None = None
+    # Legacy plain message format
+    message: str | None = None
+    payment_method_name: str | None = None
+    payment_details: str | None = None
+    total_amount: int | float | str = 0
+
+
+class NotifyStaffPayload(WebhookPayload):
+    """Staff notification (/notify-staff)."""
+
+    type: str | None = None
+    order_title: str | None = None
+    order_id: str | None = None
+    responder_username: str | None = None
+
+
+class VerifyTelegramPayload(WebhookPayload):
+    """Telegram account verification (/verify-telegram)."""
+
+
+def payload_decoder(schema: type[WebhookPayload]) -> msgspec.json.Decoder:
+    """Precompiled JSON decoder of a payload type."""
+    return msgspec.json.Decoder(schema)
+
+
+def convert_payload(data: dict[str, Any], schema: type[WebhookPayload]) -> WebhookPayload:
+    """Validate already parsed fields (batch items, multipart fields) into a payload."""
+    return msgspec.convert(data, schema)
+
+
+def encode_payload(payload: WebhookPayload) -> bytes:
+    """Encode a payload as JSON, with the CRM's field names."""
+    return msgspec.json.encode(payload)
@@ -2,13 +2,33 @@
 
 import logging
 
+from aiogram.utils.token import TokenValidationError, extract_bot_id
 from aiohttp import web
 
-from .handlers.customer import handle_send_message
+from core.config import BOT_TOKEN, WEBHOOK_MAX_BODY_SIZE
+from core.file_cache import file_id_cache
+from core.media_cache import media_cache
+
+from .coalescing import flush_coalescers
+from .endpoints import (
+    handle_delivery_status,
+    start_idempotency_store,
+    start_outbox,
+    stop_idempotency_store,
+    stop_outbox,
+)
+from .handlers.customer import (
+    handle_send_message,
+    handle_send_message_batch,
+    handle_send_message_upload,
+)
 from .handlers.health import handle_health
-from .handlers.notifications import handle_notify
-from .handlers.staff import handle_notify_staff
+from .handlers.media import handle_media
+from .handlers.metrics import handle_metrics
+from .handlers.notifications import handle_notify, handle_notify_batch
+from .handlers.staff import handle_notify_staff, handle_notify_staff_batch
 from .handlers.verification import handle_verify_telegram
+from .middlewares import admission_middleware, metrics_middleware
 from .utils import set_bot
 
 logger = logging.getLogger(__name__)
@@ -16,25 +36,97 @@ logger = logging.getLogger(__name__)
 
 def create_app() -> web.Application:
     """Create the webhook server application."""
-    app = web.Application()
+    app = web.Application(
+        client_max_size=WEBHOOK_MAX_BODY_SIZE,
+        middlewares=[metrics_middleware, admission_middleware],
+    )
     app.router.add_post("/send-message", handle_send_message)
+    app.router.add_post("/send-message/upload", handle_send_message_upload)
+    app.router.add_post("/send-message-batch", handle_send_message_batch)
     app.router.add_post("/notify", handle_notify)
+    app.router.add_post("/notify-batch", handle_notify_batch)
     app.router.add_post("/verify-telegram", handle_verify_telegram)
     app.router.add_post("/notify-staff", handle_notify_staff)
+    app.router.add_post("/notify-staff-batch", handle_notify_staff_batch)
+    app.router.add_get("/deliveries/{delivery_id}", handle_delivery_status)
     app.router.add_get("/health", handle_health)
+    app.router.add_get("/metrics", handle_metrics)
+    app.on_startup.append(start_outbox)
+    app.on_cleanup.append(stop_outbox)
+    app.on_shutdown.append(flush_coalescers)
+    app.on_startup.append(start_idempotency_store)
+    app.on_cleanup.append(stop_idempotency_store)
+    app.on_startup.append(load_file_id_cache)
+    app.on_cleanup.append(save_file_id_cache)
     return app
 
 
-async def start_webhook_server(host: str = "0.0.0.0", port: int = 8081):
-    """Start the webhook server."""
-    app = create_app()
+def create_media_app() -> web.Application:
+    """Create the customer media application (cache mode).
+
+    It runs on its own port, so CRM users can be given access to /media without
+    reaching the unauthenticated webhook endpoints and /metrics.
+    """
+    app = web.Application(middlewares=[metrics_middleware])
+    app.router.add_get("/media/{unique_id}", handle_media)
+    app.on_startup.append(load_media_cache)
+    return app
+
+
+def _bot_id() -> int | None:
+    """ID of the bot owning cached file IDs."""
+    try:
+        return extract_bot_id(BOT_TOKEN)
+    except TokenValidationError:
+        return None
+
+
+async def load_file_id_cache(_app: web.Application) -> None:
+    """Restore cached file IDs of uploaded images."""
+    bot_id = _bot_id()
+    if bot_id is not None:
+        file_id_cache.load(bot_id)
+
+
+async def save_file_id_cache(_app: web.Application) -> None:
+    """Persist cached file IDs of uploaded images."""
+    bot_id = _bot_id()
+    if bot_id is not None:
+        file_id_cache.save(bot_id)
+
+
+async def load_media_cache(_app: web.Application) -> None:
+    """Index customer media cached on disk."""
+    media_cache.load()
+
+
+async def _start_server(app: web.Application, host: str, port: int) -> web.AppRunner:
     runner = web.AppRunner(app)
     await runner.setup()
     site = web.TCPSite(runner, host, port)
     await site.start()
+    return runner
+
+
+async def start_webhook_server(host: str = "0.0.0.0", port: int = 8081):
+    """Start the webhook server."""
+    runner = await _start_server(create_app(), host, port)
     logger.info(f"Webhook server started on {host}:{port}")
     return runner
 
 
+async def start_media_server(host: str = "0.0.0.0", port: int = 8082):
+    """Start the customer media server."""
+    runner = await _start_server(create_media_app(), host, port)
+    logger.info(f"Media server started on {host}:{port}")
+    return runner
+
+
 # Re-export set_bot for convenience
-__all__ = ["create_app", "set_bot", "start_webhook_server"]
+__all__ = [
+    "create_app",
+    "create_media_app",
+    "set_bot",
+    "start_media_server",
+    "start_webhook_server",
+]
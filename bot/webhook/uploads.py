@@ -0,0 +1,195 @@
+"""Streaming multipart uploads from the CRM.
+
+Multipart requests carry images as binary parts instead of base64 data URLs
+inside a JSON body. Each part is streamed in chunks into a spooled temporary
+file (kept in memory while small, moved to disk when large) and hashed on the
+way, so no full copy of the body or of an image is built in memory; writes to
+a file moved to disk run in a thread. Size limits are checked against
+``Content-Length`` before anything is read and again while streaming, counting
+every part.
+"""
+
+import asyncio
+import hashlib
+import logging
+from collections.abc import AsyncGenerator
+from dataclasses import dataclass
+from tempfile import SpooledTemporaryFile
+from typing import Any
+
+from aiogram.types import InputFile
+from aiogram.types.input_file import DEFAULT_CHUNK_SIZE
+from aiohttp import BodyPartReader, web
+
+from core.config import UPLOAD_MAX_IMAGE_SIZE, UPLOAD_MAX_IMAGES, WEBHOOK_MAX_BODY_SIZE
+
+from .handlers.helpers import IMAGE_EXTENSIONS, IMAGE_HEADER_SIZE, ImageError, check_image
+from .utils import error_response
+
+logger = logging.getLogger(__name__)
+
+# Images up to this size stay in memory; larger ones are spooled to disk
+SPOOL_THRESHOLD = 1024 * 1024
+
+# Maximum size of a text field (telegramId, message, ...)
+MAX_FIELD_SIZE = 64 * 1024
+
+# Text fields accepted alongside the images
+TEXT_FIELDS = ("telegramId", "message", "orderTitle", "orderId")
+
+
+class SpooledInputFile(InputFile):
+    """Telegram upload streamed from a spooled temporary file."""
+
+    def __init__(
+        self, file: SpooledTemporaryFile, filename: str, chunk_size: int = DEFAULT_CHUNK_SIZE
+    ):
+        super().__init__(filename=filename, chunk_size=chunk_size)
+        self.file = file
+
+    async def read(self, bot) -> AsyncGenerator[bytes, None]:  # noqa: ARG002
+        # Rewind so the upload can be repeated (e.g. after flood control)
+        self.file.seek(0)
+        while chunk := self.file.read(self.chunk_size):
+            yield chunk
+
+    def close(self) -> None:
+        self.file.close()
+
+
+@dataclass
+class ReceivedImage:
+    """Image part received from a multipart request."""
+
+    file: SpooledInputFile
+    digest: str
+    size: int
+
+
+class UploadError(Exception):
+    """Raised when a multipart request is malformed or too large."""
+
+    def __init__(self, response: web.Response):
+        super().__init__(response.text)
+        self.response = response
+
+
+class _BodySize:
+    """Bytes of all parts received so far, checked against the body size limit."""
+
+    def __init__(self):
+        self.received = 0
+
+    def add(self, size: int) -> None:
+        self.received += size
+        if self.received > WEBHOOK_MAX_BODY_SIZE:
+            raise UploadError(error_response("Request body is too large", status=413))
+
+
+async def _read_field(part: BodyPartReader, body: _BodySize) -> str:
+    """Read a text field, refusing oversized values."""
+    data = bytearray()
+    while chunk := await part.read_chunk():
+        body.add(len(chunk))
+        data.extend(chunk)
+        if len(data) > MAX_FIELD_SIZE:
+            raise UploadError(error_response(f"Field {part.name} is too large", status=413))
+    return data.decode(part.get_charset(default="utf-8"))
+
+
+async def _skip_part(part: BodyPartReader, body: _BodySize) -> None:
+    """Read and discard an unknown part."""
+    while chunk := await part.read_chunk():
+        body.add(len(chunk))
+
+
+async def _read_image(part: BodyPartReader, body: _BodySize) -> ReceivedImage:
+    """Stream an image part into a spooled file while hashing it.
+
+    The image type is sniffed from the content; the part's declared content
+    type is not trusted.
+    """
+    spool = SpooledTemporaryFile(max_size=SPOOL_THRESHOLD)  # noqa: SIM115
+    digest = hashlib.sha256()
+    size = 0
+    try:
+        while chunk := await part.read_chunk():
+            size += len(chunk)
+            body.add(len(chunk))
+            if size > UPLOAD_MAX_IMAGE_SIZE:
+                raise UploadError(error_response("Image is too large", status=413))
+            digest.update(chunk)
+            if size > SPOOL_THRESHOLD:
+                # The spool is (or is about to be) moved to disk
+                await asyncio.to_thread(spool.write, chunk)
+            else:
+                spool.write(chunk)
+    except BaseException:
+        spool.close()
+        raise
+
+    try:
+        spool.seek(0)
+        mime_type, _, _ = check_image(spool.read(IMAGE_HEADER_SIZE), size)
+    except ImageError as e:
+        spool.close()
+        raise UploadError(error_response(str(e))) from e
+
+    filename = f"image.{IMAGE_EXTENSIONS[mime_type]}"
+    return ReceivedImage(SpooledInputFile(spool, filename), digest.hexdigest(), size)
+
+
+async def receive_upload(request: web.Request) -> tuple[dict[str, Any], list[ReceivedImage | str]]:
+    """Read a multipart support message.
+
+    Text parts ``telegramId``, ``message``, ``orderTitle`` and ``orderId`` set
+    the message fields. Each file part is an image, and each ``imageUrl`` text
+    part is an image URL; images keep the order of their parts.
+
+    Returns:
+        (message fields, images); the caller must close received images
+
+    Raises:
+        UploadError: With the error response to return
+    """
+    if request.content_length is not None and request.content_length > WEBHOOK_MAX_BODY_SIZE:
+        raise UploadError(error_response("Request body is too large", status=413))
+    if not request.content_type.startswith("multipart/"):
+        raise UploadError(error_response("Expected a multipart body"))
+
+    data: dict[str, Any] = {}
+    images: list[ReceivedImage | str] = []
+    body = _BodySize()
+    try:
+        reader = await request.multipart()
+        while (part := await reader.next()) is not None:
+            if not isinstance(part, BodyPartReader):
+                raise UploadError(error_response("Nested multipart bodies are not supported"))
+
+            if part.filename is not None:
+                if len(images) >= UPLOAD_MAX_IMAGES:
+                    raise UploadError(error_response("Too many images", status=413))
+                images.append(await _read_image(part, body))
+            elif part.name == "imageUrl":
+                if len(images) >= UPLOAD_MAX_IMAGES:
+                    raise UploadError(error_response("Too many images", status=413))
+                images.append(await _read_field(part, body))
+            elif part.name in TEXT_FIELDS:
+                data[part.name] = await _read_field(part, body)
+            else:
+                await _skip_part(part, body)
+    except BaseException as e:
+        close_images(images)
+        if isinstance(e, ValueError | AssertionError):
+            logger.warning(f"Malformed multipart upload: {e}")
+            raise UploadError(error_response("Malformed multipart body")) from e
+        raise
+
+    return data, images
+
+
+def close_images(images: list[ReceivedImage | str]) -> None:
+    """Release the temporary files of received images."""
+    for image in images:
+        if isinstance(image, ReceivedImage):
+            image.file.close()
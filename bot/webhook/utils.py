@@ -4,7 +4,7 @@ import logging
 from collections.abc import Awaitable, Callable
 from functools import wraps
 
-from aiogram.exceptions import TelegramBadRequest, TelegramForbiddenError
+from aiogram.exceptions import TelegramBadRequest, TelegramForbiddenError, TelegramRetryAfter
 from aiohttp import web
 
 from locales import load_user_language
@@ -16,6 +16,7 @@ logger = logging.getLogger(__name__)
 ERROR_BOT_BLOCKED = "BOT_BLOCKED"
 ERROR_INVALID_TELEGRAM_ID_OR_NOT_STARTED = "INVALID_TELEGRAM_ID_OR_NOT_STARTED"
 ERROR_INVALID_TELEGRAM_ID_FORMAT = "INVALID_TELEGRAM_ID_FORMAT"
+ERROR_RATE_LIMITED = "RATE_LIMITED"
 
 # Global bot instance reference
 _bot = None
@@ -32,14 +33,6 @@ def set_bot(bot):
     _bot = bot
 
 
-def is_valid_external_url(url: str) -> bool:
-    """Check if URL is valid for Telegram inline buttons (not localhost)."""
-    if not url:
-        return False
-    lower_url = url.lower()
-    return "localhost" not in lower_url and "127.0.0.1" not in lower_url
-
-
 def error_response(error: str, error_code: str | None = None, status: int = 400) -> web.Response:
     """Create a standardized error response."""
     response = {"success": False, "error": error}
@@ -54,6 +47,13 @@ def handle_telegram_exception(e: Exception, telegram_id: str | None, context: st
         logger.warning(f"Bot blocked by user {telegram_id}")
         return error_response(ERROR_BOT_BLOCKED, ERROR_BOT_BLOCKED)
 
+    if isinstance(e, TelegramRetryAfter):
+        # Retry budget of the outbound queue is exhausted
+        logger.warning(f"{context} for {telegram_id}: flood control, retry in {e.retry_after}s")
+        response = error_response(ERROR_RATE_LIMITED, ERROR_RATE_LIMITED, status=429)
+        response.headers["Retry-After"] = str(e.retry_after)
+        return response
+
     if isinstance(e, TelegramBadRequest):
         error_message = str(e)
         logger.error(f"{context} for {telegram_id}: {error_message}")
@@ -86,16 +86,23 @@ def require_bot(
     return wrapper
 
 
-async def validate_and_load_user(telegram_id: str | None) -> tuple[int | None, web.Response | None]:
-    """Validate telegram ID and load user language. Returns (user_id, error_response)."""
+def validate_telegram_id(telegram_id: str | None) -> web.Response | None:
+    """Validate telegram ID format. Returns an error response or None."""
     if not telegram_id:
-        return None, error_response("Missing telegramId")
+        return error_response("Missing telegramId")
 
     if not is_valid_telegram_id(telegram_id):
         logger.warning(f"Invalid Telegram ID format: {telegram_id}")
-        return None, error_response(
-            ERROR_INVALID_TELEGRAM_ID_FORMAT, ERROR_INVALID_TELEGRAM_ID_FORMAT
-        )
+        return error_response(ERROR_INVALID_TELEGRAM_ID_FORMAT, ERROR_INVALID_TELEGRAM_ID_FORMAT)
+
+    return None
+
+
+async def validate_and_load_user(telegram_id: str | None) -> tuple[int | None, web.Response | None]:
+    """Validate telegram ID and load user language. Returns (user_id, error_response)."""
+    error = validate_telegram_id(telegram_id)
+    if error is not None:
+        return None, error
 
     user_id = int(telegram_id)
     await load_user_language(user_id)
@@ -0,0 +1,84 @@
+/**
+ * Local store for customer media relayed by the bot.
+ *
+ * Files are streamed to disk as they arrive, so large uploads are never held
+ * in memory, and served back to authenticated staff under /api/media.
+ */
+
+import { createReadStream, createWriteStream } from 'node:fs';
+import { mkdir, stat, unlink } from 'node:fs/promises';
+import { join } from 'node:path';
+import { Readable, Transform } from 'node:stream';
+import { pipeline } from 'node:stream/promises';
+
+export const MEDIA_DIR = process.env.MEDIA_DIR || './media';
+export const MEDIA_MAX_SIZE = parseInt(process.env.MEDIA_MAX_SIZE || String(20 * 1024 * 1024));
+
+const EXTENSIONS: Record<string, string> = {
+	'image/jpeg': 'jpg',
+	'image/png': 'png',
+	'image/gif': 'gif',
+	'image/webp': 'webp',
+	'video/mp4': 'mp4',
+	'application/pdf': 'pdf'
+};
+
+const CONTENT_TYPES: Record<string, string> = Object.fromEntries(
+	Object.entries(EXTENSIONS).map(([type, ext]) => [ext, type])
+);
+
+const NAME_PATTERN = /^[0-9a-f-]{36}\.[a-z0-9]+$/;
+
+export class MediaTooLargeError extends Error {}
+
+/**
+ * Stream a request body into the media store and return the stored file name.
+ */
+export async function saveMedia(body: ReadableStream<Uint8Array>, contentType: string): Promise<string> {
+	const ext = EXTENSIONS[contentType.split(';')[0].trim()] ?? 'bin';
+	const name = `${crypto.randomUUID()}.${ext}`;
+	const path = join(MEDIA_DIR, name);
+	await mkdir(MEDIA_DIR, { recursive: true });
+
+	let size = 0;
+	const limit = new Transform({
+		transform(chunk: Buffer, _encoding, callback) {
+			size += chunk.length;
+			if (size > MEDIA_MAX_SIZE) {
+				callback(new MediaTooLargeError(`File exceeds ${MEDIA_MAX_SIZE} bytes`));
+				return;
+			}
+			callback(null, chunk);
+		}
+	});
+
+	try {
+		await pipeline(Readable.fromWeb(body as never), limit, createWriteStream(path));
+	} catch (error) {
+		await unlink(path).catch(() => {});
+		throw error;
+	}
+	return name;
+}
+
+/**
+ * Open a stored file for streaming, or return null if it does not exist.
+ */
+export async function openMedia(
+	name: string
+): Promise<{ stream: ReadableStream; size: number; contentType: string } | null> {
+	if (!NAME_PATTERN.test(name)) return null;
+
+	const path = join(MEDIA_DIR, name);
+	try {
+		const { size } = await stat(path);
+		const ext = name.split('.').pop() ?? '';
+		return {
+			stream: Readable.toWeb(createReadStream(path)) as ReadableStream,
+			size,
+			contentType: CONTENT_TYPES[ext] ?? 'application/octet-stream'
+		};
+	} catch {
+		return null;
+	}
+}
@@ -3,7 +3,7 @@ import { Type } from '@sinclair/typebox';
 import { TypeCompiler } from '@sinclair/typebox/compiler';
 import { db } from '../../../db';
 import * as schema from '../../../db/schema';
-import { eq } from 'drizzle-orm';
+import { eq, inArray } from 'drizzle-orm';
 import { publicProcedure } from '../../trpc';
 
 export const languageProcedures = {
@@ -25,6 +25,33 @@ export const languageProcedures = {
 			return { language: user?.language || null, exists: !!user };
 		}),
 
+	getUserLanguages: publicProcedure
+		.input((v) => {
+			const s = Type.Object({
+				telegramIds: Type.Array(Type.String(), { maxItems: 500 })
+			});
+			const check = TypeCompiler.Compile(s);
+			if (!check.Check(v)) throw new TRPCError({ code: 'BAD_REQUEST', message: 'Invalid input' });
+			return v as { telegramIds: string[] };
+		})
+		.query(async ({ input }) => {
+			if (input.telegramIds.length === 0) return { languages: {} };
+
+			const users = await db
+				.select({
+					telegramId: schema.telegramUsers.telegramId,
+					language: schema.telegramUsers.language
+				})
+				.from(schema.telegramUsers)
+				.where(inArray(schema.telegramUsers.telegramId, input.telegramIds));
+
+			const languages: Record<string, string | null> = {};
+			for (const user of users) {
+				languages[user.telegramId] = user.language || null;
+			}
+			return { languages };
+		}),
+
 	setUserLanguage: publicProcedure
 		.input((v) => {
 			const s = Type.Object({
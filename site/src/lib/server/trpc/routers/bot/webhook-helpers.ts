@@ -4,52 +4,129 @@
 
 const BOT_WEBHOOK_URL = process.env.BOT_WEBHOOK_URL || 'http://localhost:8081';
 
-export async function sendMessageToBot(
+// Ask the bot to accept deliveries into its outbox and answer 202 right away
+// (honoured when the bot runs with WEBHOOK_ASYNC_MODE=opt-in)
+const BOT_WEBHOOK_HEADERS: Record<string, string> =
+	process.env.BOT_WEBHOOK_ASYNC === 'true'
+		? { 'Content-Type': 'application/json', Prefer: 'respond-async' }
+		: { 'Content-Type': 'application/json' };
+
+/**
+ * Headers of one logical webhook call. The bot delivers a call at most once
+ * per Idempotency-Key, so a retry of the same call must reuse these headers.
+ */
+function webhookHeaders(
+	base: Record<string, string> = BOT_WEBHOOK_HEADERS
+): Record<string, string> {
+	return { ...base, 'Idempotency-Key': crypto.randomUUID() };
+}
+
+// Retries of a call the bot did not start: rejected by admission control (429
+// SERVER_BUSY) or still running under the same Idempotency-Key elsewhere (409)
+const BOT_WEBHOOK_MAX_RETRIES = Number(process.env.BOT_WEBHOOK_MAX_RETRIES ?? 3);
+const MAX_RETRY_DELAY_MS = 30_000;
+
+/**
+ * Check if the bot refused a call without attempting it. A 429 RATE_LIMITED
+ * comes from Telegram flood control after part of a delivery (e.g. some album
+ * chunks) may have been sent, so it is left to the caller.
+ */
+async function isRetryable(response: Response): Promise<boolean> {
+	if (response.status === 409) return true;
+	if (response.status !== 429) return false;
+	const body = (await response
+		.clone()
+		.json()
+		.catch(() => null)) as { errorCode?: string } | null;
+	return body?.errorCode === 'SERVER_BUSY';
+}
+
+/**
+ * POST to the bot, backing off for the Retry-After it asks for while it is
+ * saturated. Retries reuse the same headers, so the Idempotency-Key keeps a
+ * retried call from being delivered twice.
+ */
+async function postToBot(
+	path: string,
+	init: { headers: Record<string, string>; body: string | FormData }
+): Promise<Response> {
+	for (let attempt = 0; ; attempt++) {
+		const response = await fetch(`${BOT_WEBHOOK_URL}${path}`, { method: 'POST', ...init });
+		if (attempt >= BOT_WEBHOOK_MAX_RETRIES || !(await isRetryable(response))) return response;
+		const retryAfter = Number(response.headers.get('Retry-After'));
+		const delay = retryAfter > 0 ? retryAfter * 1000 : 1000 * 2 ** attempt;
+		// Jitter spreads the retries of a bulk action over time
+		const jittered = Math.min(delay, MAX_RETRY_DELAY_MS) * (1 + Math.random() * 0.25);
+		await new Promise((resolve) => setTimeout(resolve, jittered));
+	}
+}
+
+// Send images as binary multipart parts instead of base64 data URLs in JSON
+const BOT_WEBHOOK_UPLOADS = process.env.BOT_WEBHOOK_UPLOADS === 'true';
+
+const DATA_URL_PATTERN = /^data:([^;,]+)?(;base64)?,(.*)$/s;
+
+/**
+ * Build a multipart body for /send-message/upload. Data URLs become binary
+ * image parts, other URLs are passed through as imageUrl fields.
+ */
+function buildUploadForm(
 	telegramId: string,
 	message: string,
-	orderTitle?: string,
-	orderId?: string,
-	imageUrls?: string[]
-): Promise<boolean> {
-	try {
-		if (!imageUrls || imageUrls.length === 0) {
-			return sendSingleMessageToBot(telegramId, message, orderTitle, orderId);
-		}
+	orderTitle: string | undefined,
+	orderId: string | undefined,
+	imageUrls: string[]
+): FormData {
+	const form = new FormData();
+	form.append('telegramId', telegramId);
+	if (message) form.append('message', message);
+	if (orderTitle) form.append('orderTitle', orderTitle);
+	if (orderId) form.append('orderId', orderId);
 
-		for (let i = 0; i < imageUrls.length; i++) {
-			const caption = i === 0 ? message : '';
-			await sendSingleMessageToBot(
-				telegramId,
-				caption,
-				i === 0 ? orderTitle : undefined,
-				i === 0 ? orderId : undefined,
-				imageUrls[i]
-			);
+	imageUrls.forEach((url, i) => {
+		const match = DATA_URL_PATTERN.exec(url);
+		if (!match) {
+			form.append('imageUrl', url);
+			return;
 		}
+		const type = match[1] || 'image/png';
+		const bytes = match[2]
+			? Buffer.from(match[3], 'base64')
+			: Buffer.from(decodeURIComponent(match[3]));
+		form.append('image', new Blob([bytes], { type }), `image-${i}.${type.split('/')[1]}`);
+	});
 
-		return true;
-	} catch {
-		return false;
-	}
+	return form;
 }
 
-async function sendSingleMessageToBot(
+/**
+ * Send a support message to a customer. All images go in a single webhook
+ * call; the bot delivers them as albums with the message as caption.
+ */
+export async function sendMessageToBot(
 	telegramId: string,
 	message: string,
 	orderTitle?: string,
 	orderId?: string,
-	imageUrl?: string
+	imageUrls?: string[]
 ): Promise<boolean> {
 	try {
-		const response = await fetch(`${BOT_WEBHOOK_URL}/send-message`, {
-			method: 'POST',
-			headers: { 'Content-Type': 'application/json' },
+		if (BOT_WEBHOOK_UPLOADS && imageUrls && imageUrls.length > 0) {
+			const response = await postToBot('/send-message/upload', {
+				headers: webhookHeaders({}),
+				body: buildUploadForm(telegramId, message, orderTitle, orderId, imageUrls)
+			});
+			return response.ok;
+		}
+
+		const response = await postToBot('/send-message', {
+			headers: webhookHeaders(),
 			body: JSON.stringify({
 				telegramId,
 				message,
 				orderTitle,
 				orderId,
-				imageUrls: imageUrl ? [imageUrl] : undefined
+				imageUrls: imageUrls && imageUrls.length > 0 ? imageUrls : undefined
 			})
 		});
 
@@ -61,9 +138,8 @@ async function sendSingleMessageToBot(
 
 export async function notifyBot(type: string, data: Record<string, unknown>): Promise<boolean> {
 	try {
-		const response = await fetch(`${BOT_WEBHOOK_URL}/notify`, {
-			method: 'POST',
-			headers: { 'Content-Type': 'application/json' },
+		const response = await postToBot('/notify', {
+			headers: webhookHeaders(),
 			body: JSON.stringify({ type, ...data })
 		});
 
@@ -75,9 +151,8 @@ export async function notifyBot(type: string, data: Record<string, unknown>): Pr
 
 export async function notifyStaff(type: string, data: Record<string, unknown>): Promise<boolean> {
 	try {
-		const response = await fetch(`${BOT_WEBHOOK_URL}/notify-staff`, {
-			method: 'POST',
-			headers: { 'Content-Type': 'application/json' },
+		const response = await postToBot('/notify-staff', {
+			headers: webhookHeaders(),
 			body: JSON.stringify({ type, ...data })
 		});
 
@@ -86,3 +161,32 @@ export async function notifyStaff(type: string, data: Record<string, unknown>):
 		return false;
 	}
 }
+
+/**
+ * Notify many staff members with one webhook call. `shared` holds the fields
+ * common to all recipients (type, orderTitle, ...), `items` the per-recipient
+ * fields (at least telegramId). Returns the number of failed deliveries.
+ */
+export async function notifyStaffBatch(
+	shared: Record<string, unknown>,
+	items: Record<string, unknown>[]
+): Promise<number> {
+	if (items.length === 0) return 0;
+
+	try {
+		const response = await postToBot('/notify-staff-batch', {
+			headers: BOT_WEBHOOK_HEADERS,
+			// Batch calls are keyed per item
+			body: JSON.stringify({
+				...shared,
+				items: items.map((item) => ({ idempotencyKey: crypto.randomUUID(), ...item }))
+			})
+		});
+		if (!response.ok) return items.length;
+
+		const result = (await response.json()) as { failed?: number };
+		return result.failed ?? 0;
+	} catch {
+		return items.length;
+	}
+}
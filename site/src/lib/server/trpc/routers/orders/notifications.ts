@@ -1,7 +1,7 @@
 import { db } from '../../../db';
 import * as schema from '../../../db/schema';
 import { eq } from 'drizzle-orm';
-import { notifyBot, notifyStaff } from '../bot/webhook-helpers';
+import { notifyBot, notifyStaff, notifyStaffBatch } from '../bot/webhook-helpers';
 import { getUsersWithPermission } from './permissions';
 import { isValidTelegramId } from './validation';
 
@@ -12,6 +12,8 @@ export interface NotificationData {
 	type: NotificationType;
 	telegramId: string;
 	orderTitle: string;
+	// Order titles are not unique; the bot merges status changes per order ID
+	orderId: string;
 	status?: string;
 }
 
@@ -37,33 +39,20 @@ export async function notifyAssignersAboutResponse(
 	responderUsername: string
 ): Promise<void> {
 	const assigners = await getUsersWithPermission('assign_orders');
-	
-	const notifications = assigners.map((user) =>
-		notifyStaffMember({
-			type: 'new_response',
-			telegramId: user.telegramId,
-			orderTitle,
-			orderId,
-			responderUsername
-		})
-	);
 
-	await Promise.allSettled(notifications);
+	await notifyStaffBatch(
+		{ type: 'new_response', orderTitle, orderId, responderUsername },
+		assigners.map((user) => ({ telegramId: user.telegramId }))
+	);
 }
 
 export async function notifyModeratorsAboutNewOrder(orderId: string, orderTitle: string): Promise<void> {
 	const moderators = await getUsersWithPermission('moderate_orders');
-	
-	const notifications = moderators.map((user) =>
-		notifyStaffMember({
-			type: 'new_order_moderation',
-			telegramId: user.telegramId,
-			orderTitle,
-			orderId
-		})
-	);
 
-	await Promise.allSettled(notifications);
+	await notifyStaffBatch(
+		{ type: 'new_order_moderation', orderTitle, orderId },
+		moderators.map((user) => ({ telegramId: user.telegramId }))
+	);
 }
 
 export async function notifyUserAboutAssignment(
@@ -55,7 +55,8 @@ export const assign = permissionProcedure('assign_orders')
 			await notifyCustomer({
 				type: 'order_assigned',
 				telegramId: order.customerTelegramId,
-				orderTitle: order.title
+				orderTitle: order.title,
+				orderId: order.id
 			});
 		}
 
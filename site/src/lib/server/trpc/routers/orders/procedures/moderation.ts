@@ -46,7 +46,8 @@ export const approve = permissionProcedure('moderate_orders')
 		await notifyCustomer({
 			type: 'order_approved',
 			telegramId: order.customerTelegramId,
-			orderTitle: order.title
+			orderTitle: order.title,
+			orderId: order.id
 		});
 
 		return { success: true };
@@ -74,7 +75,8 @@ export const reject = permissionProcedure('moderate_orders')
 		await notifyCustomer({
 			type: 'order_rejected',
 			telegramId: order.customerTelegramId,
-			orderTitle: order.title
+			orderTitle: order.title,
+			orderId: order.id
 		});
 
 		return { success: true };
@@ -73,6 +73,7 @@ export const updateStatus = protectedProcedure
 			type: 'order_status_changed',
 			telegramId: order.customerTelegramId,
 			orderTitle: order.title,
+			orderId: order.id,
 			status: input.status
 		});
 
@@ -0,0 +1,33 @@
+import type { RequestHandler } from './$types';
+import { json } from '@sveltejs/kit';
+import { MEDIA_MAX_SIZE, MediaTooLargeError, saveMedia } from '$lib/server/media';
+
+const BOT_MEDIA_TOKEN = process.env.BOT_MEDIA_TOKEN || '';
+
+/**
+ * Receive a customer file streamed by the bot (media relay mode).
+ * Disabled unless BOT_MEDIA_TOKEN is configured.
+ */
+export const POST: RequestHandler = async ({ request }) => {
+	if (!BOT_MEDIA_TOKEN || request.headers.get('x-bot-token') !== BOT_MEDIA_TOKEN) {
+		return new Response('Unauthorized', { status: 401 });
+	}
+
+	const contentLength = Number(request.headers.get('content-length') || 0);
+	if (contentLength > MEDIA_MAX_SIZE) {
+		return new Response('File too large', { status: 413 });
+	}
+	if (!request.body) {
+		return new Response('Missing file', { status: 400 });
+	}
+
+	try {
+		const name = await saveMedia(request.body, request.headers.get('content-type') || '');
+		return json({ url: `/api/media/${name}` });
+	} catch (error) {
+		if (error instanceof MediaTooLargeError) {
+			return new Response('File too large', { status: 413 });
+		}
+		throw error;
+	}
+};
@@ -0,0 +1,41 @@
+import type { RequestHandler } from './$types';
+import { db } from '$lib/server/db';
+import * as schema from '$lib/server/db/schema';
+import { eq } from 'drizzle-orm';
+import { openMedia } from '$lib/server/media';
+
+/**
+ * Serve relayed customer media to signed-in staff.
+ */
+export const GET: RequestHandler = async ({ params, cookies }) => {
+	// Verify session
+	const sessionId = cookies.get('session');
+	if (!sessionId) {
+		return new Response('Unauthorized', { status: 401 });
+	}
+
+	const sessionResult = await db
+		.select()
+		.from(schema.sessions)
+		.where(eq(schema.sessions.id, sessionId))
+		.limit(1);
+	const session = sessionResult[0];
+
+	if (!session || new Date(session.expiresAt) < new Date()) {
+		return new Response('Unauthorized', { status: 401 });
+	}
+
+	const media = await openMedia(params.name);
+	if (!media) {
+		return new Response('Not found', { status: 404 });
+	}
+
+	return new Response(media.stream, {
+		headers: {
+			'Content-Type': media.contentType,
+			'Content-Length': String(media.size),
+			// File names are random and never reused
+			'Cache-Control': 'private, max-age=31536000, immutable'
+		}
+	});
+};